@@ -0,0 +1,5 @@
+'''
+Micro and macro benchmarks for the workflow hot paths.
+
+Run a module with, e.g.: python -m benchmarks.step
+'''
@@ -0,0 +1,62 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Cost of ArgSpec validation as the number of declared specs grows, comparing
+the single fused wrapper with one wrapper per spec.
+'''
+import functools
+from marx.workflow.step import LogicUnit, ArgSpec
+from benchmarks.harness import measure, report
+
+
+def stacked(specs, func):
+    """One wrapper per spec, the way ArgSpecs were applied before being fused."""
+    for spec in specs:
+        def wrap(spec, func):
+            def wrapper(self, **kwargs):
+                if spec.name not in kwargs:
+                    kwargs[spec.name] = spec.default
+                kwargs[spec.name] = spec.normalizer(spec.name, kwargs[spec.name], spec.types)
+                return func(self, **kwargs)
+            return wrapper
+        func = wrap(spec, func)
+    return func
+
+
+def unit_with(count):
+    """Returns a LogicUnit class declaring count int ArgSpecs, the last with a default,
+    its argument names and its undecorated __call__."""
+    names = ["arg_%d" % i for i in range(count)]
+    attrs = {}
+    for i, name in enumerate(names):
+        attrs[name] = ArgSpec(int, default=0) if i == count - 1 else ArgSpec(int)
+    namespace = {}
+    exec "def __call__(self, %s):\n    pass\n" % ", ".join(names) in namespace
+    attrs['__call__'] = namespace['__call__']
+    return type("Unit%d" % count, (LogicUnit,), attrs), names, namespace['__call__']
+
+
+def suite():
+    """The cases of the benchmark suite: (name, function, calls per round)."""
+    for count in (1, 4, 8, 16):
+        cls, names, _ = unit_with(count)
+        kwargs = dict((name, 1) for name in names[:-1])
+        yield "argspec/%d specs" % count, functools.partial(cls(), **kwargs), 100000
+
+
+def main():
+    rows = []
+    for count in (1, 2, 4, 8, 16):
+        cls, names, call = unit_with(count)
+        kwargs = dict((name, 1) for name in names[:-1])
+        unit = cls()
+        slow = stacked(cls._arg_specs, call)
+        rows.append(("%2d specs (fused)" % count, measure(lambda: unit(**kwargs))))
+        rows.append(("%2d specs (stacked)" % count, measure(lambda: slow(unit, **kwargs))))
+    report("ArgSpec validation", rows)
+
+
+if __name__ == '__main__':
+    main()
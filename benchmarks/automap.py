@@ -0,0 +1,52 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Binding context fields to LogicUnit arguments with AutoMap.
+'''
+import functools
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.step import LogicUnit, ArgSpec, Step
+from benchmarks.harness import measure, report
+
+
+class Context(DefaultContext):
+    user = Field(str)
+    item = Field(str)
+    amount = Field(int)
+
+
+class Purchase(LogicUnit):
+    user = ArgSpec(str)
+    item = ArgSpec(str)
+    amount = ArgSpec(int)
+
+    def __call__(self, user, item, amount, note="none", buyer=None):
+        pass
+
+
+def make_context():
+    context = Context()
+    context.user, context.item, context.amount = "bob", "pie", 1
+    return context
+
+
+def suite():
+    """The cases of the benchmark suite: (name, function, calls per round)."""
+    context = make_context()
+    auto_map = Purchase.AutoMap({Purchase.BUYER: Context.USER})
+    yield "automap/bind", functools.partial(auto_map, context), 100000
+    bound = Purchase.AutoMap({Purchase.BUYER: Context.USER}, ctx_cls=Context)
+    yield "automap/bind to class", functools.partial(bound, context), 100000
+    yield "automap/step", functools.partial(Step(Purchase(), arg_map=auto_map), context), 100000
+    dict_map = Step(Purchase(), arg_map={'user': 'user', 'item': 'item', 'amount': 'amount', 'buyer': 'user'})
+    yield "automap/dict map step", functools.partial(dict_map, context), 100000
+
+
+def main():
+    report("AutoMap", [(name, measure(func, number)) for name, func, number in suite()])
+
+
+if __name__ == '__main__':
+    main()
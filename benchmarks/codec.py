@@ -0,0 +1,74 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Encoding and decoding a context with the binary and JSON lines codecs,
+against pickle, and the sizes of the encodings.
+'''
+import cPickle
+import functools
+from marx.workflow.codec import BinaryCodec, JsonLinesCodec
+from marx.workflow.context import DefaultContext, Field
+from benchmarks.harness import measure, report
+
+
+class Context(DefaultContext):
+    user_id = Field(int)
+    name = Field(str)
+    score = Field(float)
+    active = Field(bool)
+    tags = Field(list)
+    attributes = Field(dict)
+    note = Field(str)
+
+
+def sample():
+    context = Context()
+    context.user_id = 123456
+    context.name = "frank"
+    context.score = 0.75
+    context.active = True
+    context.tags = ["a", "b", "c"]
+    context.attributes = {"country": "nz", "visits": 12}
+    return context
+
+
+def pickle_encode(context):
+    return cPickle.dumps(context, 2)
+
+
+def encoders():
+    """Yields the (name, encode, decode) of the ways of encoding a Context."""
+    binary, json_lines = BinaryCodec(), JsonLinesCodec()
+    yield "pickle", pickle_encode, cPickle.loads
+    yield "binary", binary.encode, functools.partial(binary.decode, cls=Context)
+    yield "json lines", json_lines.encode, functools.partial(json_lines.decode, cls=Context)
+
+
+def suite():
+    """The cases of the benchmark suite: (name, function, calls per round)."""
+    context = sample()
+    for name, encode, decode in encoders():
+        data = encode(context)
+        yield "codec/encode %s" % name, functools.partial(encode, context), 20000
+        yield "codec/decode %s" % name, functools.partial(decode, data), 20000
+
+
+def main():
+    context = sample()
+    rows = []
+    sizes = []
+    for name, encode, decode in encoders():
+        data = encode(context)
+        rows.append(("encode (%s)" % name, measure(functools.partial(encode, context), number=20000)))
+        rows.append(("decode (%s)" % name, measure(functools.partial(decode, data), number=20000)))
+        sizes.append((name, len(data)))
+    report("Context encodings", rows)
+    print "Sizes"
+    for name, size in sizes:
+        print "  %-10s %5d bytes" % (name, size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Field reads and writes and per context memory, comparing the array backed
+layout of contexts with per field instance attributes.
+'''
+import functools
+import sys
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow import validation
+from marx.workflow.exceptions import InvalidContextAssignment
+from benchmarks.harness import measure, report
+
+NAMES = "abcd"
+
+
+class Context(DefaultContext):
+    a = Field(int)
+    b = Field(int)
+    c = Field(str)
+    d = Field()
+
+
+class AttributeContext(object):
+    """Stores field values in the instance dict, the way Fields did before the
+    array backed layout."""
+    def __init__(self, workflow=None):
+        self.workflow = workflow
+        self._replies = []
+
+
+def attribute_field(cls, name, *types):
+    attname = "_" + name
+
+    def get(instance):
+        return getattr(instance, attname, None)
+
+    def set(instance, value):  # @ReservedAssignment
+        if types and not isinstance(value, types):
+            raise InvalidContextAssignment((name, value))
+        setattr(instance, attname, value)
+    setattr(cls, name, property(get, set))
+
+attribute_field(AttributeContext, 'a', int)
+attribute_field(AttributeContext, 'b', int)
+attribute_field(AttributeContext, 'c', str)
+attribute_field(AttributeContext, 'd')
+
+
+def size_of(context):
+    """Bytes held by the context itself, its instance dict and its values array."""
+    size = sys.getsizeof(context)
+    if context.__dict__:
+        size += sys.getsizeof(context.__dict__)
+    if hasattr(context, '_values'):
+        size += sys.getsizeof(context._values)
+    return size
+
+
+def suite():
+    """The cases of the benchmark suite: (name, function, calls per round)."""
+    context = Context()
+    context.a = 1
+    yield "field/read", lambda: context.a, 200000
+    yield "field/write", functools.partial(setattr, context, 'b', 3), 200000
+    yield "field/rejected write", functools.partial(rejected_write, context), 50000
+    yield "context/create", Context, 50000
+    yield "context/fork", context.fork, 50000
+    yield "context/fork and write", functools.partial(fork_and_write, context), 50000
+
+
+def fork_and_write(context):
+    context.fork().b = 3
+
+
+def rejected_write(context):
+    try:
+        context.c = 1
+    except InvalidContextAssignment:
+        pass
+
+
+def main():
+    rows = []
+    sizes = []
+    for name, cls in (("array", Context), ("instance dict", AttributeContext)):
+        context = cls()
+        context.a, context.b, context.c, context.d = 1, 2, "c", None
+        rows.append(("read (%s)" % name, measure(lambda: context.a)))
+        rows.append(("write (%s)" % name, measure(lambda: setattr(context, 'b', 3))))
+        rows.append(("unset read (%s)" % name, measure(lambda: cls().d, number=20000)))
+        sizes.append((name, size_of(context)))
+    report("Field get/set", rows)
+    for name, size in sizes:
+        print "  %s: %d bytes per context" % (name, size)
+
+    rows = []
+    context = Context()
+    for mode in (validation.STRICT, validation.SAMPLED, validation.TRUSTED):
+        previous = validation.set_default(validation.Validation(mode))
+        try:
+            rows.append(("write (%s)" % mode, measure(lambda: setattr(context, 'b', 3))))
+        finally:
+            validation.set_default(previous)
+    report("Field set by validation mode", rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Whole workflow runs through the interpreted Workflow.__call__, the
+fused function returned by Workflow.compile(), with a StepStats
+collector or a Tracer hooked in, and checkpointed (Workflow.run).
+'''
+import atexit
+import functools
+import shutil
+import tempfile
+from marx.workflow.checkpoint import Checkpointer, FileStore
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import SkipStep, SKIP
+from marx.workflow.flow import Workflow
+from marx.workflow.instrument import StepStats
+from marx.workflow.step import Step
+from marx.workflow.trace import RingBufferExporter, Tracer
+from benchmarks.harness import measure, report
+from tests.workflow.example_1 import ThrowPieWorkflowA, ThrowPieContext
+from tests.workflow.example_objects import User
+
+
+class Context(DefaultContext):
+    value = Field(int)
+
+
+class Increment(object):
+    def __call__(self, value):
+        return {'value': value + 1}
+
+
+class Skip(object):
+    def __call__(self):
+        raise SkipStep()
+
+
+class ReturnSkip(object):
+    def __call__(self):
+        return SKIP
+
+
+def synthetic(size, skip_every=5, skip=Skip):
+    """Returns a workflow of size steps, every skip_every-th one skipping, by
+    calling an instance of skip."""
+    steps = []
+    for i in range(size):
+        if skip_every and i % skip_every == skip_every - 1:
+            steps.append(Step(skip()))
+        else:
+            steps.append(Step(Increment(), arg_map={'value': 'value'}, result_map={'value': 'value'}))
+    return Workflow(steps=steps)
+
+
+def run_example_1(workflow):
+    context = ThrowPieContext()
+    context.thrower = User("bob")
+    context.target = User("frank")
+    workflow(context)
+
+
+def run_synthetic(workflow):
+    context = Context()
+    context.value = 0
+    workflow(context)
+
+
+def run_checkpointed(workflow):
+    context = Context()
+    context.value = 0
+    workflow.run(context, 'benchmark')
+
+
+def compose(size):
+    """Assembles a workflow of size steps, one + at a time, and flattens it."""
+    workflow = Workflow()
+    step = Step(Increment(), arg_map={'value': 'value'}, result_map={'value': 'value'})
+    for _ in xrange(size):
+        workflow = workflow + step
+    return workflow.steps.flat
+
+
+def suite():
+    """The cases of the benchmark suite: (name, function, calls per round)."""
+    yield "flow/example_1", functools.partial(run_example_1, ThrowPieWorkflowA), 5000
+    yield "flow/example_1 compiled", functools.partial(run_example_1, ThrowPieWorkflowA.compile()), 5000
+    for size in (10, 100):
+        workflow = synthetic(size)
+        yield "flow/%d steps" % size, functools.partial(run_synthetic, workflow), 20000 // size
+        yield "flow/%d steps compiled" % size, functools.partial(run_synthetic, workflow.compile()), 20000 // size
+    for name, skip in (("raised", Skip), ("returned", ReturnSkip)):
+        workflow = synthetic(20, skip_every=2, skip=skip)
+        # 20 steps, every other one skipping.
+        yield "flow/skips %s" % name, functools.partial(run_synthetic, workflow), 2000
+        yield "flow/skips %s compiled" % name, functools.partial(run_synthetic, workflow.compile()), 2000
+    # the runs not traced take the uninstrumented path: past "flow/10 steps", 1 in 100
+    # costs a hundredth of what tracing each run does.
+    for rate in (1, 100):
+        workflow = synthetic(10)
+        workflow.add_hook(Tracer(RingBufferExporter(), rate=rate))
+        yield "flow/10 steps traced 1 in %d" % rate, functools.partial(run_synthetic, workflow), 2000
+    yield "flow/compose 1000 steps", functools.partial(compose, 1000), 20
+    # to a file store, which fsyncs each checkpoint.
+    directory = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, directory, True)
+    for name, background in (("background", True), ("synchronous", False)):
+        workflow = synthetic(10, skip_every=0)
+        workflow.checkpoints = Checkpointer(FileStore(directory), background=background)
+        yield "flow/10 steps checkpointed %s" % name, functools.partial(run_checkpointed, workflow), 50
+
+
+def main():
+    rows = []
+    for size in (1, 20, 50):
+        workflow = synthetic(size)
+        compiled = workflow.compile()
+        instrumented = synthetic(size)
+        instrumented.add_hook(StepStats())
+
+        def run(workflow=workflow):
+            context = Context()
+            context.value = 0
+            workflow(context)
+
+        def run_compiled(compiled=compiled):
+            context = Context()
+            context.value = 0
+            compiled(context)
+
+        rows.append(("%d steps (interpreted)" % size, measure(run, number=20000 // size)))
+        rows.append(("%d steps (compiled)" % size, measure(run_compiled, number=20000 // size)))
+        rows.append(("%d steps (StepStats)" % size, measure(lambda: run(instrumented), number=20000 // size)))
+    report("Workflow runs", rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import timeit
+
+
+def measure(func, number=100000, repeat=3):
+    """Returns the best observed time of a single call to func, in seconds."""
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def report(title, rows):
+    """Prints a table of (name, seconds per call) rows."""
+    print title
+    width = max(len(name) for name, _ in rows)
+    for name, seconds in rows:
+        print "  %-*s %10.3f usec/call" % (width, name, seconds * 1e6)
@@ -0,0 +1,70 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Throughput of a CPU bound step as workers are added: in threads, where the
+GIL serializes it, and in a process pool.
+'''
+import multiprocessing
+import time
+from multiprocessing.pool import ThreadPool
+
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.flow import Workflow
+from marx.workflow.process import ProcessPool
+from marx.workflow.step import LogicUnit, ArgSpec, ResultSpec, Step
+
+RUNS = 64
+
+
+class Crunch(LogicUnit):
+    rounds = ArgSpec(int)
+    total = ResultSpec(int)
+
+    def __call__(self, rounds):
+        total = 0
+        for i in xrange(rounds):
+            total += i * i % 7
+        self.result.total = total
+
+
+class Context(DefaultContext):
+    rounds = Field(int)
+    total = Field(int)
+
+
+def throughput(workflow, workers):
+    """Workflow runs per second, with workers runs in flight at once."""
+    contexts = []
+    for _ in range(RUNS):
+        context = Context()
+        context.rounds = 200000
+        contexts.append(context)
+    threads = ThreadPool(workers)
+    try:
+        start = time.time()
+        threads.map(workflow, contexts)
+        return RUNS / (time.time() - start)
+    finally:
+        threads.close()
+
+
+def main():
+    cores = multiprocessing.cpu_count()
+    counts = sorted(set([1, 2, 4, cores]))
+    in_thread = Workflow(steps=[Step(Crunch(), arg_map=Crunch.AutoMap(), result_map=Crunch.ResultMap(Context))])
+    print "Crunch step throughput (%d cores)" % cores
+    for workers in counts:
+        pool = ProcessPool(workers)
+        in_process = Workflow(steps=[Step(Crunch(), arg_map=Crunch.AutoMap(),
+                                          result_map=Crunch.ResultMap(Context), process_pool=pool)])
+        try:
+            print "  %2d workers: %7.1f runs/s in threads, %7.1f runs/s in processes" % (
+                workers, throughput(in_thread, workers), throughput(in_process, workers))
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    main()
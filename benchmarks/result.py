@@ -0,0 +1,61 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Cost of ResultSpec managed calls and of building their result objects,
+comparing the slotted per unit result type with a dict backed one.
+'''
+from marx.workflow.step import LogicUnit, ResultSpec
+from benchmarks.harness import measure, report
+
+
+class DictResult(dict):
+    """The dict backed result object, as built before result types were generated."""
+    def __init__(self, fields):
+        object.__setattr__(self, '_fields', fields)
+        object.__setattr__(self, '_values', {name: spec._default for name, spec in fields.iteritems()})
+
+    def __getattr__(self, name):
+        return self._values[name]
+
+    def __setattr__(self, name, value):
+        self.__setitem__(name, value)
+
+    def __setitem__(self, name, value):
+        spec = self._fields[name]
+        if not isinstance(value, spec.types):
+            raise TypeError((value, spec.types))
+        self._values[name] = value
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+
+class Score(LogicUnit):
+    score = ResultSpec(int, default=0)
+    passed = ResultSpec(bool, default=False)
+    reason = ResultSpec(str)
+
+    def __call__(self):
+        self.result.score = 10
+        self.result.passed = True
+
+
+def suite():
+    """The cases of the benchmark suite: (name, function, calls per round)."""
+    yield "result/build", Score._result_type, 100000
+    yield "result/managed call", Score(), 100000
+
+
+def main():
+    fields = Score._result_fields
+    unit = Score()
+    rows = [("build (dict)", measure(lambda: DictResult(fields))),
+            ("build (slotted)", measure(Score._result_type)),
+            ("managed call", measure(unit))]
+    report("ResultSpec", rows)
+
+
+if __name__ == '__main__':
+    main()
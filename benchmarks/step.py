@@ -0,0 +1,105 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Per call overhead of Step.__call__, comparing the compiled invocation plan
+with the interpreted mapping it replaces.
+'''
+import functools
+from marx.workflow.condition import field
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import SkipStep
+from marx.workflow.flow import Workflow
+from marx.workflow.step import Step
+from benchmarks.harness import measure, report
+
+
+class Context(DefaultContext):
+    a = Field(int)
+    b = Field(int)
+    c = Field(int)
+    total = Field(int)
+    first = Field(int)
+
+
+class Add(object):
+    def __call__(self, a, b, c, scale):
+        return {'total': (a + b + c) * scale, 'parts': [a, b, c]}
+
+add = Add()
+
+
+class AddUnlessTotal(Add):
+    """Skips, once called, when the total is set."""
+    def __call__(self, a, b, c, scale, total):
+        if total is not None:
+            raise SkipStep()
+        return Add.__call__(self, a, b, c, scale)
+
+
+def interpreted(step):
+    """The per call path of Step before invocation plans were compiled."""
+    def call(context):
+        kwargs = {}
+        if step._pass_context:
+            kwargs['context'] = context
+        kwargs.update(step.arg_mapper(context))
+        if step.extra_kwargs:
+            kwargs.update(step.extra_kwargs)
+        result = step._call(**kwargs)
+        step.result_mapper(result, context)
+    return call
+
+
+def steps():
+    yield "dict maps", Step(add,
+                            arg_map={'a': 'a', 'b': 'b', 'c': 'c'},
+                            result_map={'total': 'total', 'first': ('parts', 0)},
+                            extra_kwargs={'scale': 2})
+    yield "callable arg map", Step(add,
+                                   arg_map=lambda context: {'a': context.a, 'b': context.b, 'c': context.c},
+                                   result_map={'total': lambda result, context: result['total']},
+                                   extra_kwargs={'scale': 2})
+    yield "no result map", Step(add,
+                                arg_map={'a': 'a', 'b': 'b', 'c': 'c'},
+                                extra_kwargs={'scale': 2})
+
+
+def make_context():
+    context = Context()
+    context.a, context.b, context.c = 1, 2, 3
+    return context
+
+
+def skipping():
+    """Workflows of a step skipped as the total is set, by the callable or by a condition."""
+    maps = dict(arg_map={'a': 'a', 'b': 'b', 'c': 'c'}, result_map={'total': 'total'}, extra_kwargs={'scale': 2})
+    yield "skip in callable", Workflow(steps=[Step(AddUnlessTotal(), arg_map=dict(maps['arg_map'], total='total'),
+                                                   result_map=maps['result_map'],
+                                                   extra_kwargs=maps['extra_kwargs'])])
+    yield "skip by when", Workflow(steps=[Step(add, when=field('total').is_none(), **maps)])
+
+
+def suite():
+    """The cases of the benchmark suite: (name, function, calls per round)."""
+    context = make_context()
+    for name, step in steps():
+        yield "step/%s" % name, functools.partial(step, context), 100000
+    context.total = 1
+    for name, workflow in skipping():
+        yield "step/%s" % name, functools.partial(workflow, context), 100000
+
+
+def main():
+    context = make_context()
+    rows = []
+    for name, step in steps():
+        before = interpreted(step)
+        rows.append(("%s (interpreted)" % name, measure(lambda: before(context))))
+        rows.append(("%s (compiled)" % name, measure(lambda: step(context))))
+    report("Step.__call__", rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+The benchmark suite: runs the cases of every benchmark module, and writes the
+results as JSON for comparing versions.
+
+    python -m benchmarks --json results.json
+    python -m benchmarks --compare baseline.json --threshold 10
+'''
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import sys
+
+import marx
+from benchmarks.harness import measure
+
+MODULES = ('step', 'argspec', 'context', 'result', 'automap', 'flow', 'codec')
+
+
+def cases(modules=MODULES, only=None):
+    """Yields the (name, function, calls per round) cases of the given modules,
+    keeping those with only in their name, if given."""
+    for module in modules:
+        for name, func, number in importlib.import_module('benchmarks.' + module).suite():
+            if only is None or only in name:
+                yield name, func, number
+
+
+def run(modules=MODULES, only=None, repeat=3, scale=1.0):
+    """Runs the cases, and returns the results as a JSON serializable dict."""
+    results = {}
+    stdout, devnull = sys.stdout, open(os.devnull, 'w')
+    try:
+        for name, func, number in cases(modules, only):
+            number = max(1, int(number * scale))
+            # some cases, like example_1, print.
+            sys.stdout = devnull
+            try:
+                seconds = measure(func, number=number, repeat=repeat)
+            finally:
+                sys.stdout = stdout
+            results[name] = {'usec': seconds * 1e6, 'number': number, 'repeat': repeat}
+            print >> stdout, "%-40s %12.3f usec/call" % (name, seconds * 1e6)
+    finally:
+        devnull.close()
+    return {'meta': {'marx': marx.__version__,
+                     'python': platform.python_version(),
+                     'implementation': platform.python_implementation(),
+                     'platform': platform.platform(),
+                     'time': datetime.datetime.utcnow().isoformat() + 'Z'},
+            'results': results}
+
+
+def compare(baseline, current, threshold):
+    """Prints the change of each case against the baseline, and returns the names
+    of those slower by more than threshold percent."""
+    regressions = []
+    for name in sorted(current['results']):
+        now = current['results'][name]['usec']
+        before = baseline['results'].get(name, {}).get('usec')
+        if before is None:
+            print "%-40s %12.3f usec/call (new)" % (name, now)
+            continue
+        change = (now - before) / before * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print "%-40s %12.3f -> %12.3f usec/call %+7.1f%%%s" % (name, before, now, change, flag)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Runs the benchmark suite.")
+    parser.add_argument('--json', metavar='FILE', help="write the results to FILE")
+    parser.add_argument('--compare', metavar='FILE', help="compare with the results in FILE")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="percent slowdown reported as a regression (default: 10)")
+    parser.add_argument('--only', metavar='TEXT', help="run the cases with TEXT in their name")
+    parser.add_argument('--repeat', type=int, default=3, help="rounds per case, the best is kept")
+    parser.add_argument('--scale', type=float, default=1.0, help="scale the calls per round, for quick runs")
+    args = parser.parse_args(argv)
+
+    current = run(only=args.only, repeat=args.repeat, scale=args.scale)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print
+        if compare(baseline, current, args.threshold):
+            return 1
+    return 0
@@ -0,0 +1,238 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+The marx command: runs the contexts of a JSON-lines file through a
+workflow, and reports the throughput and the latency of each step, to
+reproduce the behaviour of a workflow outside of the application using it.
+
+    marx myapp.flows.CHECKOUT myapp.flows.CheckoutContext captured.jsonl \\
+        --concurrency 8
+
+The workflow is given by the dotted path of a Workflow, or of a callable
+returning one; the context class by that of a DefaultContext subclass.
+Each line of the input is a JSON object of the fields of a context, by
+name, or with --ids, encoded by a JsonLinesCodec (see marx.workflow.codec).
+Strings are read as str, encoded in UTF-8.
+
+--profile runs each step under cProfile, and prints the statistics of
+each, or with --profile-dir, writes them there, a pstats file per step.
+'''
+import argparse
+import cProfile
+import importlib
+import itertools
+import json
+import os
+import pstats
+import re
+import sys
+import time
+
+from marx.workflow.codec import JsonLinesCodec
+from marx.workflow.flow import Workflow
+from marx.workflow.instrument import Hook, StepStats, step_name
+from marx.workflow import stream as streaming
+
+#: How many errors are printed, of those of the contexts which errored.
+MAX_ERRORS = 5
+
+
+def load(path):
+    """Returns the object at path, 'package.module.name' or 'package.module:name',
+    where name may be dotted too, like Class.attribute."""
+    if ':' in path:
+        module, _, name = path.partition(':')
+        obj = importlib.import_module(module)
+    else:
+        # the longest prefix which is a module.
+        parts = path.split('.')
+        for i in range(len(parts) - 1, 0, -1):
+            try:
+                obj = importlib.import_module('.'.join(parts[:i]))
+            except ImportError:
+                if i == 1:
+                    raise
+                continue
+            name = '.'.join(parts[i:])
+            break
+        else:
+            raise ValueError("Not a dotted path: %r" % (path,))
+    for attr in name.split('.'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def load_workflow(path):
+    """Returns the Workflow at path, calling what is there if it is not one."""
+    obj = load(path)
+    if not isinstance(obj, Workflow) and callable(obj):
+        obj = obj()
+    if not isinstance(obj, Workflow):
+        raise TypeError("%s is not a Workflow: %r" % (path, obj))
+    return obj
+
+
+def _to_str(value):
+    """Encodes the unicode strings in value, as json decodes them, as UTF-8 str."""
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [_to_str(v) for v in value]
+    if isinstance(value, dict):
+        return dict((_to_str(k), _to_str(v)) for k, v in value.iteritems())
+    return value
+
+
+def read_contexts(lines, context_cls, codec=None):
+    """
+    Yields a context_cls per non blank line, a JSON object of its fields by name,
+    assigned through the fields, or if codec is given, by the codec.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        if codec is not None:
+            yield codec.decode(line, context_cls)
+            continue
+        context = context_cls()
+        try:
+            for name, value in json.loads(line).iteritems():
+                setattr(context, str(name), _to_str(value))
+        except Exception, e:
+            raise ValueError("line %d: %s: %s" % (number, type(e).__name__, e))
+        yield context
+
+
+class StepProfiler(Hook):
+    """Profiles the calls of each step, by name, with a cProfile.Profile of its own.
+    Profiles only the calls made on the thread running the workflow, one at a time."""
+
+    def __init__(self):
+        self.profiles = {}
+        self._order = []
+
+    def step_start(self, workflow, step, context):
+        name = step_name(step)
+        profile = self.profiles.get(name)
+        if profile is None:
+            profile = self.profiles[name] = cProfile.Profile()
+            self._order.append(name)
+        profile.enable()
+
+    def _stop(self, step):
+        self.profiles[step_name(step)].disable()
+
+    def step_end(self, workflow, step, context, elapsed):
+        self._stop(step)
+
+    def step_skip(self, workflow, step, context, elapsed):
+        self._stop(step)
+
+    def step_abort(self, workflow, step, context, abort, elapsed):
+        self._stop(step)
+
+    def step_error(self, workflow, step, context, error, elapsed):
+        self._stop(step)
+
+    def report(self, out, sort='cumulative', limit=15):
+        for name in self._order:
+            print >> out, "\n== %s" % name
+            stats = pstats.Stats(self.profiles[name], stream=out)
+            stats.sort_stats(sort).print_stats(limit)
+
+    def dump(self, directory):
+        """Writes the statistics of each step to directory, as <step name>.pstats."""
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        paths = []
+        for name in self._order:
+            path = os.path.join(directory, re.sub(r'[^\w.-]', '_', name) + '.pstats')
+            self.profiles[name].dump_stats(path)
+            paths.append(path)
+        return paths
+
+
+def run(workflow, contexts, concurrency=1):
+    """
+    Runs the contexts through workflow, concurrency of them at a time, and
+    returns ({outcome: count}, [the first MAX_ERRORS errors], seconds taken).
+    """
+    counts = {'completed': 0, 'aborted': 0, 'errored': 0}
+    errors = []
+    if concurrency > 1:
+        results = workflow.stream(contexts, concurrency=concurrency, ordered=False)
+    else:
+        results = (streaming.run(workflow, context) for context in contexts)
+    start = time.time()
+    for result in results:
+        counts[result.outcome] += 1
+        if result.error is not None and len(errors) < MAX_ERRORS:
+            errors.append(result.error)
+    return counts, errors, time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="marx", description="Runs the contexts of a JSON-lines file "
+                                     "through a workflow, and reports throughput and per step latency.")
+    parser.add_argument('workflow', help="dotted path of the Workflow, or of a callable returning one")
+    parser.add_argument('context', help="dotted path of the context class")
+    parser.add_argument('input', help="JSON-lines file of contexts, - for stdin")
+    parser.add_argument('--ids', action='store_true',
+                        help="the lines are keyed by field id, as written by JsonLinesCodec")
+    parser.add_argument('--limit', type=int, help="run the first LIMIT contexts only")
+    parser.add_argument('--concurrency', type=int, default=1, help="contexts run at a time (default: 1)")
+    parser.add_argument('--profile', action='store_true', help="profile each step with cProfile")
+    parser.add_argument('--profile-sort', default='cumulative', help="pstats sort key (default: cumulative)")
+    parser.add_argument('--profile-limit', type=int, default=15, help="rows of statistics per step")
+    parser.add_argument('--profile-dir', help="write the statistics of each step to this directory")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency has to be at least 1")
+    if (args.profile or args.profile_dir) and args.concurrency > 1:
+        # a profiler only sees the thread it was enabled on.
+        parser.error("--profile runs one context at a time, without --concurrency")
+
+    sys.path.insert(0, os.getcwd())
+    workflow = load_workflow(args.workflow).warm()
+    context_cls = load(args.context)
+
+    profiler = None
+    if args.profile or args.profile_dir:
+        # first, so that it stops before the other hooks hear of the end of a step.
+        profiler = StepProfiler()
+        workflow.add_hook(profiler)
+    stats = StepStats()
+    workflow.add_hook(stats)
+
+    lines = sys.stdin if args.input == '-' else open(args.input)
+    try:
+        contexts = read_contexts(lines, context_cls, JsonLinesCodec() if args.ids else None)
+        if args.limit is not None:
+            contexts = itertools.islice(contexts, args.limit)
+        counts, errors, elapsed = run(workflow, contexts, args.concurrency)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+    total = sum(counts.values())
+    print "%d contexts in %.3fs: %.1f/s (%d completed, %d aborted, %d errored)" % (
+        total, elapsed, total / elapsed if elapsed else 0.0,
+        counts['completed'], counts['aborted'], counts['errored'])
+    if total:
+        print
+        print stats.report()
+    for error in errors:
+        print >> sys.stderr, "error: %s: %s" % (type(error).__name__, error)
+    if profiler is not None:
+        if args.profile_dir:
+            for path in profiler.dump(args.profile_dir):
+                print "wrote %s" % path
+        if args.profile:
+            profiler.report(sys.stdout, args.profile_sort, args.profile_limit)
+    return 1 if counts['errored'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,277 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Running workflows as coroutines on an event loop.
+
+On Python 2 the event loop is provided by trollius, the asyncio backport;
+coroutine LogicUnits are generator functions, which await with
+``yield From(...)`` and return with ``raise Return(...)``.
+'''
+import functools
+import sys
+
+import trollius as asyncio
+from trollius import From, Return
+
+from marx.workflow import instrument, validation
+from marx.workflow.clock import monotonic
+from marx.workflow.exceptions import Abort, SkipStep, SIGNALS, SKIP
+from marx.workflow.flow import Workflow
+from marx.workflow.step import Step
+from marx.workflow.stream import DEFAULT_CONCURRENCY, StreamResult
+
+
+def is_awaitable(obj):
+    """True if obj is a coroutine or a future which has to be waited on."""
+    return asyncio.iscoroutine(obj) or isinstance(obj, asyncio.Future)
+
+
+def manage_result(func):
+    """
+    The coroutine counterpart of ResultSpec.manage_result.
+
+    The result object belongs to the invocation, and is installed as the
+    unit's result only while the coroutine is running. Invocations of the
+    same unit interleaving on one event loop each see their own result.
+    """
+    @functools.wraps(func)
+    def wrapper(self, **kwargs):
+        result = self._result_type()
+        coro = func(self, **kwargs)
+        value, error = None, None
+        while True:
+            previous = getattr(self._results, 'value', None)
+            self._results.value = result
+            try:
+                if error is None:
+                    yielded = coro.send(value)
+                else:
+                    yielded = coro.throw(*error)
+            except StopIteration, stop:
+                if hasattr(stop, 'raised'):
+                    stop.raised = True
+                res = getattr(stop, 'value', None)
+                raise Return(result if res is None else res)
+            finally:
+                self._results.value = previous
+
+            try:
+                value, error = (yield yielded), None
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException:
+                value, error = None, sys.exc_info()
+    return wrapper
+
+
+def in_scope(scope, coro):
+    """
+    A coroutine driving coro with scope in effect each time it runs, and
+    only then: other coroutines run between its suspensions, under their own.
+    """
+    value, error = None, None
+    while True:
+        try:
+            with scope:
+                if error is None:
+                    yielded = coro.send(value)
+                else:
+                    yielded = coro.throw(*error)
+        except StopIteration, stop:
+            if hasattr(stop, 'raised'):
+                stop.raised = True
+            raise Return(getattr(stop, 'value', None))
+
+        try:
+            value, error = (yield yielded), None
+        except GeneratorExit:
+            coro.close()
+            raise
+        except BaseException:
+            value, error = None, sys.exc_info()
+
+
+class AsyncWorkflow(Workflow):
+    """
+    A workflow which runs as a coroutine, so that one event loop can have
+    many contexts in flight. Steps and plain callables are called as usual,
+    and waited on whenever they return a coroutine or a future; SkipStep and
+    Abort are handled, and hooks told, as in the synchronous path.
+    """
+    @asyncio.coroutine
+    def run_async(self, context, with_outcome=False):
+        """
+        A coroutine running context through this workflow, and returning what
+        calling the workflow would have.
+
+        :param with_outcome: return (outcome, result) instead, as Workflow.run_outcome does.
+        """
+        context.workflow = self
+        # put in effect for each stretch of the run, as other runs interleave with it;
+        # None stands for the default.
+        scope = validation.active(self.validation)
+        hooks = instrument.observing(self, self.hooks, context)
+        for hook in hooks:
+            hook.workflow_start(self, context)
+        start = monotonic()
+        outcome = 'completed'
+        try:
+            for step in self.steps:
+                if hooks:
+                    for hook in hooks:
+                        hook.step_start(self, step, context)
+                    began = monotonic()
+                # returned signals are raised: the costs here are dominated by the loop.
+                try:
+                    if isinstance(step, Step) and not step.batched:
+                        if step._guard is not None and not step._guard(context):
+                            step.skipped += 1
+                            if hooks:
+                                raise SKIP
+                            continue
+                        with scope:
+                            kwargs = step._build_kwargs(context)
+                        cache, key, found = step.cache, None, False
+                        if cache is not None:
+                            key = cache.key(kwargs)
+                            if key is not None:
+                                found, result = cache.get(key)
+                        if not found:
+                            with scope:
+                                result = step._run(**kwargs)
+                            if asyncio.iscoroutine(result):
+                                result = yield From(in_scope(scope, result))
+                            elif isinstance(result, asyncio.Future):
+                                result = yield From(result)
+                            if isinstance(result, SIGNALS):
+                                raise result
+                            if key is not None:
+                                cache.put(key, result)
+                        if step._apply_result is not None:
+                            with scope:
+                                step._apply_result(result, context)
+                    else:
+                        with scope:
+                            result = step(context=context)
+                        if asyncio.iscoroutine(result):
+                            result = yield From(in_scope(scope, result))
+                        elif isinstance(result, asyncio.Future):
+                            result = yield From(result)
+                        if result is not None and isinstance(result, SIGNALS):
+                            raise result
+                except SkipStep:
+                    if hooks:
+                        elapsed = monotonic() - began
+                        for hook in hooks:
+                            hook.step_skip(self, step, context, elapsed)
+                    continue
+                except Abort, a:
+                    if hooks:
+                        exc_info, elapsed = sys.exc_info(), monotonic() - began
+                        for hook in hooks:
+                            hook.step_abort(self, step, context, a, elapsed)
+                        raise exc_info[0], exc_info[1], exc_info[2]
+                    raise
+                except Exception, e:
+                    if hooks:
+                        exc_info, elapsed = sys.exc_info(), monotonic() - began
+                        for hook in hooks:
+                            hook.step_error(self, step, context, e, elapsed)
+                        raise exc_info[0], exc_info[1], exc_info[2]
+                    raise
+                if hooks:
+                    elapsed = monotonic() - began
+                    for hook in hooks:
+                        hook.step_end(self, step, context, elapsed)
+            result = context
+        except Abort, a:
+            outcome = 'aborted'
+            result = self.on_abort(context, a)
+        except Exception, e:
+            outcome = 'errored'
+            result = self.on_error(e, context)
+        finally:
+            self.flush_replies(context)
+            if hooks:
+                elapsed = monotonic() - start
+                for hook in hooks:
+                    hook.workflow_end(self, context, outcome, elapsed)
+        raise Return((outcome, result) if with_outcome else result)
+
+    def stream_async(self, contexts, concurrency=DEFAULT_CONCURRENCY, ordered=True):
+        """The coroutine counterpart of Workflow.stream: returns an AsyncStream,
+        whose get() coroutine returns the StreamResult of each context in turn."""
+        return AsyncStream(self, contexts, concurrency, ordered)
+
+
+class AsyncStream(object):
+    """
+    StreamResults of contexts run through an AsyncWorkflow on the event loop,
+    up to concurrency of them at a time, with the same backpressure as
+    Workflow.stream: contexts are only drawn from the input as results are
+    taken. Python 2 has no asynchronous iteration, hence get()::
+
+        results = workflow.stream_async(contexts, concurrency=100)
+        while True:
+            result = yield From(results.get())
+            if result is None:
+                break
+    """
+    def __init__(self, workflow, contexts, concurrency=DEFAULT_CONCURRENCY, ordered=True, loop=None):
+        if concurrency < 1:
+            raise ValueError("concurrency has to be at least 1")
+        self.workflow = workflow
+        self.concurrency = concurrency
+        self.ordered = ordered
+        self._loop = loop
+        self._contexts = iter(contexts)
+        self._exhausted = False
+        self._done = asyncio.Queue(loop=loop)
+        self._submitted = 0
+        self._running = 0
+        self._next_index = 0
+        self._ready = {}
+
+    def _fill(self):
+        while not self._exhausted and self._in_window() < self.concurrency:
+            try:
+                context = next(self._contexts)
+            except StopIteration:
+                self._exhausted = True
+                break
+            asyncio.ensure_future(self._run(self._submitted, context), loop=self._loop)
+            self._submitted += 1
+            self._running += 1
+
+    def _in_window(self):
+        return self._submitted - self._next_index if self.ordered else self._running
+
+    @asyncio.coroutine
+    def _run(self, index, context):
+        try:
+            outcome, result = yield From(self.workflow.run_async(context, with_outcome=True))
+            result = StreamResult(context, outcome, result, None)
+        except Exception, e:
+            result = StreamResult(context, 'errored', None, e)
+        self._done.put_nowait((index, result))
+
+    @asyncio.coroutine
+    def get(self):
+        """Returns the next StreamResult, or None once all the contexts are done."""
+        while True:
+            if self._next_index in self._ready:
+                result = self._ready.pop(self._next_index)
+                self._next_index += 1
+                raise Return(result)
+            self._fill()
+            if not self._running:
+                raise Return(None)
+            index, result = yield From(self._done.get())
+            self._running -= 1
+            if not self.ordered:
+                self._next_index += 1
+                raise Return(result)
+            self._ready[index] = result
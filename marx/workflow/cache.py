@@ -0,0 +1,113 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Memoization of step results, for steps which are pure functions of their
+mapped arguments.
+'''
+import threading
+from collections import OrderedDict
+
+from marx.workflow.clock import monotonic
+
+
+def _freeze(value):
+    """A hashable stand in for a list, dict or set value, and those in it, tagged
+    with its type so that, say, [1] and (1,) make different keys."""
+    if isinstance(value, list):
+        return (list, tuple(_freeze(v) for v in value))
+    if isinstance(value, tuple):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return (dict, tuple(sorted((k, _freeze(v)) for k, v in value.iteritems())))
+    if isinstance(value, (set, frozenset)):
+        return (type(value), frozenset(_freeze(v) for v in value))
+    return value
+
+
+def default_key(kwargs):
+    """
+    The mapped kwargs, as a hashable key; list, dict and set values are keyed
+    by their contents. None if some value can't be hashed even so, in which
+    case the call is made without the cache.
+    """
+    key = tuple(sorted(kwargs.iteritems()))
+    try:
+        hash(key)
+    except TypeError:
+        key = tuple((name, _freeze(value)) for name, value in key)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+    return key
+
+
+class ResultCache(object):
+    """
+    A bounded, thread safe store of results keyed by the mapped kwargs of a
+    step, evicting the least recently used entry when full and entries older
+    than the ttl when read.
+
+    Bind one to a Step with its cache argument, or to every Step of a
+    LogicUnit class with a result_cache class attribute; in the latter case
+    the cache is shared by all of its instances, which must be interchangeable.
+    """
+    def __init__(self, maxsize=1024, ttl=None, key=None):
+        """
+        :param maxsize: the most entries held.
+        :param ttl: seconds an entry is served for; forever if None.
+        :param key: a function of the kwargs returning a hashable key, or None
+            to make the call without the cache; defaults to all of the kwargs.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive: %r" % maxsize)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = key or default_key
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        """Returns (True, result) for a live entry, and (False, None) otherwise."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires, result = entry
+            if expires is not None and expires <= monotonic():
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            # reinserting makes it the most recently used.
+            self._entries[key] = entry
+            self.hits += 1
+            return True, result
+
+    def put(self, key, result):
+        expires = monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, result)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """The counters, and the current size, as a dict."""
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'expirations': self.expirations,
+                    'size': len(self._entries)}
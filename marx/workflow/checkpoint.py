@@ -0,0 +1,279 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Checkpoints of workflow runs, so that a run which failed part way resumes
+from the last step it completed, rather than from the start:
+
+    workflow = Workflow(steps, checkpoints=Checkpointer(SQLiteStore('runs.db')))
+    try:
+        workflow.run(context, run_id='order-1234')
+    except SomeError:
+        ...
+    # later, the cause fixed:
+    workflow.resume('order-1234')
+
+A checkpoint holds the index of the next step to run and the fields and
+replies of the context, encoded with a BinaryCodec (see codec), along with
+the context class to decode them to; other attributes of the context are
+not kept. It is taken before each step, and dropped once the run completes
+or aborts.
+
+By default checkpoints are written by a background thread: the run only
+forks the context (see DefaultContext.fork), which costs the same whatever
+its size, and goes on. The encoding, and the write to the store, happen
+off the run; of several checkpoints of a run pending at once only the
+latest is written. A run which errors waits for its checkpoint to be
+written before returning or raising, and the checkpoints still pending
+when the process exits are written then. Values mutated in place, rather than assigned, between
+a checkpoint and its write, are written as mutated.
+'''
+import atexit
+import collections
+import importlib
+import os
+import sqlite3
+import tempfile
+import threading
+import urllib
+
+from marx.workflow.codec import BinaryCodec
+
+#: A checkpoint loaded back: the context, and the index of the next step to run.
+Checkpoint = collections.namedtuple('Checkpoint', 'run_id step context')
+
+
+class Store(object):
+    """
+    Where checkpoints are kept, as (step, context type, data) records by run
+    id; subclass for other backends. Records are saved, loaded and deleted
+    whole, and may be from the background writer and another thread at once.
+    """
+    def save(self, run_id, step, type_name, data):
+        raise NotImplementedError()
+
+    def load(self, run_id):
+        """Returns the (step, type_name, data) saved for run_id, or None."""
+        raise NotImplementedError()
+
+    def delete(self, run_id):
+        raise NotImplementedError()
+
+    def run_ids(self):
+        """Returns the ids of the runs with a checkpoint."""
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class FileStore(Store):
+    """A file per run, in directory, replaced atomically on each save."""
+
+    SUFFIX = '.checkpoint'
+
+    def __init__(self, directory, fsync=True):
+        """
+        :param fsync: flush each save to disk before it replaces the previous one, so
+            a checkpoint survives a crash of the machine, not only of the process.
+        """
+        self.directory = directory
+        self.fsync = fsync
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, run_id):
+        return os.path.join(self.directory, urllib.quote(run_id, safe='') + self.SUFFIX)
+
+    def save(self, run_id, step, type_name, data):
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write("%d %s\n" % (step, type_name))
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.rename(temp, self._path(run_id))
+        except Exception:
+            os.unlink(temp)
+            raise
+
+    def load(self, run_id):
+        try:
+            with open(self._path(run_id), 'rb') as f:
+                header = f.readline()
+                data = f.read()
+        except IOError:
+            return None
+        step, type_name = header.split()
+        return int(step), type_name, data
+
+    def delete(self, run_id):
+        try:
+            os.unlink(self._path(run_id))
+        except OSError:
+            pass
+
+    def run_ids(self):
+        return [urllib.unquote(name[:-len(self.SUFFIX)])
+                for name in os.listdir(self.directory) if name.endswith(self.SUFFIX)]
+
+
+class SQLiteStore(Store):
+    """A row per run, in a table of an SQLite database."""
+
+    def __init__(self, path, table='checkpoints'):
+        self.table = table
+        # used from the thread writing checkpoints as well as from the one resuming.
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._db.execute("CREATE TABLE IF NOT EXISTS %s (run_id TEXT PRIMARY KEY, step INTEGER, "
+                             "type_name TEXT, data BLOB)" % table)
+            self._db.commit()
+
+    def save(self, run_id, step, type_name, data):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO %s VALUES (?, ?, ?, ?)" % self.table,
+                             (run_id, step, type_name, sqlite3.Binary(data)))
+            self._db.commit()
+
+    def load(self, run_id):
+        with self._lock:
+            row = self._db.execute("SELECT step, type_name, data FROM %s WHERE run_id = ?" % self.table,
+                                   (run_id,)).fetchone()
+        if row is None:
+            return None
+        return row[0], str(row[1]), str(row[2])
+
+    def delete(self, run_id):
+        with self._lock:
+            self._db.execute("DELETE FROM %s WHERE run_id = ?" % self.table, (run_id,))
+            self._db.commit()
+
+    def run_ids(self):
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT run_id FROM %s" % self.table)]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _type_name(cls):
+    return "%s.%s" % (cls.__module__, cls.__name__)
+
+
+def _import_type(name):
+    module, _, attr = name.rpartition('.')
+    return getattr(importlib.import_module(module), attr)
+
+
+class Checkpointer(object):
+    """Takes checkpoints of runs into a Store, and loads them back."""
+
+    def __init__(self, store, codec=None, background=True):
+        """
+        :param codec: encodes the contexts; a BinaryCodec by default.
+        :param background: write from a background thread, rather than in the run.
+        """
+        self.store = store
+        self.codec = codec or BinaryCodec()
+        self.background = background
+        self._cond = threading.Condition()
+        # run_id -> (step, context) to write, or None to delete; in order of first pending.
+        self._pending = {}
+        self._order = collections.deque()
+        self._writing = False
+        self._error = None
+        self._thread = None
+
+    def track(self, run_id, context, steps, start=0):
+        """Yields steps[start:], saving a checkpoint of context before each."""
+        save = self.save
+        for index in xrange(start, len(steps)):
+            save(run_id, index, context)
+            yield steps[index]
+
+    def save(self, run_id, step, context):
+        """Saves context as the state of run_id before the step of index step."""
+        if not self.background:
+            self._write(run_id, (step, context))
+            return
+        self._put(run_id, (step, context.fork()))
+
+    def discard(self, run_id):
+        """Drops the checkpoint of run_id, once it has run through."""
+        if not self.background:
+            self.store.delete(run_id)
+            return
+        self._put(run_id, None)
+
+    def load(self, run_id):
+        """Returns the last Checkpoint of run_id, or None."""
+        self.flush()
+        record = self.store.load(run_id)
+        if record is None:
+            return None
+        step, type_name, data = record
+        return Checkpoint(run_id, step, self.codec.decode(data, _import_type(type_name)))
+
+    def flush(self):
+        """Waits for the pending checkpoints to be written, and raises the error
+        of the last one which failed since the previous flush, if any."""
+        with self._cond:
+            while self._order or self._writing:
+                self._cond.wait()
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        self.flush()
+        self.store.close()
+
+    def _write(self, run_id, item):
+        if item is None:
+            self.store.delete(run_id)
+        else:
+            step, context = item
+            self.store.save(run_id, step, _type_name(type(context)), self.codec.encode(context))
+
+    def _put(self, run_id, item):
+        with self._cond:
+            if run_id not in self._pending:
+                if not self._order:
+                    # the writer only waits for an empty queue.
+                    self._cond.notify_all()
+                self._order.append(run_id)
+            self._pending[run_id] = item
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="marx-checkpoints")
+                self._thread.daemon = True
+                self._thread.start()
+                # the thread is a daemon, so as not to keep the process alive; what
+                # it has yet to write is written before the process exits.
+                atexit.register(self.flush)
+
+    def _work(self):
+        cond = self._cond
+        while True:
+            with cond:
+                while not self._order:
+                    cond.wait()
+                run_id = self._order.popleft()
+                item = self._pending.pop(run_id)
+                self._writing = True
+            error = None
+            try:
+                self._write(run_id, item)
+            except Exception, e:
+                # raised by the next flush, or load.
+                error = e
+            with cond:
+                self._writing = False
+                if error is not None:
+                    self._error = error
+                cond.notify_all()
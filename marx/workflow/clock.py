@@ -0,0 +1,41 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+A monotonic clock, which the Python 2 standard library lacks.
+'''
+import ctypes
+import ctypes.util
+import os
+import time
+
+CLOCK_MONOTONIC = 1
+
+
+class _timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+
+def _posix_monotonic():
+    """Returns a monotonic() backed by clock_gettime, or None if unavailable."""
+    if os.name != 'posix':
+        return None
+    try:
+        librt = ctypes.CDLL(ctypes.util.find_library('rt') or ctypes.util.find_library('c'), use_errno=True)
+        clock_gettime = librt.clock_gettime
+    except (OSError, AttributeError):
+        return None
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(_timespec)]
+    if clock_gettime(CLOCK_MONOTONIC, _timespec()) != 0:
+        return None
+
+    def monotonic():
+        """Seconds from an arbitrary starting point, never going backwards."""
+        t = _timespec()
+        clock_gettime(CLOCK_MONOTONIC, t)
+        return t.tv_sec + t.tv_nsec * 1e-9
+    return monotonic
+
+
+monotonic = getattr(time, 'monotonic', None) or _posix_monotonic() or time.time
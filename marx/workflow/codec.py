@@ -0,0 +1,460 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Compact encodings of contexts and ResultObjects, derived from the fields
+their classes declare: a binary one, and JSON lines.
+
+Fields are identified by number rather than name. A Field (or ResultSpec)
+declared with an id keeps it whatever else changes; a class declaring no
+ids numbers its fields by their layout, which is only stable for the same
+definition of the class, so ids are declared for anything stored or shipped
+to other versions (the message of DefaultContext has id 1, and 0 is
+reserved). Unset (None) fields are not written, and fields of unknown ids
+are skipped when reading, so fields can be added and removed.
+
+Booleans, ints and longs, floats, str, unicode, lists, tuples and dicts of
+those are encoded natively. Other types take a hook, registered with a
+number, stable like field ids; without one, the binary codec falls back to
+pickle, and the JSON one raises TypeError.
+
+The replies of a context are kept, under id 0; its workflow is not.
+'''
+import cPickle
+import json
+import struct
+
+from marx.workflow.context import DefaultContext
+from marx.workflow.step import ResultObject
+
+#: The id of the replies of a context.
+REPLIES_ID = 0
+
+
+class Schema(object):
+    """The fields of a context or ResultObject class, by id."""
+
+    _cache = {}
+
+    def __init__(self, cls):
+        if issubclass(cls, ResultObject):
+            names = sorted(cls._fields)
+            specs = [cls._fields[name] for name in names]
+        elif hasattr(cls, '_field_index'):
+            specs = list(cls._fields)
+            names = [spec.name for spec in specs]
+        else:
+            raise TypeError("%s is neither a context nor a ResultObject class" % cls.__name__)
+        declared = [getattr(spec, 'id', None) for spec in specs]
+        # the fields of DefaultContext have their ids whatever the subclass does.
+        own = [i for spec, i in zip(specs, declared) if spec not in DefaultContext._fields]
+        if None in own and any(i is not None for i in own):
+            raise ValueError("%s declares ids for some of its fields only: %s" % (
+                cls.__name__, [n for n, i in zip(names, declared) if i is None]))
+        ids = [index + 1 if i is None else i for index, i in enumerate(declared)]
+        if len(set(ids)) != len(ids) or REPLIES_ID in ids:
+            raise ValueError("%s declares duplicate or reserved field ids: %s" % (cls.__name__, ids))
+        self.cls = cls
+        self.is_result = issubclass(cls, ResultObject)
+        self.names = tuple(names)
+        self.ids = tuple(ids)
+        # the ids as encoded, by the binary codec.
+        self.keys = tuple(_varint(i) for i in ids)
+        self.index_of = dict((i, index) for index, i in enumerate(ids))
+
+    @classmethod
+    def of(cls, type_):
+        schema = cls._cache.get(type_)
+        if schema is None:
+            schema = cls._cache[type_] = cls(type_)
+        return schema
+
+    def values(self, obj):
+        """The values of obj, in the order of the ids."""
+        if self.is_result:
+            getters = obj._getters
+            return [getters[name](obj) for name in self.names]
+        return obj._values
+
+    def build(self, values, replies=None):
+        """Returns a new instance holding values, in the order of the ids."""
+        cls = self.cls
+        if self.is_result:
+            obj = cls()
+            setters = obj._setters
+            for name, value in zip(self.names, values):
+                setters[name][1](obj, value)
+            return obj
+        # as unpickling does, without calling __init__.
+        obj = cls.__new__(cls)
+        obj._values = values
+        obj.workflow = None
+        obj._replies = list(replies or ())
+        return obj
+
+
+class BinaryCodec(object):
+    """
+    Encodes as a sequence of (field id, value) entries; ids and lengths are
+    varints, a value is a type tag followed by its payload.
+    """
+    def __init__(self):
+        # type -> (code, encode), code -> decode
+        self._encoders = {}
+        self._decoders = {}
+        self._writers = {
+            bool: self._write_bool,
+            int: self._write_int,
+            long: self._write_int,
+            float: self._write_float,
+            str: self._write_str,
+            unicode: self._write_unicode,
+            list: self._write_list,
+            tuple: self._write_tuple,
+            dict: self._write_dict,
+            type(None): self._write_none,
+        }
+        self._readers = {
+            'N': self._read_none,
+            'T': self._read_true,
+            'F': self._read_false,
+            'i': self._read_int,
+            'f': self._read_float,
+            's': self._read_str,
+            'u': self._read_unicode,
+            'l': self._read_list,
+            't': self._read_tuple,
+            'd': self._read_dict,
+            'x': self._read_custom,
+            'p': self._read_pickle,
+        }
+
+    def register(self, type_, code, encode, decode):
+        """
+        Encodes the values of type_ (not its subclasses) with encode(value) -> str,
+        and decodes them with decode(str).
+
+        :param code: a number identifying type_ in encodings.
+        """
+        if code in self._decoders:
+            raise ValueError("code %r is registered already" % (code,))
+        self._encoders[type_] = (code, encode)
+        self._decoders[code] = decode
+
+    def encode(self, obj):
+        """Returns the encoding of a context or ResultObject."""
+        schema = Schema.of(type(obj))
+        out = []
+        write = self._write
+        for key, value in zip(schema.keys, schema.values(obj)):
+            if value is not None:
+                out.append(key)
+                write(value, out)
+        if not schema.is_result and obj._replies:
+            out.append(_varint(REPLIES_ID))
+            self._write_list(list(obj._replies), out)
+        return ''.join(out)
+
+    def decode(self, data, cls):
+        """Returns the instance of cls, a context or ResultObject class, encoded in data."""
+        schema = Schema.of(cls)
+        values = [None] * len(schema.ids)
+        replies = None
+        index_of = schema.index_of
+        read = self._read
+        pos, end = 0, len(data)
+        while pos < end:
+            i = ord(data[pos])
+            if i < 0x80:
+                pos += 1
+            else:
+                i, pos = _read_varint(data, pos)
+            value, pos = read(data, pos)
+            if i == REPLIES_ID:
+                replies = value
+            elif i in index_of:
+                values[index_of[i]] = value
+        return schema.build(values, replies)
+
+    # writers append the tag and payload of a value to out.
+
+    def _write(self, value, out):
+        # the commonest types inline, the rest through the table.
+        type_ = type(value)
+        if type_ is int:
+            out.append('i' + _varint(value << 1 if value >= 0 else (-value << 1) - 1))
+            return
+        if type_ is str:
+            out.append('s' + _varint(len(value)) + value)
+            return
+        writer = self._writers.get(type_)
+        if writer is not None:
+            writer(value, out)
+        elif type(value) in self._encoders:
+            code, encode = self._encoders[type(value)]
+            payload = encode(value)
+            out.append('x' + _varint(code) + _varint(len(payload)) + payload)
+        else:
+            payload = cPickle.dumps(value, 2)
+            out.append('p' + _varint(len(payload)) + payload)
+
+    def _write_none(self, value, out):
+        out.append('N')
+
+    def _write_bool(self, value, out):
+        out.append('T' if value else 'F')
+
+    def _write_int(self, value, out):
+        # zigzag, so that small negative numbers are short too.
+        out.append('i' + _varint(value << 1 if value >= 0 else (-value << 1) - 1))
+
+    def _write_float(self, value, out):
+        out.append('f' + _DOUBLE.pack(value))
+
+    def _write_str(self, value, out):
+        out.append('s' + _varint(len(value)) + value)
+
+    def _write_unicode(self, value, out):
+        value = value.encode('utf-8')
+        out.append('u' + _varint(len(value)) + value)
+
+    def _write_list(self, value, out, tag='l'):
+        out.append(tag + _varint(len(value)))
+        write = self._write
+        for item in value:
+            write(item, out)
+
+    def _write_tuple(self, value, out):
+        self._write_list(value, out, 't')
+
+    def _write_dict(self, value, out):
+        out.append('d' + _varint(len(value)))
+        write = self._write
+        for key, item in value.iteritems():
+            write(key, out)
+            write(item, out)
+
+    # readers return the value at pos of data, and the position after it.
+
+    def _read(self, data, pos):
+        tag = data[pos]
+        if tag == 's':
+            size = ord(data[pos + 1])
+            if size < 0x80:
+                pos += 2
+                return data[pos:pos + size], pos + size
+        elif tag == 'i':
+            n = ord(data[pos + 1])
+            if n < 0x80:
+                return (n >> 1) ^ -(n & 1), pos + 2
+        try:
+            reader = self._readers[tag]
+        except KeyError:
+            raise ValueError("unknown type tag %r at %d" % (tag, pos))
+        return reader(data, pos + 1)
+
+    def _read_none(self, data, pos):
+        return None, pos
+
+    def _read_true(self, data, pos):
+        return True, pos
+
+    def _read_false(self, data, pos):
+        return False, pos
+
+    def _read_int(self, data, pos):
+        n, pos = _read_varint(data, pos)
+        return (n >> 1) ^ -(n & 1), pos
+
+    def _read_float(self, data, pos):
+        return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+
+    def _read_str(self, data, pos):
+        size, pos = _read_varint(data, pos)
+        return data[pos:pos + size], pos + size
+
+    def _read_unicode(self, data, pos):
+        size, pos = _read_varint(data, pos)
+        return data[pos:pos + size].decode('utf-8'), pos + size
+
+    def _read_list(self, data, pos):
+        size, pos = _read_varint(data, pos)
+        read = self._read
+        items = []
+        for _ in xrange(size):
+            item, pos = read(data, pos)
+            items.append(item)
+        return items, pos
+
+    def _read_tuple(self, data, pos):
+        items, pos = self._read_list(data, pos)
+        return tuple(items), pos
+
+    def _read_dict(self, data, pos):
+        size, pos = _read_varint(data, pos)
+        read = self._read
+        items = {}
+        for _ in xrange(size):
+            key, pos = read(data, pos)
+            items[key], pos = read(data, pos)
+        return items, pos
+
+    def _read_custom(self, data, pos):
+        code, pos = _read_varint(data, pos)
+        size, pos = _read_varint(data, pos)
+        try:
+            decode = self._decoders[code]
+        except KeyError:
+            raise ValueError("no decoder registered for code %r" % (code,))
+        return decode(data[pos:pos + size]), pos + size
+
+    def _read_pickle(self, data, pos):
+        size, pos = _read_varint(data, pos)
+        return cPickle.loads(data[pos:pos + size]), pos + size
+
+
+#: The $type of the envelope of a dict having a '$type' key of its own.
+_ESCAPED = 'dict'
+
+
+def _escape(value):
+    """
+    Returns value, a dict, list or tuple, or if it holds dicts having a '$type'
+    key, which would be read back as envelopes, a copy with those as envelopes
+    of their items.
+    """
+    escaped = None
+    if isinstance(value, dict):
+        for key, item in value.iteritems():
+            if type(item) in _CONTAINERS or isinstance(item, dict):
+                new = _escape(item)
+                if new is not item:
+                    if escaped is None:
+                        escaped = dict(value)
+                    escaped[key] = new
+        if '$type' in value:
+            return {'$type': _ESCAPED, 'value': (escaped or value).items()}
+    else:
+        for index, item in enumerate(value):
+            if type(item) in _CONTAINERS or isinstance(item, dict):
+                new = _escape(item)
+                if new is not item:
+                    if escaped is None:
+                        escaped = list(value)
+                    escaped[index] = new
+    return value if escaped is None else escaped
+
+
+class JsonLinesCodec(object):
+    """
+    Encodes as a JSON object per line, keyed by field id. JSON has no
+    tuples, byte strings or non string keys: tuples come back as lists,
+    str as unicode, and dicts need string keys.
+
+    Values of registered types are written as {"$type": code, "value": ...}
+    envelopes; a dict having a "$type" key itself is written as an envelope
+    of its items, so that it reads back as the dict it is.
+    """
+    def __init__(self):
+        self._encoders = {}
+        self._decoders = {}
+
+    def register(self, type_, code, encode, decode):
+        """
+        Encodes the values of type_ (not its subclasses) with encode(value), which
+        returns something JSON can encode, and decodes them with decode.
+
+        :param code: a number identifying type_ in encodings.
+        """
+        if code in self._decoders:
+            raise ValueError("code %r is registered already" % (code,))
+        self._encoders[type_] = (code, encode)
+        self._decoders[code] = decode
+
+    def _default(self, value):
+        try:
+            code, encode = self._encoders[type(value)]
+        except KeyError:
+            raise TypeError("%r is not JSON serializable, and has no registered encoder" % (value,))
+        value = encode(value)
+        if type(value) in _CONTAINERS or isinstance(value, dict):
+            value = _escape(value)
+        return {'$type': code, 'value': value}
+
+    def _hook(self, obj):
+        if '$type' in obj:
+            code = obj['$type']
+            if code == _ESCAPED:
+                return dict(obj['value'])
+            return self._decoders[code](obj['value'])
+        return obj
+
+    def encode(self, obj):
+        """Returns the encoding of a context or ResultObject, as a line without its end."""
+        schema = Schema.of(type(obj))
+        doc = {}
+        for i, value in zip(schema.ids, schema.values(obj)):
+            if value is not None:
+                doc[str(i)] = _escape(value) if type(value) in _CONTAINERS or isinstance(value, dict) else value
+        if not schema.is_result and obj._replies:
+            doc[str(REPLIES_ID)] = _escape(list(obj._replies))
+        return json.dumps(doc, default=self._default, separators=(',', ':'))
+
+    def decode(self, line, cls):
+        """Returns the instance of cls, a context or ResultObject class, encoded in line."""
+        schema = Schema.of(cls)
+        values = [None] * len(schema.ids)
+        replies = None
+        index_of = schema.index_of
+        for key, value in json.loads(line, object_hook=self._hook).iteritems():
+            i = int(key)
+            if i == REPLIES_ID:
+                replies = value
+            elif i in index_of:
+                values[index_of[i]] = value
+        return schema.build(values, replies)
+
+    def dump(self, objs, fileobj):
+        """Writes the encodings of objs to fileobj, a line each."""
+        for obj in objs:
+            fileobj.write(self.encode(obj))
+            fileobj.write('\n')
+
+    def load(self, fileobj, cls):
+        """Yields the instances of cls encoded in the lines of fileobj."""
+        for line in fileobj:
+            if line.strip():
+                yield self.decode(line, cls)
+
+
+#: The types of values which may hold dicts, and need escaping.
+_CONTAINERS = frozenset([dict, list, tuple])
+
+_DOUBLE = struct.Struct('>d')
+_SMALL = [chr(i) for i in xrange(0x80)]
+
+
+def _varint(n):
+    if n < 0x80:
+        return _SMALL[n]
+    out = []
+    while n >= 0x80:
+        out.append(chr((n & 0x7f) | 0x80))
+        n >>= 7
+    out.append(chr(n))
+    return ''.join(out)
+
+
+def _read_varint(data, pos):
+    byte = ord(data[pos])
+    if byte < 0x80:
+        return byte, pos + 1
+    n, shift = 0, 0
+    while True:
+        byte = ord(data[pos])
+        pos += 1
+        n |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
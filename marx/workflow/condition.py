@@ -0,0 +1,209 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Conditions on the fields of a context, for guarding steps (see Step's when):
+
+    from marx.workflow.condition import field
+    Step(ThrowThing(), when=field('pie').is_not_none() & (field('count') > 0))
+
+A condition is compiled, once, into a single generated function of the
+context, and knows the fields it reads, which schedules take into account.
+Plain functions of the context combine with conditions too, though what
+they read can't be told.
+'''
+
+
+class Condition(object):
+    #: The fields read, or None if they can't be told.
+    fields = frozenset()
+
+    _compiled = None
+
+    def __call__(self, context):
+        return self.compile()(context)
+
+    def compile(self):
+        """Returns a function of the context, equivalent to this condition."""
+        if self._compiled is None:
+            namespace = {}
+            source = "def test(context):\n    return %s\n" % self._expression(namespace)
+            code = compile(source, "<condition %s>" % self, "exec")
+            exec code in namespace
+            self._compiled = namespace['test']
+        return self._compiled
+
+    def _expression(self, namespace):
+        """Returns the source of this condition as an expression of context,
+        adding the values it refers to to namespace."""
+        raise NotImplementedError()
+
+    def __and__(self, other):
+        return All(self, other)
+
+    def __rand__(self, other):
+        return All(other, self)
+
+    def __or__(self, other):
+        return Any(self, other)
+
+    def __ror__(self, other):
+        return Any(other, self)
+
+    def __invert__(self):
+        return Not(self)
+
+
+def as_condition(obj):
+    """Returns obj if it is a Condition, or a Predicate of it if it is a function of the context."""
+    if isinstance(obj, Condition):
+        return obj
+    if callable(obj):
+        return Predicate(obj)
+    raise TypeError("Not a condition: %r" % (obj,))
+
+
+def _bind(namespace, value):
+    """Adds value to namespace under a fresh name, and returns the name."""
+    name = "v%d" % len(namespace)
+    namespace[name] = value
+    return name
+
+
+def _union(conditions):
+    fields = set()
+    for condition in conditions:
+        if condition.fields is None:
+            return None
+        fields.update(condition.fields)
+    return frozenset(fields)
+
+
+class Predicate(Condition):
+    """A function of the context, which may read any field."""
+    fields = None
+
+    def __init__(self, func):
+        self.func = func
+
+    def compile(self):
+        return self.func
+
+    def _expression(self, namespace):
+        return "%s(context)" % _bind(namespace, self.func)
+
+    def __str__(self):
+        return getattr(self.func, '__name__', None) or repr(self.func)
+
+
+class All(Condition):
+    def __init__(self, *conditions):
+        flat = []
+        for condition in map(as_condition, conditions):
+            flat.extend(condition.conditions if isinstance(condition, All) else [condition])
+        self.conditions = tuple(flat)
+        self.fields = _union(self.conditions)
+
+    def _expression(self, namespace):
+        return "(%s)" % " and ".join(c._expression(namespace) for c in self.conditions)
+
+    def __str__(self):
+        return "(%s)" % " & ".join(map(str, self.conditions))
+
+
+class Any(Condition):
+    def __init__(self, *conditions):
+        flat = []
+        for condition in map(as_condition, conditions):
+            flat.extend(condition.conditions if isinstance(condition, Any) else [condition])
+        self.conditions = tuple(flat)
+        self.fields = _union(self.conditions)
+
+    def _expression(self, namespace):
+        return "(%s)" % " or ".join(c._expression(namespace) for c in self.conditions)
+
+    def __str__(self):
+        return "(%s)" % " | ".join(map(str, self.conditions))
+
+
+class Not(Condition):
+    def __init__(self, condition):
+        self.condition = as_condition(condition)
+        self.fields = self.condition.fields
+
+    def _expression(self, namespace):
+        return "(not %s)" % self.condition._expression(namespace)
+
+    def __str__(self):
+        return "~%s" % self.condition
+
+
+class Compare(Condition):
+    """A field compared with a value, with one of the OPERATORS."""
+    OPERATORS = ('==', '!=', '<', '<=', '>', '>=', 'is', 'is not', 'in', 'not in')
+
+    def __init__(self, name, operator, value):
+        if operator not in self.OPERATORS:
+            raise ValueError("Unknown operator: %r" % (operator,))
+        self.name = name
+        self.operator = operator
+        self.value = value
+        self.fields = frozenset([name])
+
+    def _expression(self, namespace):
+        return "(context.%s %s %s)" % (self.name, self.operator, _bind(namespace, self.value))
+
+    def __str__(self):
+        return "%s %s %r" % (self.name, self.operator, self.value)
+
+
+class FieldRef(Condition):
+    """A field of the context: true if its value is, and compared, makes a Compare."""
+    def __init__(self, name):
+        self.name = name
+        self.fields = frozenset([name])
+
+    def _expression(self, namespace):
+        return "context.%s" % self.name
+
+    def __eq__(self, value):
+        return Compare(self.name, '==', value)
+
+    def __ne__(self, value):
+        return Compare(self.name, '!=', value)
+
+    def __lt__(self, value):
+        return Compare(self.name, '<', value)
+
+    def __le__(self, value):
+        return Compare(self.name, '<=', value)
+
+    def __gt__(self, value):
+        return Compare(self.name, '>', value)
+
+    def __ge__(self, value):
+        return Compare(self.name, '>=', value)
+
+    __hash__ = None
+
+    def is_none(self):
+        return Compare(self.name, 'is', None)
+
+    def is_not_none(self):
+        return Compare(self.name, 'is not', None)
+
+    def isin(self, values):
+        try:
+            values = frozenset(values)
+        except TypeError:
+            values = tuple(values)
+        return Compare(self.name, 'in', values)
+
+    def __str__(self):
+        return self.name
+
+
+def field(name):
+    """Returns a reference to the field name of the context, to build conditions with."""
+    return FieldRef(name)
@@ -3,7 +3,25 @@ Created on Feb 24, 2013
 
 @author: nino
 '''
+import collections
+import threading
 from marx.workflow.exceptions import InvalidContextAssignment
+from marx.workflow.replies import ReplyView
+from marx.workflow.validation import state, violated
+
+
+#: Held while a context makes shared values or replies its own, which threads
+#: running steps on the same context (Workflow.run_parallel) may do at once.
+_thaw_lock = threading.Lock()
+
+
+def _own_values(instance):
+    """Returns the values of instance, made a list of its own if they are shared."""
+    with _thaw_lock:
+        values = instance._values
+        if type(values) is tuple:
+            values = instance._values = list(values)
+        return values
 
 
 class Field(object):
@@ -11,18 +29,41 @@ class Field(object):
         self.types = types if not types else tuple(types)
         self.name = None
         self.docs = kwargs.pop('docs', None)
+        #: the number identifying this field in encodings (see codec).
+        self.id = kwargs.pop('id', None)
+
+    def accessors(self, index):
+        """Returns the getter and setter of this field, stored at index of a
+        context's values."""
+        name, types = self.name, self.types
 
-    def _get(self, instance):
-        return getattr(instance, "_" + self.name, None)
+        def get(instance):
+            return instance._values[index]
 
-    def _set(self, instance, value):
-        if self.types and not isinstance(value, self.types):
-            raise InvalidContextAssignment((self.name, value))
-        setattr(instance, "_" + self.name, value)
+        # the values of a context forked or snapshotted are a tuple shared with the
+        # copies; assigning to it fails, and a first write makes them its own.
+        if types:
+            def set(instance, value):  # @ReservedAssignment
+                check = state.check
+                if ((check is True or check and check()) and not isinstance(value, types)
+                        and violated('field', name, value, types)):
+                    raise InvalidContextAssignment((name, value))
+                try:
+                    instance._values[index] = value
+                except TypeError:
+                    _own_values(instance)[index] = value
+        else:
+            def set(instance, value):  # @ReservedAssignment
+                try:
+                    instance._values[index] = value
+                except TypeError:
+                    _own_values(instance)[index] = value
+        return get, set
 
     def contribute_to_class(self, cls, name):
         self.name = name
-        setattr(cls, name, property(self._get, self._set))
+        declared = cls.__dict__.get('_declared_fields', ())
+        setattr(cls, '_declared_fields', declared + (self,))
         setattr(cls, name.upper(), name)
 
 
@@ -37,23 +78,120 @@ class ContextBase(type):
         cls = super(ContextBase, cls).__new__(cls, name, bases, attrs)
         for k, v in contributors.iteritems():
             v.contribute_to_class(cls, k)
+        cls._lay_out_fields()
         return cls
 
+    def _lay_out_fields(cls):
+        """Assigns every field of the class, including inherited ones, an index
+        into the values array of an instance, and installs its accessors."""
+        fields = []
+        for base in reversed(cls.__mro__):
+            laid_out = base.__dict__.get('_field_index', {})
+            # a plain attribute of a class hides the inherited field.
+            fields = [f for f in fields if f.name not in base.__dict__ or f.name in laid_out]
+            for field in sorted(base.__dict__.get('_declared_fields', ()), key=lambda f: f.name):
+                fields = [f for f in fields if f.name != field.name] + [field]
+        for index, field in enumerate(fields):
+            setattr(cls, field.name, property(*field.accessors(index)))
+        cls._fields = tuple(fields)
+        cls._field_index = dict((f.name, i) for i, f in enumerate(fields))
+
+
+#: The state of a context at a point in time, see DefaultContext.snapshot.
+Snapshot = collections.namedtuple('Snapshot', 'values replies attributes')
+
 
 class DefaultContext(object):
     __metaclass__ = ContextBase
+    __slots__ = ('workflow', '_replies', '_values', '__dict__', '__weakref__')
+
+    message = Field(id=1)
 
-    message = Field()
+    def __new__(cls, *args, **kwargs):  # @UnusedVariable
+        self = object.__new__(cls)
+        self._values = [None] * len(cls._fields)
+        return self
 
     def __init__(self, workflow=None):
         self.workflow = workflow
         self._replies = []
 
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name in ('workflow', '_replies'):
+            if hasattr(self, name):
+                state[name] = getattr(self, name)
+        state['_values'] = dict((f.name, v) for f, v in zip(self._fields, self._values))
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        self._values = [None] * len(self._fields)
+        for name, value in state.pop('_values').iteritems():
+            if name in self._field_index:
+                self._values[self._field_index[name]] = value
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
     def reply(self, message):
         self.workflow.reply(message, self)
-        self._replies.append(message)
+        try:
+            self._replies.append(message)
+        except AttributeError:
+            # shared with a fork or snapshot, see _freeze.
+            with _thaw_lock:
+                replies = self._replies
+                if type(replies) is tuple:
+                    replies = self._replies = list(replies)
+                replies.append(message)
 
     @property
     def replies(self):
         """Returns a copy of the replies."""
-        return [] + self._replies
+        return list(self._replies)
+
+    @property
+    def reply_view(self):
+        """Returns a ReplyView of the replies so far, which copies nothing."""
+        return ReplyView(self._replies)
+
+    def _freeze(self):
+        """Turns the field values and replies into tuples, which copies of this
+        context can share; whichever writes first then copies them, shallowly."""
+        values = self._values = tuple(self._values)
+        replies = self._replies = tuple(self._replies)
+        return values, replies
+
+    def fork(self):
+        """
+        Returns a copy of this context, for a branch or a retry, sharing the
+        field values and replies with it until either of them is changed.
+        Forking costs the same whatever the size of the values, which are not
+        copied themselves: a value mutated in place is changed in both.
+        """
+        values, replies = self._freeze()
+        fork = object.__new__(type(self))
+        fork._values = values
+        fork._replies = replies
+        fork.workflow = self.workflow
+        attributes = self.__dict__
+        if attributes:
+            fork.__dict__.update(attributes)
+        return fork
+
+    def snapshot(self):
+        """Returns a Snapshot of the fields, replies and other attributes (None
+        if there are none), to restore this context to later."""
+        values, replies = self._freeze()
+        attributes = self.__dict__
+        return Snapshot(values, replies, dict(attributes) if attributes else None)
+
+    def restore(self, snapshot):
+        """Returns this context to the state captured by snapshot; the
+        snapshot stays valid, and can be restored again."""
+        self._values = snapshot.values
+        self._replies = snapshot.replies
+        attributes = self.__dict__
+        attributes.clear()
+        if snapshot.attributes:
+            attributes.update(snapshot.attributes)
@@ -21,3 +21,25 @@ class SkipStep(WorkflowException):
     pass
 
 
+class BatchError(WorkflowException):
+    """
+    Raised by Workflow.run_many once all of its contexts are done, if the
+    runs of some raised (the default on_error re-raises any error).
+
+    :ivar outcomes: the outcome of each context, None for those which raised.
+    :ivar errors: (index, exc_info) of each context which raised, by index.
+    """
+    def __init__(self, outcomes, errors):
+        index, exc_info = errors[0]
+        WorkflowException.__init__(self, "%d of %d contexts raised; context %d: %s: %s" % (
+            len(errors), len(outcomes), index, exc_info[0].__name__, exc_info[1]))
+        self.outcomes = outcomes
+        self.errors = errors
+
+
+#: Returned by a step, or by the callable of a Step, to skip it without the cost
+#: of raising SkipStep. Returning an Abort instance likewise aborts the workflow.
+SKIP = SkipStep()
+
+#: The types of the exceptions which a step may return rather than raise.
+SIGNALS = (SkipStep, Abort)
@@ -3,9 +3,14 @@ Created on Feb 23, 2013
 
 @author: nino
 '''
-from marx.workflow.exceptions import Abort, SkipStep
+from marx.workflow.exceptions import Abort, BatchError, SkipStep
 import sys
 from marx.workflow.step import Step
+from marx.workflow.clock import monotonic
+from marx.workflow import instrument, schedule, validation
+from marx.workflow import stream as streaming
+from marx.workflow.replies import BufferedReplySink
+from marx.workflow.sequence import StepSequence
 
 
 class Workflow(object):
@@ -13,28 +18,349 @@ class Workflow(object):
                  steps=None,
                  on_error=None,
                  on_abort=None,
-                 on_reply=None):
-        self.steps = steps or []
+                 on_reply=None,
+                 hooks=None,
+                 validation=None,
+                 checkpoints=None):
+        """
+        :param hooks: marx.workflow.instrument.Hook instances told about each run and step.
+        :param validation: a marx.workflow.validation.Validation policy applied to the
+            runs of this workflow, rather than the default one.
+        :param checkpoints: a marx.workflow.checkpoint.Checkpointer, which the runs
+            started with run() save their progress to, for resume().
+        """
+        self.steps = steps
         self.on_error = on_error or self.default_on_error
         self.on_abort = on_abort or self.default_on_abort
         self.reply = on_reply or self.default_on_reply
+        self.hooks = list(hooks or [])
+        self.validation = validation
+        self.checkpoints = checkpoints
+        self._graph = None
+
+    @property
+    def steps(self):
+        """The steps, as an immutable StepSequence; assign a new sequence to change them."""
+        return self._steps
+
+    @steps.setter
+    def steps(self, steps):
+        self._steps = steps if isinstance(steps, StepSequence) else StepSequence(steps or ())
 
     def __call__(self, context):
+        return self.run_outcome(context)[1]
+
+    def run_outcome(self, context, steps=None):
+        """
+        Runs context through this workflow, as calling it does, and returns
+        (outcome, result): outcome is one of 'completed', 'aborted' or 'errored',
+        and result what calling the workflow would have returned.
+
+        :param steps: an iterable of the steps to run, rather than all of them.
+        """
+        if self.validation is not None and validation.current() is not self.validation:
+            with validation.active(self.validation):
+                return self.run_outcome(context, steps)
+        if steps is None:
+            steps = self._steps.flat
+        flush = self._reply_flush()
+        try:
+            return self._run_steps(context, steps, self.hooks, self.on_abort, self.on_error)
+        finally:
+            if flush is not None:
+                flush(context)
+
+    def _run_steps(self, context, steps, hooks, on_abort, on_error):
+        """The interpreted run of steps, taking the instrumented path if any of
+        hooks observe it; returns (outcome, result) as run_outcome does."""
+        if hooks:
+            observing = instrument.observing(self, hooks, context)
+            if observing:
+                return instrument.run_outcome(self, steps, observing, on_abort, on_error, context)
         context.workflow = self
         try:
-            for step in self.steps:
+            for step in steps:
                 try:
-                    step(context=context)
-                except SkipStep, e:
+                    signal = step(context=context)
+                except SkipStep:
                     continue
-            return context
+                # a returned SKIP needs nothing done, a returned Abort is routed as raised.
+                if signal is not None and isinstance(signal, Abort):
+                    break
+            else:
+                return 'completed', context
+        except Abort, a:
+            return 'aborted', on_abort(context, a)
+        except Exception, e:
+            return 'errored', on_error(e, context)
+        return 'aborted', on_abort(context, signal)
+
+    def run(self, context, run_id):
+        """
+        Runs context through this workflow, as calling it does, saving a
+        checkpoint before each step under run_id, so that should a step
+        fail, resume(run_id) carries on from it. The checkpoint is dropped
+        once the run completes or aborts. See marx.workflow.checkpoint.
+        """
+        return self._run_checkpointed(context, run_id, 0)
+
+    def resume(self, run_id):
+        """
+        Carries on the run of run_id from the step it last reached, with the
+        context as it was then, and returns what calling the workflow would.
+        Raises KeyError if the run has no checkpoint.
+        """
+        checkpoint = self._checkpointer().load(run_id)
+        if checkpoint is None:
+            raise KeyError(run_id)
+        return self._run_checkpointed(checkpoint.context, run_id, checkpoint.step)
+
+    def _checkpointer(self):
+        if self.checkpoints is None:
+            raise ValueError("The workflow has no checkpoints to run or resume with.")
+        return self.checkpoints
+
+    def _run_checkpointed(self, context, run_id, start):
+        checkpoints = self._checkpointer()
+        steps = checkpoints.track(run_id, context, self._steps.flat, start)
+        try:
+            outcome, result = self.run_outcome(context, steps)
+        except Exception:
+            # the process may well exit on this error; the checkpoint to resume from
+            # is written first, and the run's error raised rather than the write's.
+            exc_info = sys.exc_info()
+            try:
+                checkpoints.flush()
+            except Exception:
+                pass
+            raise exc_info[0], exc_info[1], exc_info[2]
+        if outcome == 'errored':
+            checkpoints.flush()
+        else:
+            checkpoints.discard(run_id)
+        return result
+
+    def stream(self, contexts, concurrency=streaming.DEFAULT_CONCURRENCY, ordered=True, pool=None):
+        """
+        Runs the contexts through this workflow, up to concurrency of them at a
+        time on a thread pool, and returns a generator of a StreamResult per
+        context. Contexts are drawn from the iterable only as results are
+        consumed, so memory stays bounded by concurrency whatever its length.
+        See marx.workflow.stream.
+
+        :param ordered: yield the results in the order of the contexts, rather than
+            as they complete.
+        :param pool: a multiprocessing.pool.ThreadPool; defaults to one of concurrency
+            threads, for the duration of the stream.
+        """
+        return streaming.stream(self, contexts, concurrency, ordered, pool)
+
+    def warm(self):
+        """Resolves the callables of the steps given by name now, rather than on their
+        first call, surfacing any import errors. Returns the workflow."""
+        for step in self.steps:
+            if isinstance(step, Step):
+                step.resolve()
+        return self
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return self
+
+    def run_many(self, contexts):
+        """
+        Runs each of the contexts through this workflow, and returns what calling
+        the workflow with each of them would have, in order.
+
+        The contexts advance together, step by step. A batched step (see
+        LogicUnit.batched) is called once with all the contexts still running,
+        any other step once per context. A skip, abort or error only affects its
+        own context, and is routed to on_abort/on_error as it happens. An error
+        raised by on_error, like the default one, ends only its own context: once
+        all are done, run_many raises a BatchError holding the errors and the
+        outcomes of the others.
+        Hooks are told about each context as they would be by a call, each run
+        timed from the start of the batch.
+        """
+        if self.validation is not None and validation.current() is not self.validation:
+            with validation.active(self.validation):
+                return self.run_many(contexts)
+        contexts = list(contexts)
+        outcomes = [None] * len(contexts)
+        observers = []
+        for context in contexts:
+            context.workflow = self
+            hooks = instrument.observing(self, self.hooks, context)
+            for hook in hooks:
+                hook.workflow_start(self, context)
+            observers.append(hooks)
+        hooks = any(observers)
+        start = monotonic()
+
+        raised = []
+        active = range(len(contexts))
+        for step in self.steps:
+            if not active:
+                break
+            if isinstance(step, Step) and step.batched:
+                batch = [contexts[i] for i in active]
+                if hooks:
+                    failures = instrument.call_batch(self, [observers[i] for i in active], step, batch)
+                else:
+                    failures = step.call_batch(batch)
+            else:
+                failures = []
+                for i in active:
+                    try:
+                        if observers[i]:
+                            signal = instrument.call_step(self, observers[i], step, contexts[i])
+                        else:
+                            signal = step(context=contexts[i])
+                    except Exception:
+                        failures.append(sys.exc_info())
+                    else:
+                        if signal is not None and isinstance(signal, Abort):
+                            failures.append((type(signal), signal, None))
+                        else:
+                            failures.append(None)
+
+            still_active = []
+            for i, failure in zip(active, failures):
+                if failure is None or issubclass(failure[0], SkipStep):
+                    still_active.append(i)
+                    continue
+                try:
+                    outcomes[i] = self.route_failure(contexts[i], failure)
+                except Exception:
+                    raised.append((i, sys.exc_info()))
+                finally:
+                    if observers[i]:
+                        self._end_run(observers[i], contexts[i], 'aborted' if issubclass(failure[0], Abort)
+                                      else 'errored', start)
+            active = still_active
+
+        for i in active:
+            outcomes[i] = contexts[i]
+            if observers[i]:
+                self._end_run(observers[i], contexts[i], 'completed', start)
+        for context in contexts:
+            self.flush_replies(context)
+        if raised:
+            raise BatchError(outcomes, sorted(raised, key=lambda error: error[0]))
+        return outcomes
+
+    def _end_run(self, hooks, context, outcome, start):
+        elapsed = monotonic() - start
+        for hook in hooks:
+            hook.workflow_end(self, context, outcome, elapsed)
+
+    def _reply_flush(self):
+        """The flush method of the reply handler if it buffers replies, else None;
+        the flush of another kind of handler, say a file, is none of a run's business."""
+        if isinstance(self.reply, BufferedReplySink):
+            return self.reply.flush
+        return None
+
+    def flush_replies(self, context):
+        """Delivers the replies of context held back by the reply handler, if it
+        buffers them (see marx.workflow.replies.BufferedReplySink). Every run
+        does so as it ends."""
+        flush = self._reply_flush()
+        if flush is not None:
+            flush(context)
+
+    def route_failure(self, context, exc_info):
+        """Routes an abort or error, given as exc_info, to on_abort or on_error."""
+        try:
+            raise exc_info[0], exc_info[1], exc_info[2]
         except Abort, a:
             return self.on_abort(context, a)
         except Exception, e:
             return self.on_error(e, context)
 
+    def run_parallel(self, context, pool=None):
+        """
+        Runs the steps concurrently, each as soon as the earlier steps it depends
+        on are done. Dependencies come from the fields the steps read and write
+        (their arg and result maps); a step whose fields can't be told, like a
+        plain callable or one taking the context, is ordered against all others.
+
+        :param pool: a multiprocessing.pool.ThreadPool; defaults to a shared one.
+        """
+        graph = self._graph
+        if graph is None or graph.steps != self._steps.flat:
+            graph = self._graph = schedule.DependencyGraph(self._steps.flat)
+        return schedule.run(self, graph, context, pool)
+
+    def compile(self):
+        """
+        Returns a callable equivalent to calling this workflow, with the current
+        steps unrolled into a single generated function. Skips and the routing
+        to on_abort/on_error are resolved inside that one frame.
+
+        The result is frozen: later changes to this workflow are not picked up.
+        Calling the workflow itself remains the interpreted path, which is easier
+        to step through when debugging.
+
+        With hooks registered, the result is the instrumented path bound to the
+        current steps and hooks.
+        """
+        flush = self._reply_flush()
+        if self.hooks:
+            frozen = (self._steps.flat, tuple(self.hooks), self.on_abort, self.on_error)
+
+            def run(context):
+                return self._run_steps(context, *frozen)[1]
+            if flush is not None:
+                run = _flushing(run, flush)
+            if self.validation is not None:
+                run = validation.applying(self.validation, run)
+            return run
+        namespace = {'SkipStep': SkipStep,
+                     'Abort': Abort,
+                     'workflow': self,
+                     'on_abort': self.on_abort,
+                     'on_error': self.on_error}
+        # the steps run in a loop left after the first pass, or by a break on a
+        # returned Abort, which is then routed outside of the try.
+        lines = ["def run(context):",
+                 "    context.workflow = workflow",
+                 "    try:",
+                 "        while True:"]
+        for i, step in enumerate(self.steps):
+            name = "step_%d" % i
+            # an unbound method is made anew on each access: compare the functions.
+            if isinstance(step, Step) and type(step).__call__.im_func is Step.__call__.im_func:
+                # skip the Step.__call__ frame and go straight to its plan.
+                namespace[name] = step._invoke
+                call = "%s(context)" % name
+            else:
+                namespace[name] = step
+                call = "%s(context=context)" % name
+            lines += ["            try:",
+                      "                signal = %s" % call,
+                      "            except SkipStep:",
+                      "                signal = None",
+                      "            if signal is not None and isinstance(signal, Abort):",
+                      "                break"]
+        lines += ["            return context",
+                  "    except Abort, a:",
+                  "        return on_abort(context, a)",
+                  "    except Exception, e:",
+                  "        return on_error(e, context)",
+                  "    return on_abort(context, signal)"]
+        code = compile("\n".join(lines) + "\n", "<compiled workflow %x>" % id(self), "exec")
+        exec code in namespace
+        run = namespace['run']
+        if flush is not None:
+            run = _flushing(run, flush)
+        if self.validation is not None:
+            run = validation.applying(self.validation, run)
+        run.workflow = self
+        return run
+
     def add_step(self, *args, **kwargs):
-        self.steps.append(Step(*args, **kwargs))
+        self.steps = self._steps + (Step(*args, **kwargs),)
         return self
 
     def default_on_error(self, e, context):
@@ -54,15 +380,29 @@ class Workflow(object):
             or the steps of the given right hand Workflow.
         '''
         if isinstance(rhs, Step):
-            incoming = [rhs]
+            incoming = (rhs,)
         elif isinstance(rhs, Workflow):
             incoming = rhs.steps
         else:
             raise TypeError('Only Steps or other Workflows can be '
                 'concatenated to form new Workflows.')
 
+        # shares the steps of both sides, see StepSequence.
         outgoing = self.steps + incoming
         return Workflow(steps=outgoing,
                         on_error=self.on_error,
                         on_abort=self.on_abort,
-                        on_reply=self.reply)
+                        on_reply=self.reply,
+                        hooks=self.hooks,
+                        validation=self.validation,
+                        checkpoints=self.checkpoints)
+
+
+def _flushing(run, flush):
+    """Returns run, flushing the replies of the context once it is done."""
+    def flushing(context):
+        try:
+            return run(context)
+        finally:
+            flush(context)
+    return flushing
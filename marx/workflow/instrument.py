@@ -0,0 +1,278 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Hooks into the execution of workflows, and a collector of per step statistics.
+
+A workflow only takes the instrumented path for a run some of its hooks
+observe (see Hook.observes); without any, running it costs what it did before.
+'''
+import math
+import sys
+import threading
+
+from marx.workflow.clock import monotonic
+from marx.workflow.exceptions import Abort, SkipStep, SIGNALS
+
+
+def step_name(step):
+    """A readable name for a step, or a plain callable used as one."""
+    name = getattr(step, 'name', None)
+    if isinstance(name, basestring):
+        return name
+    return getattr(step, '__name__', None) or type(step).__name__
+
+
+class Hook(object):
+    """
+    Receives the events of workflow runs; override the ones of interest.
+    Elapsed times are in seconds, from a monotonic clock. Hooks of workflows
+    run in parallel (Workflow.run_parallel) are called from several threads.
+    """
+    def observes(self, workflow, context):
+        """Whether to be told about this run of context, asked once as it starts;
+        a run which none of the hooks observe takes the uninstrumented path."""
+        return True
+
+    def workflow_start(self, workflow, context):
+        pass
+
+    def workflow_end(self, workflow, context, outcome, elapsed):
+        """:param outcome: one of 'completed', 'aborted' or 'errored'."""
+        pass
+
+    def step_start(self, workflow, step, context):
+        pass
+
+    def step_end(self, workflow, step, context, elapsed):
+        pass
+
+    def step_skip(self, workflow, step, context, elapsed):
+        pass
+
+    def step_abort(self, workflow, step, context, abort, elapsed):
+        pass
+
+    def step_error(self, workflow, step, context, error, elapsed):
+        pass
+
+
+def observing(workflow, hooks, context):
+    """Those of hooks which observe this run of context."""
+    return tuple(hook for hook in hooks if hook.observes(workflow, context))
+
+
+def call_step(workflow, hooks, step, context):
+    """Calls a step of workflow, telling the hooks. A SkipStep, raised or
+    returned, is consumed; an abort or error re-raised, and a returned Abort
+    returned."""
+    for hook in hooks:
+        hook.step_start(workflow, step, context)
+    start = monotonic()
+    try:
+        signal = step(context=context)
+    except SkipStep:
+        elapsed = monotonic() - start
+        for hook in hooks:
+            hook.step_skip(workflow, step, context, elapsed)
+        return
+    except Abort, a:
+        exc_info = sys.exc_info()
+        elapsed = monotonic() - start
+        for hook in hooks:
+            hook.step_abort(workflow, step, context, a, elapsed)
+        raise exc_info[0], exc_info[1], exc_info[2]
+    except Exception, e:
+        exc_info = sys.exc_info()
+        elapsed = monotonic() - start
+        for hook in hooks:
+            hook.step_error(workflow, step, context, e, elapsed)
+        raise exc_info[0], exc_info[1], exc_info[2]
+    elapsed = monotonic() - start
+    if signal is not None and isinstance(signal, SIGNALS):
+        if isinstance(signal, Abort):
+            for hook in hooks:
+                hook.step_abort(workflow, step, context, signal, elapsed)
+            return signal
+        for hook in hooks:
+            hook.step_skip(workflow, step, context, elapsed)
+        return
+    for hook in hooks:
+        hook.step_end(workflow, step, context, elapsed)
+
+
+def call_batch(workflow, hooks_of, step, contexts):
+    """Step.call_batch, telling hooks_of[i], the hooks observing the run of
+    contexts[i], about it; each context is reported to have taken as long as
+    the batch did."""
+    for hooks, context in zip(hooks_of, contexts):
+        for hook in hooks:
+            hook.step_start(workflow, step, context)
+    start = monotonic()
+    failures = step.call_batch(contexts)
+    elapsed = monotonic() - start
+    for hooks, context, failure in zip(hooks_of, contexts, failures):
+        if failure is None:
+            for hook in hooks:
+                hook.step_end(workflow, step, context, elapsed)
+        elif issubclass(failure[0], SkipStep):
+            for hook in hooks:
+                hook.step_skip(workflow, step, context, elapsed)
+        elif issubclass(failure[0], Abort):
+            for hook in hooks:
+                hook.step_abort(workflow, step, context, failure[1], elapsed)
+        else:
+            for hook in hooks:
+                hook.step_error(workflow, step, context, failure[1], elapsed)
+    return failures
+
+
+def run(workflow, steps, hooks, on_abort, on_error, context):
+    """The instrumented counterpart of Workflow.__call__."""
+    return run_outcome(workflow, steps, hooks, on_abort, on_error, context)[1]
+
+
+def run_outcome(workflow, steps, hooks, on_abort, on_error, context):
+    """The instrumented counterpart of Workflow.run_outcome; hooks are those
+    observing the run (see observing)."""
+    context.workflow = workflow
+    for hook in hooks:
+        hook.workflow_start(workflow, context)
+    start = monotonic()
+    outcome = 'completed'
+    try:
+        try:
+            for step in steps:
+                signal = call_step(workflow, hooks, step, context)
+                if signal is not None:
+                    break
+            else:
+                return outcome, context
+        except Abort, a:
+            outcome = 'aborted'
+            return outcome, on_abort(context, a)
+        except Exception, e:
+            outcome = 'errored'
+            return outcome, on_error(e, context)
+        outcome = 'aborted'
+        return outcome, on_abort(context, signal)
+    finally:
+        elapsed = monotonic() - start
+        for hook in hooks:
+            hook.workflow_end(workflow, context, outcome, elapsed)
+
+
+class LatencyHistogram(object):
+    """Counts of durations in logarithmic buckets, each growth times wider than
+    the previous one, so percentiles are within that ratio of the truth."""
+
+    def __init__(self, growth=1.1, floor=1e-7):
+        self.growth = growth
+        self.floor = floor
+        self._log_growth = math.log(growth)
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        index = int(math.log(max(seconds, self.floor) / self.floor) / self._log_growth)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """The upper bound of the bucket holding the q-th percentile, 0 < q <= 100."""
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.floor * self.growth ** (index + 1), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class StepStats(Hook):
+    """
+    Collects, per step name, call counts, skip, abort and error rates and
+    a latency histogram. Steps sharing a name are counted together.
+    """
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps = {}
+        self._order = []
+
+    def _record(self, step, elapsed, outcome=None):
+        name = step_name(step)
+        with self._lock:
+            stats = self._steps.get(name)
+            if stats is None:
+                stats = self._steps[name] = {'calls': 0, 'skips': 0, 'aborts': 0, 'errors': 0,
+                                             'latency': LatencyHistogram()}
+                self._order.append(name)
+            stats['calls'] += 1
+            if outcome:
+                stats[outcome] += 1
+            stats['latency'].add(elapsed)
+
+    def step_end(self, workflow, step, context, elapsed):
+        self._record(step, elapsed)
+
+    def step_skip(self, workflow, step, context, elapsed):
+        self._record(step, elapsed, 'skips')
+
+    def step_abort(self, workflow, step, context, abort, elapsed):
+        self._record(step, elapsed, 'aborts')
+
+    def step_error(self, workflow, step, context, error, elapsed):
+        self._record(step, elapsed, 'errors')
+
+    def as_dict(self):
+        """Returns {step name: statistics}, with latencies in seconds."""
+        result = {}
+        with self._lock:
+            for name, stats in self._steps.iteritems():
+                latency = stats['latency']
+                calls = stats['calls']
+                row = {'calls': calls,
+                       'skips': stats['skips'],
+                       'aborts': stats['aborts'],
+                       'errors': stats['errors'],
+                       'skip_rate': float(stats['skips']) / calls,
+                       'error_rate': float(stats['errors']) / calls,
+                       'mean': latency.mean,
+                       'max': latency.max}
+                for q in self.PERCENTILES:
+                    row['p%d' % q] = latency.percentile(q)
+                result[name] = row
+        return result
+
+    def report(self):
+        """Returns the statistics as a text table, in the order steps were first seen."""
+        stats = self.as_dict()
+        names = [name for name in self._order if name in stats]
+        width = max([len(name) for name in names] + [4])
+        lines = ["%-*s %8s %7s %7s %10s %10s %10s" % (width, "step", "calls", "skip%", "error%",
+                                                      "p50 ms", "p95 ms", "p99 ms")]
+        for name in names:
+            row = stats[name]
+            lines.append("%-*s %8d %6.1f%% %6.1f%% %10.3f %10.3f %10.3f" % (
+                width, name, row['calls'], row['skip_rate'] * 100, row['error_rate'] * 100,
+                row['p50'] * 1e3, row['p95'] * 1e3, row['p99'] * 1e3))
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._steps.clear()
+            del self._order[:]
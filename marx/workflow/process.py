@@ -0,0 +1,78 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Running the callables of CPU bound steps in a pool of worker processes.
+
+Only the mapped kwargs are shipped to a worker, and only the result comes
+back, to be applied by the step's result_map; the context itself never
+leaves the calling process. Both travel with pickle (protocol 2), which is
+the serialization contract for any value a Field hands to such a step:
+
+  - values of module level classes pickle as is; anything else (sockets,
+    locks, open files, ...) has to implement __getstate__/__setstate__ or
+    __reduce__, or be registered with copy_reg;
+  - the callable is pickled too, so it has to be an instance of a module
+    level class (e.g. a LogicUnit), or a module level function;
+  - ResultObjects pickle by the LogicUnit class declaring them.
+'''
+import atexit
+import multiprocessing
+import threading
+
+
+def _invoke(call, kwargs):
+    return call(**kwargs)
+
+
+class ProcessPool(object):
+    """A lazily started multiprocessing.Pool, which steps submit their calls to."""
+
+    def __init__(self, processes=None):
+        """
+        :param processes: the number of worker processes; defaults to the number of cores.
+        """
+        self.processes = processes
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = multiprocessing.Pool(self.processes)
+        return self._pool
+
+    def apply(self, call, kwargs):
+        """Calls call(**kwargs) in a worker, and returns its result."""
+        return self.pool.apply(_invoke, (call, kwargs))
+
+    def bind(self, call):
+        """Returns a function taking kwargs and calling call with them in a worker."""
+        def run(**kwargs):
+            return self.apply(call, kwargs)
+        return run
+
+    def close(self):
+        """Stops the worker processes; the pool starts anew if used again."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_pool():
+    """Returns the pool shared by the CPU bound steps not given one, sized to the cores."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ProcessPool()
+            atexit.register(_default.close)
+    return _default
@@ -0,0 +1,120 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Reading the replies of a context without copying them, and delivering
+them to the reply handler in batches.
+'''
+import threading
+
+from marx.workflow.clock import monotonic
+from marx.workflow.instrument import Hook
+
+
+class ReplyView(object):
+    """
+    A read-only view of the replies of a context as they were when it was
+    taken, sharing their storage: replies are only ever appended, or the
+    storage replaced (see DefaultContext.fork), so the view never changes.
+    Slicing a view makes another view, so a poller can take the replies it
+    has not seen yet, view[seen:], without copying those it has.
+    """
+    __slots__ = ('_replies', '_start', '_stop')
+
+    def __init__(self, replies, start=0, stop=None):
+        self._replies = replies
+        self._start = start
+        self._stop = len(replies) if stop is None else stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __iter__(self):
+        replies = self._replies
+        for i in xrange(self._start, self._stop):
+            yield replies[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("views of replies do not support steps")
+            return ReplyView(self._replies, self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._replies[self._start + index]
+
+    def __eq__(self, other):
+        if isinstance(other, (ReplyView, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "ReplyView(%r)" % (list(self),)
+
+
+class BufferedReplySink(Hook):
+    """
+    A reply handler which buffers the replies of each context, and hands
+    them to deliver(messages, context) as a list, once count of them are
+    buffered, once a reply arrives interval seconds or more after the first
+    one buffered, and when the run of the context ends, whatever its outcome.
+
+    Given as the on_reply of a Workflow, it is flushed as each run ends.
+    Nothing is delivered between replies: a long step holds back those
+    buffered before it, until the next reply or the end of the run. As a
+    hook, it flushes the runs of the workflows it is added to.
+    """
+    def __init__(self, deliver, count=100, interval=None):
+        """
+        :param deliver: called with a list of replies, and the context they are from.
+        :param count: the most replies buffered per context.
+        :param interval: the most seconds a reply is held, checked as replies arrive.
+        """
+        if count < 1:
+            raise ValueError("count has to be at least 1")
+        self.deliver = deliver
+        self.count = count
+        self.interval = interval
+        self._lock = threading.Lock()
+        # id(context) -> (context, replies, time of the first one)
+        self._buffers = {}
+
+    def __call__(self, message, context):
+        key = id(context)
+        with self._lock:
+            buffered = self._buffers.get(key)
+            if buffered is None:
+                buffered = self._buffers[key] = (context, [], monotonic() if self.interval is not None else None)
+            buffered[1].append(message)
+            if len(buffered[1]) < self.count and (
+                    self.interval is None or monotonic() - buffered[2] < self.interval):
+                return
+            del self._buffers[key]
+        self.deliver(buffered[1], context)
+
+    def flush(self, context):
+        """Delivers the replies of context buffered so far."""
+        with self._lock:
+            buffered = self._buffers.pop(id(context), None)
+        if buffered is not None:
+            self.deliver(buffered[1], context)
+
+    def flush_all(self):
+        """Delivers the replies buffered for every context."""
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+        for context, messages, _ in buffers.itervalues():
+            self.deliver(messages, context)
+
+    def workflow_end(self, workflow, context, outcome, elapsed):
+        self.flush(context)
@@ -0,0 +1,138 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Concurrent execution of the steps of a workflow. Steps are ordered by the
+context fields they read and write: a step waits for every earlier step it
+conflicts with, and runs alongside the others.
+'''
+import Queue
+import sys
+import threading
+from multiprocessing.pool import ThreadPool
+
+from marx.workflow import instrument, validation
+from marx.workflow.clock import monotonic
+from marx.workflow.exceptions import Abort, SkipStep
+from marx.workflow.step import Step
+
+DEFAULT_POOL_SIZE = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def default_pool():
+    """Returns the thread pool shared by the runs which are not given one."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(DEFAULT_POOL_SIZE)
+    return _pool
+
+
+def access(step):
+    """Returns the fields read and written by a step, where None stands for any field."""
+    if isinstance(step, Step):
+        return step.reads, step.writes
+    return None, None
+
+
+def overlaps(a, b):
+    if a is None:
+        return b is None or bool(b)
+    if b is None:
+        return bool(a)
+    return not a.isdisjoint(b)
+
+
+class DependencyGraph(object):
+    """The order constraints between steps: a step requires every earlier step
+    which writes what it reads or writes, or reads what it writes."""
+    def __init__(self, steps):
+        self.steps = tuple(steps)
+        accesses = [access(step) for step in self.steps]
+        self.requires = []
+        self.unlocks = [[] for _ in self.steps]
+        for j, (reads_j, writes_j) in enumerate(accesses):
+            requires = set()
+            for i, (reads_i, writes_i) in enumerate(accesses[:j]):
+                if overlaps(writes_i, reads_j) or overlaps(writes_i, writes_j) or overlaps(reads_i, writes_j):
+                    requires.add(i)
+                    self.unlocks[i].append(j)
+            self.requires.append(frozenset(requires))
+
+
+def _run_step(done, index, step, context, workflow, hooks):
+    if workflow.validation is not None:
+        with validation.active(workflow.validation):
+            return _call_step(done, index, step, context, workflow, hooks)
+    return _call_step(done, index, step, context, workflow, hooks)
+
+
+def _call_step(done, index, step, context, workflow, hooks):
+    try:
+        if hooks:
+            signal = instrument.call_step(workflow, hooks, step, context)
+        else:
+            signal = step(context=context)
+    except SkipStep:
+        done.put((index, None))
+    except Exception:
+        done.put((index, sys.exc_info()))
+    else:
+        if signal is not None and isinstance(signal, Abort):
+            done.put((index, (type(signal), signal, None)))
+        else:
+            done.put((index, None))
+
+
+def run(workflow, graph, context, pool=None):
+    """
+    Runs the steps of graph on pool, each as soon as the steps it requires are done.
+
+    Once a step aborts or fails no further steps are started, and those already
+    running are waited for. The abort or error of the earliest step is then routed
+    to the workflow's on_abort or on_error, as a sequential run would have.
+    """
+    pool = pool or default_pool()
+    hooks = instrument.observing(workflow, workflow.hooks, context)
+    context.workflow = workflow
+    for hook in hooks:
+        hook.workflow_start(workflow, context)
+    start = monotonic()
+    done = Queue.Queue()
+    waiting = [len(requires) for requires in graph.requires]
+    running = 0
+    failures = []
+    for index, count in enumerate(waiting):
+        if not count:
+            pool.apply_async(_run_step, (done, index, graph.steps[index], context, workflow, hooks))
+            running += 1
+
+    while running:
+        index, failure = done.get()
+        running -= 1
+        if failure:
+            failures.append((index, failure))
+        if failures:
+            continue
+        for unlocked in graph.unlocks[index]:
+            waiting[unlocked] -= 1
+            if not waiting[unlocked]:
+                pool.apply_async(_run_step, (done, unlocked, graph.steps[unlocked], context, workflow, hooks))
+                running += 1
+
+    outcome = 'completed'
+    try:
+        if not failures:
+            return context
+        failure = min(failures)[1]
+        outcome = 'aborted' if issubclass(failure[0], Abort) else 'errored'
+        return workflow.route_failure(context, failure)
+    finally:
+        elapsed = monotonic() - start
+        for hook in hooks:
+            hook.workflow_end(workflow, context, outcome, elapsed)
+        workflow.flush_replies(context)
@@ -0,0 +1,97 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+An immutable sequence of steps, which workflows hold their steps in.
+
+Concatenating two sequences makes a node referring to both, rather than
+a copy of their steps, so a workflow assembled with + from fragments
+shares them, and costs O(1) per +. The flat tuple of steps, which runs
+iterate over, is built once, on first use, from the flat tuples of the
+parts already built.
+'''
+
+
+class StepSequence(object):
+    __slots__ = ('parts', '_flat', '_len')
+
+    def __init__(self, steps=()):
+        #: The two sequences concatenated, or None for a sequence of steps.
+        self.parts = None
+        self._flat = tuple(steps)
+        self._len = len(self._flat)
+
+    @classmethod
+    def concat(cls, left, right):
+        """Returns the sequence of the steps of left followed by those of right."""
+        if not isinstance(left, StepSequence):
+            left = cls(left)
+        if not isinstance(right, StepSequence):
+            right = cls(right)
+        if not right._len:
+            return left
+        if not left._len:
+            return right
+        seq = object.__new__(cls)
+        seq.parts = (left, right)
+        seq._flat = None
+        seq._len = left._len + right._len
+        return seq
+
+    @property
+    def flat(self):
+        """The steps, as a tuple."""
+        if self._flat is None:
+            # iteratively, as sequences built by repeated + are as deep as long.
+            steps = []
+            stack = [self]
+            while stack:
+                seq = stack.pop()
+                if seq._flat is not None:
+                    steps.extend(seq._flat)
+                else:
+                    stack.extend(reversed(seq.parts))
+            self._flat = tuple(steps)
+        return self._flat
+
+    def __add__(self, other):
+        if not isinstance(other, (StepSequence, list, tuple)):
+            return NotImplemented
+        return StepSequence.concat(self, other)
+
+    def __radd__(self, other):
+        if not isinstance(other, (list, tuple)):
+            return NotImplemented
+        return StepSequence.concat(other, self)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return iter(self.flat)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return StepSequence(self.flat[index])
+        return self.flat[index]
+
+    def __contains__(self, step):
+        return step in self.flat
+
+    def __eq__(self, other):
+        if isinstance(other, StepSequence):
+            return self is other or self.flat == other.flat
+        if isinstance(other, (list, tuple)):
+            return self.flat == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self.flat)
+
+    def __repr__(self):
+        return "StepSequence(%r)" % (list(self.flat),)
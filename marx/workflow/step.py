@@ -5,34 +5,64 @@ Created on Feb 23, 2013
 '''
 import inspect
 import functools
+import itertools
+import re
+import sys
 import threading
 import types
+from marx.workflow import process
+from marx.workflow.cache import ResultCache, default_key
+from marx.workflow.condition import as_condition
+from marx.workflow.exceptions import SIGNALS, SKIP, SkipStep
+from marx.workflow.validation import state, violated
+
+
+_bind_lock = threading.RLock()
+
+#: The shape of a callable given by name: a module path, a dot, and a name in it.
+_DOTTED_PATH = re.compile(r'[A-Za-z_]\w*(\.[A-Za-z_]\w*)+$')
 
 
 class Step(object):
+    #: The attributes set once the callable is bound, see resolve.
+    _BOUND = frozenset(['_call', '_pass_context', 'batched', 'process_pool', '_run', 'cache',
+                        '_build_kwargs', '_invoke'])
+
     def __init__(self,
                  call,
                  arg_map=None,
                  result_map=None,
                  extra_kwargs=None,
-                 docs=None):
+                 docs=None,
+                 process_pool=None,
+                 cache=None,
+                 lazy=True,
+                 when=None):
         """
         :param call: A callable or a string that can be resolved to a callable.
         :param arg_map: A mapping from fields in the context to arguments of the callable.
         :param result_map: A dict that defines translation from the returned object to the context.
         :param extra_kwargs: Additional kwargs to pass to the callable; useful for config at bind time.
         :param docs: A doc string.
+        :param process_pool: A marx.workflow.process.ProcessPool to run the callable in;
+            callables flagged cpu_bound run in the shared one by default.
+        :param cache: A marx.workflow.cache.ResultCache memoizing the results by the
+            mapped kwargs; defaults to the callable's result_cache, if any.
+        :param lazy: Resolve a callable given as a string on first use (or Workflow.warm),
+            rather than now.
+        :param when: A marx.workflow.condition.Condition, or a function of the context;
+            the step is skipped, before any argument mapping, when it is false.
         """
-
-        # allow late binding by providing a string
-        if isinstance(call, basestring):
-            mod, func = call.rsplit('.', 1)
-            call = getattr(__import__(mod, fromlist=[func]), func)
-        assert callable(call)
-        self._call = call
+        if not isinstance(call, basestring):
+            assert callable(call)
+        elif not _DOTTED_PATH.match(call):
+            # checked now even if lazy, rather than failing at the first use.
+            raise ValueError("%r is not a dotted path to a callable, as in 'module.function'" % call)
+        self._target = call
 
         if result_map is None:
             result_map = {}
+        self._result_map = result_map
         if isinstance(result_map, dict):
             self.result_mapper = functools.partial(self.default_result_mapper, mapping=result_map)
         else:
@@ -40,29 +70,325 @@ class Step(object):
 
         if arg_map is None:
             arg_map = {}
+        self._arg_map = arg_map
         if isinstance(arg_map, dict):
             self.arg_mapper = functools.partial(self.default_arg_mapper, mapping=arg_map)
         else:
             self.arg_mapper = arg_map
 
         self.extra_kwargs = extra_kwargs
+        self.docs = docs
+        self._process_pool = process_pool
+        self._cache = cache
+        self._apply_result = self._compile_result_mapper()
+
+        self.when = None if when is None else as_condition(when)
+        self._guard = None if when is None else self.when.compile()
+        #: How many times the step was skipped by its when condition; not exact
+        #: under concurrent runs.
+        self.skipped = 0
+
+        # allow late binding by providing a string
+        if not lazy or not isinstance(call, basestring):
+            self.resolve()
+
+    def __getattr__(self, name):
+        # only reached for attributes not set yet, i.e. those of a callable to be bound.
+        if name in Step._BOUND and '_target' in self.__dict__:
+            self.resolve()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def resolve(self):
+        """Binds the callable, importing it first if it was given by name, and
+        builds the invocation plan. Safe to call from several threads, and a
+        no-op once done. Returns the step; raises an ImportError if the callable
+        can't be bound."""
+        if '_invoke' not in self.__dict__:
+            with _bind_lock:
+                if '_invoke' not in self.__dict__:
+                    try:
+                        self._bind()
+                    except AttributeError, e:
+                        # raised through __getattr__, say from a property, an AttributeError
+                        # would pass for the property missing.
+                        raise ImportError("cannot bind %s: %s" % (self._target, e)), None, sys.exc_info()[2]
+        return self
+
+    def _bind(self):
+        call = self._target
+        if isinstance(call, basestring):
+            mod, func = call.rsplit('.', 1)
+            call = getattr(__import__(mod, fromlist=[func]), func)
+        assert callable(call)
+
         # figure out if the callable accepts context
         # as a parameter as not to enforce a strict contract
         pass_context = getattr(call, '_accepts_context', None)
         if pass_context is None:
             pass_context = 'context' in inspect.getargspec(getattr(call, '__call__', call))[0]
+
+        process_pool = self._process_pool
+        if process_pool is None and getattr(call, 'cpu_bound', False) is True:
+            process_pool = process.default_pool()
+        if process_pool is not None and pass_context:
+            raise ValueError("%r takes the context, which is not shipped to worker processes" % call)
+
+        cache = self._cache
+        if cache is None:
+            cache = getattr(call, 'result_cache', None)
+            if not isinstance(cache, ResultCache):
+                cache = None
+        if cache is not None and pass_context and cache.key is default_key:
+            raise ValueError("%r takes the context; its cache needs a key function" % call)
+
+        self._call = call
         self._pass_context = pass_context
-        self.docs = docs
+        self.batched = getattr(call, 'batched', False) is True
+        self.process_pool = process_pool
+        # what the invocation plan calls: the callable, or its proxy in a worker process.
+        self._run = process_pool.bind(call) if process_pool is not None else call
+        self.cache = cache
+        self._build_kwargs = self._compile_arg_mapper()
+        # set last: its presence marks the step as bound.
+        self._invoke = self._compile()
 
     def __call__(self, context):
-        kwargs = {}
+        """Runs this step on context; returns SKIP or an Abort instance if the
+        callable returned one, rather than raising it, and None otherwise."""
+        return self._invoke(context)
+
+    def _compile(self):
+        """Returns the invocation plan for this step: a single function of the context
+        that checks the when condition, builds the kwargs, invokes the callable and
+        maps the result back."""
+        invoke = self._compile_call()
+        if self._guard is None or self.batched:
+            # call_batch checks the condition of each context itself.
+            return invoke
+        guard = self._guard
+
+        def guarded(context):
+            if not guard(context):
+                self.skipped += 1
+                return SKIP
+            return invoke(context)
+        return guarded
+
+    def _compile_call(self):
+        """Returns the unguarded part of the invocation plan."""
+        call = self._run
+        build_kwargs = self._build_kwargs
+        apply_result = self._apply_result
+        # the callable may return a SKIP or Abort signal instead of raising it, which
+        # is passed on rather than applied.
+        if self.batched:
+            call_batch = self.call_batch
+
+            def invoke(context):
+                failure = call_batch([context])[0]
+                # a context ruled out by the when condition is a step not run.
+                if failure is not None and failure[1] is not SKIP:
+                    if failure[2] is None and isinstance(failure[1], SIGNALS):
+                        return failure[1]
+                    raise failure[0], failure[1], failure[2]
+        elif self.cache is not None:
+            cache = self.cache
+            key_of = cache.key
+
+            def invoke(context):
+                kwargs = build_kwargs(context)
+                key = key_of(kwargs)
+                found, result = cache.get(key) if key is not None else (False, None)
+                if not found:
+                    result = call(**kwargs)
+                    if isinstance(result, SIGNALS):
+                        return result
+                    if key is not None:
+                        cache.put(key, result)
+                if apply_result is not None:
+                    apply_result(result, context)
+        elif apply_result is None:
+            def invoke(context):
+                result = call(**build_kwargs(context))
+                if result is not None and isinstance(result, SIGNALS):
+                    return result
+        else:
+            def invoke(context):
+                result = call(**build_kwargs(context))
+                if isinstance(result, SIGNALS):
+                    return result
+                apply_result(result, context)
+        return invoke
+
+    def _compile_arg_mapper(self):
+        """Returns a function building the kwargs of the callable from a context.
+
+        Equivalent to layering the context, the output of the arg mapper and the
+        extra kwargs, with the dict based mapping and the constants resolved once.
+        """
+        pass_context = self._pass_context
+        extra = dict(self.extra_kwargs or {})
+
+        if not isinstance(self._arg_map, dict):
+            arg_mapper = self.arg_mapper
+
+            def build_kwargs(context):
+                kwargs = {'context': context} if pass_context else {}
+                kwargs.update(arg_mapper(context))
+                if extra:
+                    kwargs.update(extra)
+                return kwargs
+            return build_kwargs
+
+        # extra kwargs take precedence, so drop anything they would overwrite.
+        pairs = tuple((to_kwarg, from_key) for to_kwarg, from_key in self._arg_map.iteritems()
+                      if to_kwarg not in extra)
+        pass_context = pass_context and 'context' not in extra and 'context' not in self._arg_map
+
+        if not extra and not pass_context:
+            def build_kwargs(context):
+                kwargs = {}
+                for to_kwarg, from_key in pairs:
+                    kwargs[to_kwarg] = getattr(context, from_key)
+                return kwargs
+        else:
+            def build_kwargs(context):
+                kwargs = extra.copy()
+                if pass_context:
+                    kwargs['context'] = context
+                for to_kwarg, from_key in pairs:
+                    kwargs[to_kwarg] = getattr(context, from_key)
+                return kwargs
+        return build_kwargs
+
+    def _compile_result_mapper(self):
+        """Returns a function applying the result to the context, or None if there is
+        nothing to apply. The kind of each entry of a dict mapping is resolved once."""
+        if not isinstance(self._result_map, dict):
+            return self.result_mapper
+        if not self._result_map:
+            return None
+
+        keys, paths, mappers = [], [], []
+        for to_key, from_mapper in self._result_map.iteritems():
+            if callable(from_mapper):
+                mappers.append((to_key, from_mapper))
+            elif isinstance(from_mapper, basestring):
+                keys.append((to_key, from_mapper))
+            elif isinstance(from_mapper, (list, tuple)):
+                paths.append((to_key, tuple(from_mapper)))
+            else:
+                raise TypeError("Unsupported result mapping for '%s': %r" % (to_key, from_mapper))
+        keys, paths, mappers = tuple(keys), tuple(paths), tuple(mappers)
+
+        def apply_result(result, context):
+            for to_key, from_key in keys:
+                setattr(context, to_key, result[from_key])
+            for to_key, path in paths:
+                value = result
+                for k in path:
+                    value = value[k]
+                setattr(context, to_key, value)
+            for to_key, from_mapper in mappers:
+                setattr(context, to_key, from_mapper(result, context))
+        return apply_result
+
+    def call_batch(self, contexts):
+        """
+        Invokes a batched callable once for all of the contexts, but those whose
+        results are cached, and maps each of the results back. Returns, per context, None or the exc_info of its failure,
+        a SkipStep for a context the when condition rules out; an exception of the
+        batch call as a whole is the failure of every context.
+        """
+        failures = [None] * len(contexts)
+        members, batch = [], {}
+        cache = self.cache
+        # the keys of the members, and the (index, result) of the cache hits.
+        keys, hits = [], []
+        guard = self._guard
+        for i, context in enumerate(contexts):
+            if guard is not None and not guard(context):
+                self.skipped += 1
+                failures[i] = (SkipStep, SKIP, None)
+                continue
+            try:
+                kwargs = self._build_kwargs(context)
+            except Exception:
+                failures[i] = sys.exc_info()
+                continue
+            if cache is not None:
+                key = cache.key(kwargs)
+                found, result = cache.get(key) if key is not None else (False, None)
+                if found:
+                    hits.append((i, result))
+                    continue
+                keys.append(key)
+            for name, value in kwargs.iteritems():
+                batch.setdefault(name, []).append(value)
+            members.append(i)
+
+        results = []
+        if members:
+            try:
+                results = self._run(**batch)
+                if len(results) != len(members):
+                    raise ValueError("Batched call returned %d results for %d contexts" % (len(results), len(members)))
+            except Exception:
+                failure = sys.exc_info()
+                for i in members:
+                    failures[i] = failure
+                members, results = [], []
+            if cache is not None:
+                for key, result in zip(keys, results):
+                    if key is not None and not isinstance(result, Exception):
+                        cache.put(key, result)
+
+        for i, result in itertools.chain(zip(members, results), hits):
+            if isinstance(result, Exception):
+                failures[i] = (type(result), result, None)
+            elif self._apply_result is not None:
+                try:
+                    self._apply_result(result, contexts[i])
+                except Exception:
+                    failures[i] = sys.exc_info()
+        return failures
+
+    @property
+    def name(self):
+        """The name of the callable, for reports; a lazy step is not bound for it."""
+        if '_call' not in self.__dict__:
+            return self._target.rsplit('.', 1)[1]
+        return getattr(self._call, '__name__', None) or type(self._call).__name__
+
+    @property
+    def reads(self):
+        """The context fields read by this step, or None if they cannot be told
+        from its maps, in which case it may read anything."""
         if self._pass_context:
-            kwargs['context'] = context
-        kwargs.update(self.arg_mapper(context))
-        if self.extra_kwargs:
-            kwargs.update(self.extra_kwargs)
-        result = self._call(**kwargs)
-        self.result_mapper(result, context)
+            return None
+        if isinstance(self._arg_map, dict):
+            fields = self._arg_map.values()
+        else:
+            fields = getattr(self._arg_map, 'fields', None)
+        if fields is None or not isinstance(self._result_map, dict):
+            return None
+        if any(callable(m) for m in self._result_map.itervalues()):
+            # result mappers are handed the context too.
+            return None
+        if self.when is not None:
+            if self.when.fields is None:
+                return None
+            fields = tuple(fields) + tuple(self.when.fields)
+        return frozenset(fields)
+
+    @property
+    def writes(self):
+        """The context fields written by this step, or None if they cannot be
+        told from its maps, in which case it may write anything."""
+        if self._pass_context or not isinstance(self._result_map, dict):
+            return None
+        return frozenset(self._result_map)
 
     def default_result_mapper(self, result, context, mapping):
         for to_key, from_mapper in mapping.iteritems():
@@ -111,6 +437,16 @@ class LogicUnitBase(type):
         # let them contribute to the class
         for arg, spec in specs:
             spec.contribute_to_class(cls, arg)
+
+        result_fields = getattr(cls, '_result_fields', None)
+        if result_fields:
+            setattr(cls, '_result_type', ResultObject.for_fields(result_fields, name + 'Result', cls))
+
+        # validate all the declared arguments in a single wrapper
+        arg_specs = cls.__dict__.get('_arg_specs')
+        if arg_specs:
+            setattr(cls, '__call__', ArgSpec.check_inputs(arg_specs, getattr(cls, '__call__'),
+                                                          batched=getattr(cls, 'batched', False)))
         return cls
 
 
@@ -144,19 +480,61 @@ class ArgSpec(object):
             raise ValueError("unknown keywords: %s" % kwargs.keys())
 
     def contribute_to_class(self, cls, name):
-        call = getattr(cls, '__call__')
-        setattr(cls, '__call__', self.check_input(name, call))
+        self.name = name
+        specs = cls.__dict__.get('_arg_specs', ())
+        setattr(cls, '_arg_specs', specs + (self,))
 
-    def check_input(self_, name, func): # @NoSelf
-        def wrapper(self, **kwargs):
-            if name not in kwargs:
-                if self_.default == self_.__UNSPECIFIED:
-                    raise KeyError("Undefined argument: '%s' for '%s'" % (name, type(self).__name__))
-                kwargs[name] = self_.default
+    @classmethod
+    def check_inputs(cls, specs, func, batched=False):
+        """Returns a wrapper of func applying the defaults, normalizers and type checks
+        of all the given specs in a single generated function.
 
-            kwargs[name] = self_.normalizer(name, kwargs[name], self_.types)
-            return func(self, **kwargs)
-        return wrapper
+        :param batched: the arguments are lists, and are checked item by item.
+        """
+        namespace = {'func': func, 'state': state, 'violated': violated}
+        lines = ["def wrapper(self, **kwargs):",
+                 "    check = state.check"]
+        if batched:
+            lines += ["    size = len(next(kwargs.itervalues())) if kwargs else 0"]
+        for i, spec in enumerate(specs):
+            namespace['types_%d' % i] = spec.types
+            namespace['normalizer_%d' % i] = spec.normalizer
+            namespace['default_%d' % i] = spec.default
+            undefined = spec.default is cls.__UNSPECIFIED
+            lines += ["    if %r in kwargs:" % spec.name,
+                      "        value = kwargs[%r]" % spec.name,
+                      "    else:"]
+            if undefined:
+                lines += ["        raise KeyError(\"Undefined argument: '%%s' for '%%s'\" %% (%r, type(self).__name__))"
+                          % spec.name]
+            elif batched:
+                lines += ["        value = [default_%d] * size" % i]
+            else:
+                lines += ["        value = default_%d" % i]
+            if spec.normalizer == cls.default_normalizer:
+                # the default normalizer only checks, when the validation policy asks
+                # for it; it is called to raise its error.
+                invalid = "not isinstance(%%s, types_%d) and violated('argument', %r, %%s, types_%d)" % (
+                    i, spec.name, i)
+                if batched:
+                    lines += ["    if check is True or check and check():",
+                              "        for v in value:",
+                              "            if %s:" % (invalid % ('v', 'v')),
+                              "                normalizer_%d(%r, v, types_%d)" % (i, spec.name, i),
+                              "    kwargs[%r] = value" % spec.name]
+                else:
+                    lines += ["    if (check is True or check and check()) and %s:" % (invalid % ('value', 'value')),
+                              "        normalizer_%d(%r, value, types_%d)" % (i, spec.name, i)]
+                    if not undefined:
+                        lines += ["    kwargs[%r] = value" % spec.name]
+            elif batched:
+                lines += ["    kwargs[%r] = [normalizer_%d(%r, v, types_%d) for v in value]" % (spec.name, i, spec.name, i)]
+            else:
+                lines += ["    kwargs[%r] = normalizer_%d(%r, value, types_%d)" % (spec.name, i, spec.name, i)]
+        lines += ["    return func(self, **kwargs)"]
+        code = compile("\n".join(lines) + "\n", "<arg specs of %s>" % func.__name__, "exec")
+        exec code in namespace
+        return functools.wraps(func)(namespace['wrapper'])
 
     @classmethod
     def default_normalizer(cls, name, value, types):
@@ -181,25 +559,68 @@ class ResultObject(dict):
     If using a result spec, the logic unit will return an instance
     of this class. It provides handy dict and object like properties
     with type checking.
+
+    Each logic unit declaring results gets its own subclass (see for_fields),
+    which keeps the values in slots rather than in a dict.
     """
-    def __init__(self, fields):
-        object.__setattr__(self, '_fields', fields)
-        object.__setattr__(self, '_values', {name: spec._default for name, spec in fields.iteritems()})
+    __slots__ = ()
+    _owner = None
+    _fields = {}
+    _getters = {}
+    _setters = {}
+    _defaults = ()
+
+    @classmethod
+    def for_fields(cls, fields, name=None, owner=None):
+        """Returns a subclass holding the given result specs, by name, in slots,
+        with the defaults and the typed setters bound once.
+
+        :param owner: the LogicUnit class the results belong to, by which they pickle.
+        """
+        names = tuple(sorted(fields))
+        result_type = type(name or cls.__name__, (cls,), {'__slots__': names})
+        result_type._owner = owner
+        slots = [result_type.__dict__[n] for n in names]
+        result_type._fields = dict(fields)
+        result_type._getters = dict((n, slot.__get__) for n, slot in zip(names, slots))
+        result_type._setters = dict((n, (fields[n].types, slot.__set__)) for n, slot in zip(names, slots))
+        result_type._defaults = tuple((slot.__set__, fields[n]._default) for n, slot in zip(names, slots))
+        return result_type
+
+    def __init__(self):
+        for set_, default in self._defaults:
+            set_(self, default)
 
     def __getattr__(self, name):
-        return self._values[name]
+        # only reached for names which are not results.
+        raise KeyError(name)
 
     def __setattr__(self, name, value):
-        self.__setitem__(name, value)
+        types, set_ = self._setters[name]
+        check = state.check
+        if (check is True or check and check()) and not isinstance(value, types) \
+                and violated('result', name, value, types):
+            raise TypeError((value, types))
+        set_(self, value)
 
-    def __setitem__(self, name, value):
-        spec = self._fields[name]
-        if not isinstance(value, spec.types):
-            raise TypeError((value, spec.types))
-        self._values[name] = value
+    __setitem__ = __setattr__
 
     def __getitem__(self, name):
-        return self._values[name]
+        return self._getters[name](self)
+
+    def __reduce__(self):
+        values = dict((name, get(self)) for name, get in self._getters.iteritems())
+        if self._owner is None:
+            return dict, (values,)
+        return _rebuild_result, (self._owner, values)
+
+
+def _rebuild_result(owner, values):
+    result = owner._result_type()
+    for name, value in values.iteritems():
+        # restored as is, since unset results hold defaults which may not type check.
+        result._setters[name][1](result, value)
+    return result
 
 
 class ResultSpec(object):
@@ -213,10 +634,12 @@ class ResultSpec(object):
         :params *args: a list of python types for return value checking
         :param docs: a description of this result
         :param default: a default return value, values begin as none unless specified
+        :param id: the number identifying this result in encodings (see codec)
         """
         self.types = tuple((object,)) if not types_ else tuple(types_)
         self.docs = kwargs.pop('docs', None)
         self._default = kwargs.pop('default', None)
+        self.id = kwargs.pop('id', None)
         if kwargs:
             raise ValueError("unknown keywords: %s" % kwargs.keys())
 
@@ -231,10 +654,15 @@ class ResultSpec(object):
         setattr(cls, 'result', property(lambda self_: self_._results.value))
 
     def manage_result(_, func): # @NoSelf
+        if inspect.isgeneratorfunction(func):
+            # a coroutine; its result has to follow it across suspensions.
+            from marx.workflow.asynchronous import manage_result
+            return manage_result(func)
+
         @functools.wraps(func)
         def wrapper(self, **kwargs):
             try:
-                self._results.value = ResultObject(self._result_fields)
+                self._results.value = self._result_type()
                 res = func(self, **kwargs)
                 if res is None:
                     return self._results.value
@@ -247,11 +675,20 @@ class ResultSpec(object):
 class LogicUnit(object):
     __metaclass__ = LogicUnitBase
 
+    #: Opt in to batching: __call__ then receives a list per argument, one item
+    #: per context, and returns a list of per context results. A result may be
+    #: an exception instance (SkipStep, Abort, ...) standing for that context
+    #: raising it.
+    batched = False
+
+    #: Run in a worker process (see marx.workflow.process) when bound to a Step.
+    cpu_bound = False
+
     def __call__(self):
         abstract # @UndefinedVariable ~ this is a python guru move
 
     @classmethod
-    def AutoMap(cls, overrides=None):
+    def AutoMap(cls, overrides=None, ctx_cls=None):
         """
         Provides a mechanism for automatically binding like-named properties of the
         context to like named arguments to eliminate boilerplate, but possibly create
@@ -260,23 +697,68 @@ class LogicUnit(object):
 
         :param dict overrides: a mapping of arg names to context attributes
            to explicitly map over.
+        :param ctx_cls: the class of the contexts mapped; the attributes are then
+           looked up on it once, here, raising AttributeError for any missing one
+           without a default, and each call only reads them.
         """
-        def auto_map(context):
-            spec = cls._args
-            overrides_ = overrides or {}
-            # populate the kwargs and include defaults
-            kwargs = dict(zip(spec.args[-(len(spec.defaults or [])):], spec.defaults or []))
-            for arg in spec.args[1:]:
-                if arg == 'context': # this is special
+        spec = cls._args
+        overrides = overrides or {}
+        defaults = dict(zip(spec.args[len(spec.args) - len(spec.defaults or ()):], spec.defaults or ()))
+        args = spec.args[1:]
+        pass_context = 'context' in args
+        # (argument, context attribute) pairs
+        pairs = tuple((arg, overrides.get(arg, arg)) for arg in args if arg != 'context')
+
+        if ctx_cls is not None:
+            auto_map = cls._bind_fields(ctx_cls, pairs, defaults, pass_context)
+        else:
+            missing = object()
+
+            def auto_map(context):
+                kwargs = dict(defaults)
+                if pass_context:  # this is special
                     kwargs['context'] = context
-                    continue
-                mapped_field = overrides_.get(arg, arg)
-                if not hasattr(context, mapped_field):
-                    if arg in kwargs: # it was provided by a default value
-                        continue
-                    raise AttributeError("Context does not have field '%s'. context=%r" % (mapped_field, context))
-                kwargs[arg] = getattr(context, mapped_field)
-            return kwargs
+                for arg, mapped_field in pairs:
+                    value = getattr(context, mapped_field, missing)
+                    if value is missing:
+                        if arg in kwargs:  # it was provided by a default value
+                            continue
+                        raise AttributeError("Context does not have field '%s'. context=%r" % (mapped_field, context))
+                    kwargs[arg] = value
+                return kwargs
+            auto_map.fields = tuple(mapped_field for _, mapped_field in pairs)
+
+        # the fields read, for dependency analysis; unknown when passed the context.
+        if pass_context:
+            auto_map.fields = None
+        return auto_map
+
+    @classmethod
+    def _bind_fields(cls, ctx_cls, pairs, defaults, pass_context):
+        """Returns an auto map for contexts of ctx_cls, generated as a single dict
+        display of the attributes read and the defaults of those it lacks."""
+        namespace = {}
+        items, fields = [], []
+        for arg, mapped_field in pairs:
+            if hasattr(ctx_cls, mapped_field):
+                if re.match(r'[A-Za-z_]\w*$', mapped_field):
+                    items.append("%r: context.%s" % (arg, mapped_field))
+                else:
+                    items.append("%r: getattr(context, %r)" % (arg, mapped_field))
+                fields.append(mapped_field)
+            elif arg in defaults:
+                namespace['default_%d' % len(items)] = defaults[arg]
+                items.append("%r: default_%d" % (arg, len(items)))
+            else:
+                raise AttributeError("%s does not have field '%s' for argument '%s' of %s" % (
+                    ctx_cls.__name__, mapped_field, arg, cls.__name__))
+        if pass_context:
+            items.append("'context': context")
+        source = "def auto_map(context):\n    return {%s}\n" % ", ".join(items)
+        code = compile(source, "<auto map of %s for %s>" % (cls.__name__, ctx_cls.__name__), "exec")
+        exec code in namespace
+        auto_map = namespace['auto_map']
+        auto_map.fields = tuple(fields)
         return auto_map
 
     @classmethod
@@ -0,0 +1,88 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Streaming contexts through a workflow with bounded concurrency.
+
+At most concurrency contexts are in flight at a time, counting, when the
+results are ordered, those done but waiting for an earlier one. The next
+context is only drawn from the input once a result has been handed out,
+so a slow consumer holds back the input rather than piling up results.
+'''
+import collections
+import Queue
+import sys
+from multiprocessing.pool import ThreadPool
+
+DEFAULT_CONCURRENCY = 8
+
+#: The result of a context run through a stream: outcome is one of 'completed',
+#: 'aborted' or 'errored'; result is what calling the workflow returned, and
+#: error the exception which escaped it, like that re-raised by the default
+#: on_error, in which case result is None.
+StreamResult = collections.namedtuple('StreamResult', 'context outcome result error')
+
+
+def run(workflow, context):
+    """Runs context through workflow, and returns its StreamResult."""
+    try:
+        outcome, result = workflow.run_outcome(context)
+        return StreamResult(context, outcome, result, None)
+    except Exception, e:
+        return StreamResult(context, 'errored', None, e)
+
+
+def _run(done, index, workflow, context):
+    try:
+        done.put((index, run(workflow, context)))
+    except BaseException:
+        done.put((index, StreamResult(context, 'errored', None, sys.exc_info()[1])))
+
+
+def stream(workflow, contexts, concurrency=DEFAULT_CONCURRENCY, ordered=True, pool=None):
+    """A generator of the StreamResults of the contexts run through workflow,
+    see Workflow.stream."""
+    if concurrency < 1:
+        raise ValueError("concurrency has to be at least 1")
+    own_pool = pool is None
+    if own_pool:
+        pool = ThreadPool(concurrency)
+    done = Queue.Queue()
+    contexts = iter(contexts)
+    exhausted = False
+    submitted = 0
+    running = 0
+    # results are handed out in order of index from next_index on; those done
+    # early wait in ready.
+    next_index = 0
+    ready = {}
+    try:
+        while True:
+            while not exhausted and (submitted - next_index if ordered else running) < concurrency:
+                try:
+                    context = next(contexts)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pool.apply_async(_run, (done, submitted, workflow, context))
+                submitted += 1
+                running += 1
+            if not running:
+                return
+            index, result = done.get()
+            running -= 1
+            if not ordered:
+                next_index += 1
+                yield result
+                continue
+            ready[index] = result
+            while next_index in ready:
+                result = ready.pop(next_index)
+                next_index += 1
+                yield result
+    finally:
+        if own_pool:
+            # lets the contexts in flight, if the consumer stopped early, finish.
+            pool.close()
+            pool.join()
@@ -0,0 +1,247 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+Traces of workflow runs: a span per run, with a child span per step,
+handed to an exporter as each run ends.
+
+    tracer = Tracer(RingBufferExporter(10000), rate=100)
+    workflow.add_hook(tracer)
+
+A step span records the step name and docs, how it ended (ok, skipped,
+aborted or errored) and the sizes (len) of the context fields mapped in
+and out of it, as attributes "size.<field>". A run of a workflow used as a
+step of another joins the trace of the outer run.
+
+Only one run in rate is traced. Whether a run is, is decided once as it
+starts (see Hook.observes); a run which is not, and which no other hook
+observes, takes the uninstrumented path, so tracing stays cheap however
+many runs there are.
+'''
+import collections
+import itertools
+import json
+import random
+import threading
+import time
+import weakref
+
+from marx.workflow.instrument import Hook, step_name
+
+OK = 'ok'
+SKIPPED = 'skipped'
+ABORTED = 'aborted'
+ERRORED = 'errored'
+
+#: The span status of each outcome of a workflow run.
+_RUN_STATUS = {'completed': OK, 'aborted': ABORTED, 'errored': ERRORED}
+
+
+def _new_id(bits):
+    return '%0*x' % (bits // 4, random.getrandbits(bits))
+
+
+class Span(object):
+    """A timed operation of a trace; times are in seconds, start since the epoch."""
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'kind', 'name', 'start', 'duration',
+                 'status', 'attributes')
+
+    def __init__(self, trace_id, parent_id, kind, name):
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.name = name
+        self.start = time.time()
+        self.duration = None
+        self.status = None
+        self.attributes = {}
+
+    def as_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __repr__(self):
+        return "<Span %s %s %s>" % (self.kind, self.name, self.status)
+
+
+def _sizes(attributes, fields, context):
+    """Records the len of those of fields of context which have one."""
+    if not fields:
+        return
+    for name in fields:
+        try:
+            attributes['size.' + name] = len(getattr(context, name))
+        except (TypeError, AttributeError):
+            pass
+
+
+def _describe(step):
+    return (step_name(step), getattr(step, 'docs', None),
+            getattr(step, 'reads', None), getattr(step, 'writes', None))
+
+
+class _Trace(object):
+    """The spans of the traced run of a context, finished and open."""
+    __slots__ = ('trace_id', 'spans', 'runs', 'steps', 'last_step')
+
+    def __init__(self):
+        self.trace_id = _new_id(128)
+        self.spans = []
+        #: the spans of the runs in progress, the innermost last.
+        self.runs = []
+        #: id(step) -> span, for the steps in progress.
+        self.steps = {}
+        self.last_step = None
+
+
+class Tracer(Hook):
+    """A hook tracing one run in rate of the workflows it is added to."""
+
+    def __init__(self, exporter, rate=1):
+        """
+        :param exporter: an Exporter, handed the spans of each traced run as it ends.
+        :param rate: trace one run in rate.
+        """
+        self.exporter = exporter
+        self.rate = rate
+        self._runs = itertools.count()
+        # id(context) -> _Trace, for the contexts being traced.
+        self._traces = {}
+        # step -> (name, docs, fields read, fields written), worked out once; weakly,
+        # as workflows may well be built and dropped per request.
+        self._steps = weakref.WeakKeyDictionary()
+
+    def _describe(self, step):
+        try:
+            info = self._steps.get(step)
+        except TypeError:
+            # not weakly referenceable, like a builtin: worked out each time.
+            return _describe(step)
+        if info is None:
+            info = self._steps[step] = _describe(step)
+        return info
+
+    def observes(self, workflow, context):
+        # a run inside a traced one joins its trace.
+        if id(context) in self._traces:
+            return True
+        return self.rate <= 1 or not next(self._runs) % self.rate
+
+    def workflow_start(self, workflow, context):
+        trace = self._traces.get(id(context))
+        if trace is None:
+            trace = self._traces[id(context)] = _Trace()
+            parent = None
+        else:
+            parent = (trace.last_step or trace.runs[-1]).span_id
+        span = Span(trace.trace_id, parent, 'workflow', type(workflow).__name__)
+        span.attributes['steps'] = len(workflow.steps)
+        trace.runs.append(span)
+
+    def workflow_end(self, workflow, context, outcome, elapsed):
+        trace = self._traces.get(id(context))
+        if trace is None:
+            return
+        span = trace.runs.pop()
+        span.duration = elapsed
+        span.status = _RUN_STATUS[outcome]
+        trace.spans.append(span)
+        if not trace.runs:
+            del self._traces[id(context)]
+            self.exporter.export(trace.spans)
+
+    def step_start(self, workflow, step, context):
+        trace = self._traces.get(id(context))
+        if trace is None:
+            return
+        name, docs, reads, _ = self._describe(step)
+        span = Span(trace.trace_id, trace.runs[-1].span_id, 'step', name)
+        if docs:
+            span.attributes['docs'] = docs
+        _sizes(span.attributes, reads, context)
+        trace.steps[id(step)] = trace.last_step = span
+
+    def _end(self, step, context, elapsed, status, error=None):
+        trace = self._traces.get(id(context))
+        if trace is None:
+            return
+        span = trace.steps.pop(id(step))
+        if trace.last_step is span:
+            trace.last_step = None
+        span.duration = elapsed
+        span.status = status
+        if error is not None:
+            span.attributes['error'] = "%s: %s" % (type(error).__name__, error)
+        elif status == OK:
+            _sizes(span.attributes, self._describe(step)[3], context)
+        trace.spans.append(span)
+
+    def step_end(self, workflow, step, context, elapsed):
+        self._end(step, context, elapsed, OK)
+
+    def step_skip(self, workflow, step, context, elapsed):
+        self._end(step, context, elapsed, SKIPPED)
+
+    def step_abort(self, workflow, step, context, abort, elapsed):
+        self._end(step, context, elapsed, ABORTED)
+
+    def step_error(self, workflow, step, context, error, elapsed):
+        self._end(step, context, elapsed, ERRORED, error)
+
+
+class Exporter(object):
+    """Receives the spans of traced runs; called from the threads running them."""
+
+    def export(self, spans):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class RingBufferExporter(Exporter):
+    """Keeps the last capacity spans in memory."""
+
+    def __init__(self, capacity=10000):
+        self._spans = collections.deque(maxlen=capacity)
+
+    def export(self, spans):
+        self._spans.extend(spans)
+
+    def spans(self):
+        """Returns the spans kept, oldest first."""
+        return list(self._spans)
+
+    def clear(self):
+        self._spans.clear()
+
+
+class JsonLinesExporter(Exporter):
+    """Appends the spans to a file, a JSON object (see Span.as_dict) per line."""
+
+    def __init__(self, path_or_file):
+        """:param path_or_file: a path, opened for appending, or a file like object."""
+        if isinstance(path_or_file, basestring):
+            self._file = open(path_or_file, 'a')
+            self._owned = True
+        else:
+            self._file = path_or_file
+            self._owned = False
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = "".join(json.dumps(span.as_dict(), default=repr) + "\n" for span in spans)
+        with self._lock:
+            self._file.write(lines)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._owned:
+                self._file.close()
+            else:
+                self._file.flush()
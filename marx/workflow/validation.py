@@ -0,0 +1,121 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+How much of the type checking of context fields, LogicUnit arguments and
+results is done:
+
+  - strict, the default: every value is checked, and a bad one raises;
+  - sampled: one check in every rate is done, and a bad value is reported
+    to the policy's on_violation, rather than raised;
+  - trusted: values are not checked at all.
+
+Normalizers other than the default one convert values, and always run.
+
+The policy is looked up when checking, so switching it takes effect at once:
+set_default changes it for the process, and a Workflow given a validation
+policy applies it for the duration of its runs. Coroutine steps of an
+AsyncWorkflow see it each time they resume, and runs interleaving on an
+event loop each see their own.
+'''
+import collections
+import itertools
+import threading
+
+STRICT = 'strict'
+SAMPLED = 'sampled'
+TRUSTED = 'trusted'
+
+#: What failed a check: kind is one of 'field', 'argument' or 'result'.
+Violation = collections.namedtuple('Violation', 'kind name value types')
+
+
+class Validation(object):
+    def __init__(self, mode=STRICT, rate=100, on_violation=None):
+        """
+        :param mode: one of STRICT, SAMPLED or TRUSTED.
+        :param rate: in sampled mode, one check in every rate is done.
+        :param on_violation: called with a Violation for each bad value found.
+        """
+        if mode not in (STRICT, SAMPLED, TRUSTED):
+            raise ValueError("unknown validation mode: %r" % (mode,))
+        if rate < 1:
+            raise ValueError("the sampling rate has to be at least 1")
+        self.mode = mode
+        self.rate = rate
+        self.on_violation = on_violation
+        self._counter = itertools.count()
+        #: True to check every value, False none, or a function telling whether
+        #: to check the value at hand.
+        self.check = {STRICT: True, SAMPLED: self._sample, TRUSTED: False}[mode]
+
+    def _sample(self):
+        return next(self._counter) % self.rate == 0
+
+    def violation(self, kind, name, value, types):
+        """Reports a bad value; returns True if the check at hand has to raise."""
+        if self.on_violation is not None:
+            self.on_violation(Violation(kind, name, value, types))
+        return self.mode == STRICT
+
+    def __repr__(self):
+        return "Validation(%r, rate=%r)" % (self.mode, self.rate)
+
+
+class _State(threading.local):
+    """The policy in effect, and its check, which the checks read first: the
+    class attributes hold the default, a thread's own those of the workflow
+    it runs."""
+    policy = Validation()
+    check = policy.check
+
+#: Read by the checks as state.check, see Validation.check.
+state = _State()
+
+
+def set_default(policy):
+    """Makes policy the one used outside of workflows having their own, and
+    returns the previous one."""
+    previous = _State.policy
+    _State.policy, _State.check = policy, policy.check
+    return previous
+
+
+def current():
+    """Returns the policy in effect in this thread."""
+    return state.policy
+
+
+def violated(kind, name, value, types):
+    """Reports a bad value to the policy in effect; True if the check has to raise."""
+    return state.policy.violation(kind, name, value, types)
+
+
+class active(object):
+    """Puts policy in effect in this thread for the duration of a with block;
+    None stands for the default. Reusable, though not reentrant."""
+    __slots__ = ('policy', '_previous')
+
+    def __init__(self, policy):
+        self.policy = policy
+
+    def __enter__(self):
+        self._previous = state.__dict__.copy()
+        if self.policy is None:
+            state.__dict__.clear()
+        else:
+            state.policy, state.check = self.policy, self.policy.check
+        return self.policy
+
+    def __exit__(self, *exc_info):
+        state.__dict__.clear()
+        state.__dict__.update(self._previous)
+
+
+def applying(policy, func):
+    """Returns a function calling func with policy in effect."""
+    def run(*args, **kwargs):
+        with active(policy):
+            return func(*args, **kwargs)
+    return run
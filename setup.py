@@ -35,8 +35,14 @@ setup(
     description=read(README).split("\n", 1)[0],
     url='https://github.com/ninowalker/marx',
     license="BSD",
-    packages=find_packages(exclude=["tests.*", "tests"]),
+    packages=find_packages(exclude=["tests.*", "tests", "benchmarks.*", "benchmarks"]),
     long_description=read(README),
+    extras_require={
+        'async': ['trollius'],
+    },
+    entry_points={
+        'console_scripts': ['marx = marx.cli:main'],
+    },
     test_suite='nose.collector',
     classifiers=[
         "License :: OSI Approved :: BSD License",
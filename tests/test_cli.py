@@ -0,0 +1,107 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import os
+import shutil
+import StringIO
+import tempfile
+import unittest
+import nose.tools
+from mock import patch
+from marx import cli
+from marx.workflow.codec import JsonLinesCodec
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import Abort
+from marx.workflow.flow import Workflow
+from marx.workflow.step import Step
+
+
+class Context(DefaultContext):
+    name = Field(str, id=4)
+    count = Field(int, id=5)
+
+
+class Greet(object):
+    def __call__(self, name, count):
+        if count < 0:
+            raise Abort()
+        if count == 0:
+            raise ValueError("no count")
+        return {'greeting': "hello %s" % (name * count)}
+
+
+def make_workflow():
+    return Workflow(steps=[Step(Greet(), arg_map={'name': 'name', 'count': 'count'},
+                                result_map={'message': 'greeting'})])
+
+WORKFLOW = make_workflow()
+
+
+class TestLoad(unittest.TestCase):
+    def test_paths(self):
+        assert cli.load('tests.test_cli.Context') is Context
+        assert cli.load('tests.test_cli:Context.name') is Context.name
+        assert isinstance(cli.load_workflow('tests.test_cli.make_workflow'), Workflow)
+        with nose.tools.assert_raises(TypeError):  # @UndefinedVariable
+            cli.load_workflow('tests.test_cli.Context.NAME')
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            cli.load('cli')
+
+    def test_read_contexts(self):
+        lines = ['{"name": "bob", "count": 2}\n', '\n', '{"name": "caf\\u00e9"}\n']
+        bob, cafe = cli.read_contexts(lines, Context)
+        nose.tools.eq_((bob.name, bob.count), ("bob", 2))
+        nose.tools.eq_(cafe.name, "caf\xc3\xa9")
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            list(cli.read_contexts(['{"count": "x"}'], Context))
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input = os.path.join(self.directory, 'input.jsonl')
+        with open(self.input, 'w') as f:
+            for count in (1, 2, 3, -1, 0):
+                f.write('{"name": "bob", "count": %d}\n' % count)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def main(self, *args):
+        out, err = StringIO.StringIO(), StringIO.StringIO()
+        with patch('sys.stdout', out), patch('sys.stderr', err):
+            code = cli.main(['tests.test_cli.make_workflow', 'tests.test_cli.Context', self.input] + list(args))
+        return code, out.getvalue(), err.getvalue()
+
+    def test_report(self):
+        code, out, err = self.main()
+        nose.tools.eq_(code, 1)
+        assert "5 contexts in" in out
+        assert "(3 completed, 1 aborted, 1 errored)" in out
+        assert "Greet" in out and "p99 ms" in out
+        nose.tools.eq_(err, "error: ValueError: no count\n")
+
+    def test_concurrency_and_limit(self):
+        code, out, _ = self.main('--concurrency', '4', '--limit', '3')
+        nose.tools.eq_(code, 0)
+        assert "(3 completed, 0 aborted, 0 errored)" in out
+
+    def test_profile(self):
+        code, out, _ = self.main('--profile', '--limit', '2', '--profile-dir', self.directory)
+        assert "== Greet" in out
+        assert "function calls" in out
+        assert os.path.exists(os.path.join(self.directory, 'Greet.pstats'))
+        with nose.tools.assert_raises(SystemExit):  # @UndefinedVariable
+            self.main('--profile', '--concurrency', '2')
+
+    def test_ids(self):
+        codec = JsonLinesCodec()
+        context = Context()
+        context.name = "bob"
+        context.count = 1
+        with open(self.input, 'w') as f:
+            codec.dump([context], f)
+        code, out, _ = self.main('--ids')
+        assert "(1 completed, 0 aborted, 0 errored)" in out
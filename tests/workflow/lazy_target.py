@@ -0,0 +1,17 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+
+A step implementation only ever imported by name, by the lazy binding tests.
+'''
+from marx.workflow.step import LogicUnit, ArgSpec
+
+
+class Double(LogicUnit):
+    value = ArgSpec(int)
+
+    def __call__(self, value):
+        return value * 2
+
+double = Double()
@@ -0,0 +1,229 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import time
+import unittest
+from mock import Mock
+from nose.plugins.skip import SkipTest
+import nose.tools
+from marx.workflow import validation
+from marx.workflow.cache import ResultCache
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import Abort, SkipStep, SKIP
+from marx.workflow.instrument import StepStats
+from marx.workflow.step import LogicUnit, ArgSpec, ResultSpec, Step
+from marx.workflow.validation import Validation, TRUSTED
+
+try:
+    import trollius
+    from trollius import From, Return
+except ImportError:
+    raise SkipTest("trollius is not installed")
+
+from marx.workflow.asynchronous import AsyncWorkflow
+
+
+class Fetch(LogicUnit):
+    key = ArgSpec(int)
+    value = ResultSpec(int)
+
+    def __call__(self, key):
+        yield From(trollius.sleep(0.01 * (3 - key % 3)))
+        self.result.value = key * 10
+
+
+class Double(LogicUnit):
+    value = ArgSpec(int)
+    doubled = ResultSpec(int)
+
+    def __call__(self, value):
+        self.result.doubled = value * 2
+
+
+class MaybeSkip(LogicUnit):
+    def __call__(self, key):
+        yield From(trollius.sleep(0))
+        if key < 0:
+            raise SkipStep()
+        if key == 0:
+            raise Abort()
+        raise Return({'value': key})
+
+
+class SignalOnKey(LogicUnit):
+    def __call__(self, key):
+        yield From(trollius.sleep(0))
+        raise Return(SKIP if key < 0 else Abort())
+
+
+class Context(DefaultContext):
+    key = Field(int)
+    value = Field(int)
+    doubled = Field(int)
+
+
+FETCH = Step(Fetch(), arg_map=Fetch.AutoMap(), result_map=Fetch.ResultMap(Context))
+DOUBLE = Step(Double(), arg_map=Double.AutoMap(), result_map=Double.ResultMap(Context))
+
+
+def run(coro):
+    return trollius.get_event_loop().run_until_complete(coro)
+
+
+def context(key):
+    ctx = Context()
+    ctx.key = key
+    return ctx
+
+
+class TestAsyncWorkflow(unittest.TestCase):
+    def test_mixed_steps(self):
+        m = Mock()
+        w = AsyncWorkflow(steps=[FETCH, DOUBLE, m])
+        ctx = run(w.run_async(context(2)))
+        assert (ctx.value, ctx.doubled) == (20, 40)
+        m.assert_called_once_with(context=ctx)
+
+    def test_interleaved_results(self):
+        w = AsyncWorkflow(steps=[FETCH, DOUBLE])
+        contexts = [context(i) for i in range(30)]
+        run(trollius.gather(*[w.run_async(c) for c in contexts]))
+        for i, ctx in enumerate(contexts):
+            assert ctx.doubled == i * 20, (i, ctx.doubled)
+
+    def test_many_in_flight(self):
+        w = AsyncWorkflow(steps=[FETCH])
+        start = time.time()
+        contexts = run(trollius.gather(*[w.run_async(context(1)) for _ in range(2000)]))
+        # run one after the other, they would take 40 seconds.
+        assert time.time() - start < 2
+        assert all(c.value == 10 for c in contexts)
+
+    def test_skip_and_abort(self):
+        m = Mock()
+        m_a = Mock(return_value="aborted")
+        w = AsyncWorkflow(steps=[Step(MaybeSkip(), arg_map=MaybeSkip.AutoMap(),
+                                      result_map={'value': 'value'}), m],
+                          on_abort=m_a)
+        assert run(w.run_async(context(4))).value == 4
+        ctx = run(w.run_async(context(-1)))
+        assert ctx.value is None
+        assert m.call_count == 2
+        assert run(w.run_async(context(0))) == "aborted"
+        assert m.call_count == 2
+
+    def test_returned_signals(self):
+        m = Mock()
+        m_a = Mock(return_value="aborted")
+        w = AsyncWorkflow(steps=[Step(SignalOnKey(), arg_map=SignalOnKey.AutoMap()), m], on_abort=m_a)
+        assert run(w.run_async(context(-1))).key == -1
+        assert m.call_count == 1
+        assert run(w.run_async(context(1))) == "aborted"
+        assert m.call_count == 1
+
+    def test_hooks(self):
+        stats, hook = StepStats(), Mock()
+        w = AsyncWorkflow(steps=[Step(MaybeSkip(), arg_map=MaybeSkip.AutoMap()), FETCH],
+                          on_abort=Mock(), on_error=Mock(), hooks=[stats, hook])
+        for key in (1, -1, 0):
+            run(w.run_async(context(key)))
+        run(w.run_async(Context()))
+        nose.tools.eq_([c[0][2] for c in hook.workflow_end.call_args_list],
+                       ['completed', 'completed', 'aborted', 'errored'])
+        row = stats.as_dict()['MaybeSkip']
+        nose.tools.eq_((row['calls'], row['skips'], row['aborts']), (4, 2, 1))
+        row = stats.as_dict()['Fetch']
+        nose.tools.eq_((row['calls'], row['errors']), (3, 1))
+
+    def test_errors(self):
+        w = AsyncWorkflow(steps=[FETCH])
+        with nose.tools.assert_raises(TypeError):  # @UndefinedVariable
+            run(w.run_async(Context()))
+
+        m_f = Mock(return_value=1)
+        w = AsyncWorkflow(steps=[FETCH], on_error=m_f)
+        assert run(w.run_async(Context())) == 1
+
+
+class TestAsyncCache(unittest.TestCase):
+    def test_cached(self):
+        cache = ResultCache()
+        w = AsyncWorkflow(steps=[Step(Fetch(), arg_map=Fetch.AutoMap(), result_map=Fetch.ResultMap(Context),
+                                      cache=cache)])
+        for _ in range(3):
+            assert run(w.run_async(context(2))).value == 20
+        nose.tools.eq_((cache.hits, cache.misses, len(cache)), (2, 1, 1))
+
+
+class LateResult(LogicUnit):
+    """Sets a result of the wrong type, and records the policy in effect, after suspending."""
+    value = ResultSpec(int)
+    policies = []
+
+    def __call__(self, key):
+        yield From(trollius.sleep(0))
+        self.policies.append((key, validation.current()))
+        self.result.value = "ten"
+
+
+class TestAsyncValidation(unittest.TestCase):
+    def test_policy_after_suspending(self):
+        LateResult.policies = []
+        trusted = Validation(TRUSTED)
+        step = Step(LateResult(), arg_map=LateResult.AutoMap())
+        m_f = Mock(return_value="failed")
+        w_trusted = AsyncWorkflow(steps=[step], validation=trusted, on_error=m_f)
+        w_strict = AsyncWorkflow(steps=[step], on_error=m_f)
+        outcomes = run(trollius.gather(w_trusted.run_async(context(1)), w_strict.run_async(context(2)),
+                                       w_trusted.run_async(context(3))))
+        nose.tools.eq_(sorted(LateResult.policies), [(1, trusted), (2, validation._State.policy), (3, trusted)])
+        nose.tools.eq_([o if o == "failed" else o.key for o in outcomes], [1, "failed", 3])
+        assert validation.current() is validation._State.policy
+
+
+class TestStreamAsync(unittest.TestCase):
+    def drain(self, stream):
+        @trollius.coroutine
+        def drain():
+            results = []
+            while True:
+                result = yield From(stream.get())
+                if result is None:
+                    raise Return(results)
+                results.append(result)
+        return run(drain())
+
+    def test_ordered(self):
+        w = AsyncWorkflow(steps=[FETCH])
+        results = self.drain(w.stream_async([context(i) for i in range(20)], concurrency=4))
+        nose.tools.eq_([r.context.key for r in results], range(20))
+        assert all(r.outcome == 'completed' and r.result.value == r.context.key * 10 for r in results)
+
+    def test_completion_order(self):
+        w = AsyncWorkflow(steps=[FETCH])
+        # keys 2, 1, 0 sleep 10, 20, 30 ms.
+        results = self.drain(w.stream_async([context(i) for i in range(3)], concurrency=3, ordered=False))
+        nose.tools.eq_([r.context.key for r in results], [2, 1, 0])
+
+    def test_outcomes(self):
+        w = AsyncWorkflow(steps=[Step(MaybeSkip(), arg_map=MaybeSkip.AutoMap(), result_map={'value': 'value'}),
+                                 FETCH])
+        results = self.drain(w.stream_async([context(1), context(0), Context()]))
+        nose.tools.eq_([r.outcome for r in results], ['completed', 'aborted', 'errored'])
+        assert isinstance(results[2].error, TypeError)
+
+    def test_backpressure(self):
+        drawn = []
+
+        def contexts():
+            for i in range(10):
+                drawn.append(i)
+                yield context(i)
+
+        w = AsyncWorkflow(steps=[FETCH])
+        stream = w.stream_async(contexts(), concurrency=2)
+        result = run(stream.get())
+        assert result.context.key == 0
+        nose.tools.eq_(len(drawn), 2)
@@ -0,0 +1,173 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import threading
+import time
+import unittest
+from mock import Mock
+import nose.tools
+from marx.workflow.cache import ResultCache
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.flow import Workflow
+from marx.workflow.step import LogicUnit, ArgSpec, ResultSpec, Step
+
+
+class IsAuthorized(LogicUnit):
+    user = ArgSpec(str)
+    authorized = ResultSpec(bool)
+
+    calls = 0
+
+    def __call__(self, user):
+        IsAuthorized.calls += 1
+        self.result.authorized = user in ("bob", "mary")
+
+
+class AreAuthorized(LogicUnit):
+    batched = True
+    user = ArgSpec(str)
+    authorized = ResultSpec(bool)
+    result_cache = ResultCache()
+
+    batches = []
+
+    def __call__(self, user):
+        AreAuthorized.batches.append(list(user))
+        return [{'authorized': u in ("bob", "mary")} if u else ValueError(u) for u in user]
+
+
+class Unhashable(object):
+    __hash__ = None
+
+
+class Context(DefaultContext):
+    user = Field(str)
+    authorized = Field(bool)
+
+
+def context(user):
+    ctx = Context()
+    ctx.user = user
+    return ctx
+
+
+class TestResultCache(unittest.TestCase):
+    def test_lru(self):
+        cache = ResultCache(maxsize=2)
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        assert cache.get(1) == (True, 'a')
+        cache.put(3, 'c')
+        assert cache.get(2) == (False, None)
+        assert cache.get(1) == (True, 'a')
+        assert cache.stats() == {'hits': 2, 'misses': 1, 'evictions': 1, 'expirations': 0, 'size': 2}
+
+    def test_ttl(self):
+        cache = ResultCache(ttl=0.05)
+        cache.put(1, 'a')
+        assert cache.get(1) == (True, 'a')
+        time.sleep(0.06)
+        assert cache.get(1) == (False, None)
+        assert cache.expirations == 1
+        assert len(cache) == 0
+
+    def test_threads(self):
+        cache = ResultCache(maxsize=10)
+
+        def work():
+            for i in range(1000):
+                if not cache.get(i % 20)[0]:
+                    cache.put(i % 20, i)
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = cache.stats()
+        assert stats['hits'] + stats['misses'] == 4000
+        assert stats['size'] == 10
+
+    def test_bad_size(self):
+        nose.tools.assert_raises(ValueError, ResultCache, 0)  # @UndefinedVariable
+
+
+class TestStepCache(unittest.TestCase):
+    def setUp(self):
+        IsAuthorized.calls = 0
+
+    def test_hit_replays_result(self):
+        cache = ResultCache()
+        step = Step(IsAuthorized(), arg_map=IsAuthorized.AutoMap(),
+                    result_map=IsAuthorized.ResultMap(Context), cache=cache)
+        for user, authorized in (("bob", True), ("bob", True), ("frank", False), ("frank", False)):
+            ctx = context(user)
+            step(ctx)
+            assert ctx.authorized is authorized
+        assert IsAuthorized.calls == 2
+        assert (cache.hits, cache.misses) == (2, 2)
+
+    def test_key_function(self):
+        cache = ResultCache(key=lambda kwargs: kwargs['user'][0])
+        step = Step(IsAuthorized(), arg_map=IsAuthorized.AutoMap(), cache=cache)
+        step(context("bob"))
+        step(context("bill"))
+        assert IsAuthorized.calls == 1
+
+    def test_unit_cache(self):
+        class Cached(IsAuthorized):
+            result_cache = ResultCache()
+
+        step = Step(Cached(), arg_map=Cached.AutoMap())
+        assert step.cache is Cached.result_cache
+        step(context("bob"))
+        Step(Cached(), arg_map=Cached.AutoMap())(context("bob"))
+        assert IsAuthorized.calls == 1
+
+    def test_errors_not_cached(self):
+        m = Mock(side_effect=[ValueError, {'x': 1}])
+        m._accepts_context = False
+        step = Step(m, cache=ResultCache())
+        nose.tools.assert_raises(ValueError, step, DefaultContext())  # @UndefinedVariable
+        step(DefaultContext())
+        step(DefaultContext())
+        assert m.call_count == 2
+
+    def test_unhashable_arguments(self):
+        m = Mock(return_value={'x': 1})
+        m._accepts_context = False
+        step = Step(m, arg_map={'items': 'message'}, cache=ResultCache())
+        for items in ([1, 2], [1, 2], (1, 2), {'a': [1]}, {'a': [1]}):
+            ctx = DefaultContext()
+            ctx.message = items
+            step(ctx)
+        # a list and a tuple of the same items are different keys.
+        assert m.call_count == 3
+
+        # not hashable even so: called, without the cache.
+        ctx = DefaultContext()
+        ctx.message = [Unhashable()]
+        step(ctx)
+        step(ctx)
+        assert m.call_count == 5
+
+    def test_batched(self):
+        AreAuthorized.batches = []
+        AreAuthorized.result_cache.clear()
+        step = Step(AreAuthorized(), arg_map=AreAuthorized.AutoMap(),
+                    result_map=AreAuthorized.ResultMap(Context))
+        w = Workflow(steps=[step], on_error=Mock(return_value="failed"))
+        w.run_many([context(u) for u in ("bob", "frank", "")])
+        contexts = [context(u) for u in ("bob", "mary", "frank", "")]
+        outcomes = w.run_many(contexts)
+        # only the misses are called, and errors are not cached.
+        nose.tools.eq_(AreAuthorized.batches, [["bob", "frank", ""], ["mary", ""]])
+        nose.tools.eq_([c.authorized for c in contexts[:3]], [True, True, False])
+        nose.tools.eq_(outcomes[3], "failed")
+
+    def test_context_needs_key(self):
+        m = Mock()
+        m._accepts_context = True
+        nose.tools.assert_raises(ValueError, Step, m, cache=ResultCache())  # @UndefinedVariable
+        Step(m, cache=ResultCache(key=lambda kwargs: 1))
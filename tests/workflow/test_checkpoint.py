@@ -0,0 +1,174 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import nose.tools
+from marx.workflow.checkpoint import Checkpointer, FileStore, SQLiteStore
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import Abort
+from marx.workflow.flow import Workflow
+from marx.workflow.instrument import StepStats
+
+
+class Context(DefaultContext):
+    total = Field(int)
+    fail_at = Field(int, type(None))
+
+
+class Add(object):
+    """Adds its amount to the total, failing if it is the step to fail at."""
+    def __init__(self, index, calls):
+        self.index = index
+        self.calls = calls
+
+    def __call__(self, context):
+        self.calls.append(self.index)
+        if context.fail_at == self.index:
+            raise ValueError(self.index)
+        if context.fail_at == -self.index:
+            raise Abort()
+        context.total += self.index
+        context.reply(self.index)
+
+
+def fail_and_exit(directory):
+    """Runs a workflow of 10 steps, the last failing, then exits at once, without
+    the exit handlers; run in a process of its own by TestProcessExit."""
+    workflow = Workflow(steps=[Add(i, []) for i in range(1, 11)],
+                        checkpoints=Checkpointer(FileStore(directory)))
+    ctx = Context()
+    ctx.total = 0
+    ctx.fail_at = 10
+    try:
+        workflow.run(ctx, 'run-1')
+    finally:
+        os._exit(1)
+
+
+class CheckpointTests(object):
+    background = True
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoints = Checkpointer(self.store(), background=self.background)
+        self.calls = []
+        self.workflow = Workflow(steps=[Add(i, self.calls) for i in range(1, 6)], checkpoints=self.checkpoints)
+
+    def tearDown(self):
+        self.checkpoints.close()
+        shutil.rmtree(self.directory)
+
+    def context(self, fail_at=None):
+        ctx = Context()
+        ctx.total = 0
+        ctx.fail_at = fail_at
+        return ctx
+
+    def test_resume(self):
+        ctx = self.context(fail_at=4)
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            self.workflow.run(ctx, 'run-1')
+        nose.tools.eq_(self.calls, [1, 2, 3, 4])
+
+        checkpoint = self.checkpoints.load('run-1')
+        nose.tools.eq_(checkpoint.step, 3)
+        nose.tools.eq_((checkpoint.context.total, checkpoint.context.replies), (6, [1, 2, 3]))
+
+        # the cause fixed, only steps 4 and 5 run again.
+        checkpoint.context.fail_at = None
+        self.checkpoints.save('run-1', checkpoint.step, checkpoint.context)
+        ctx = self.workflow.resume('run-1')
+        nose.tools.eq_(self.calls, [1, 2, 3, 4, 4, 5])
+        nose.tools.eq_((ctx.total, ctx.replies), (15, [1, 2, 3, 4, 5]))
+        assert ctx.workflow is self.workflow
+        assert self.checkpoints.load('run-1') is None
+
+    def test_dropped_when_done(self):
+        nose.tools.eq_(self.workflow.run(self.context(), 'run-1').total, 15)
+        nose.tools.eq_(self.workflow.run(self.context(fail_at=-2), 'run-2').total, 1)
+        self.checkpoints.flush()
+        nose.tools.eq_(self.checkpoints.store.run_ids(), [])
+
+    def test_unknown_run(self):
+        with nose.tools.assert_raises(KeyError):  # @UndefinedVariable
+            self.workflow.resume('nope')
+
+    def test_hooks(self):
+        stats = StepStats()
+        self.workflow.add_hook(stats)
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            self.workflow.run(self.context(fail_at=2), 'run-1')
+        nose.tools.eq_(self.checkpoints.load('run-1').step, 1)
+
+
+class TestFileStore(CheckpointTests, unittest.TestCase):
+    def store(self):
+        return FileStore(os.path.join(self.directory, 'runs'), fsync=False)
+
+    def test_run_ids(self):
+        store = self.checkpoints.store
+        store.save('a/b c', 1, 'x.Y', '\x00data\n')
+        nose.tools.eq_(store.run_ids(), ['a/b c'])
+        nose.tools.eq_(store.load('a/b c'), (1, 'x.Y', '\x00data\n'))
+        store.delete('a/b c')
+        assert store.load('a/b c') is None
+
+
+class TestSQLiteStore(CheckpointTests, unittest.TestCase):
+    def store(self):
+        return SQLiteStore(os.path.join(self.directory, 'runs.db'))
+
+
+class TestSynchronous(CheckpointTests, unittest.TestCase):
+    background = False
+
+    def store(self):
+        return SQLiteStore(':memory:')
+
+
+class TestErrors(unittest.TestCase):
+    def test_no_checkpoints(self):
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            Workflow(steps=[]).run(Context(), 'run-1')
+
+    def test_failed_write(self):
+        store = SQLiteStore(':memory:')
+        store.close()
+        checkpoints = Checkpointer(store)
+        ctx = Context()
+        checkpoints.save('run-1', 0, ctx)
+        with nose.tools.assert_raises(Exception):  # @UndefinedVariable
+            checkpoints.flush()
+        # reported once.
+        checkpoints.flush()
+
+
+class TestProcessExit(unittest.TestCase):
+    def test_resume_after_exit(self):
+        directory = tempfile.mkdtemp()
+        try:
+            root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            code = subprocess.call([sys.executable, '-c',
+                                    'import sys; from tests.workflow.test_checkpoint import fail_and_exit; '
+                                    'fail_and_exit(sys.argv[1])', directory], cwd=root)
+            nose.tools.eq_(code, 1)
+
+            calls = []
+            workflow = Workflow(steps=[Add(i, calls) for i in range(1, 11)],
+                                checkpoints=Checkpointer(FileStore(directory)))
+            checkpoint = workflow.checkpoints.load('run-1')
+            nose.tools.eq_((checkpoint.step, checkpoint.context.total), (9, 45))
+            checkpoint.context.fail_at = None
+            workflow.checkpoints.save('run-1', checkpoint.step, checkpoint.context)
+            nose.tools.eq_(workflow.resume('run-1').total, 55)
+            nose.tools.eq_(calls, [10])
+            workflow.checkpoints.close()
+        finally:
+            shutil.rmtree(directory)
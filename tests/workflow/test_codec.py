@@ -0,0 +1,180 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import datetime
+import decimal
+import StringIO
+import unittest
+import nose.tools
+from marx.workflow.codec import BinaryCodec, JsonLinesCodec, Schema
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.step import LogicUnit, ResultSpec
+
+
+class Context(DefaultContext):
+    count = Field(int)
+    ratio = Field(float)
+    name = Field(str)
+    title = Field(unicode)
+    flag = Field(bool)
+    tags = Field(list)
+    extra = Field(dict)
+    when = Field()
+
+
+class Versioned(DefaultContext):
+    count = Field(int, id=3)
+    name = Field(str, id=7)
+
+
+class VersionedLater(DefaultContext):
+    # count dropped, and a field added under a new id.
+    name = Field(str, id=7)
+    label = Field(str, id=8)
+
+
+class Score(LogicUnit):
+    score = ResultSpec(int, default=0)
+    passed = ResultSpec(bool, default=False)
+    reason = ResultSpec(str)
+
+    def __call__(self):
+        pass
+
+
+def sample():
+    ctx = Context()
+    ctx.count = -300
+    ctx.ratio = 0.25
+    ctx.name = "bob"
+    ctx.title = u"caf\xe9"
+    ctx.flag = False
+    ctx.tags = [1, (2, 3), None, 2 ** 70]
+    ctx.extra = {'a': {'b': [True]}}
+    return ctx
+
+
+class TestBinaryCodec(unittest.TestCase):
+    def test_round_trip(self):
+        codec = BinaryCodec()
+        ctx = sample()
+        ctx._replies.append("hello")
+        copy = codec.decode(codec.encode(ctx), Context)
+        nose.tools.eq_(copy._values, ctx._values)
+        nose.tools.eq_(copy.replies, ["hello"])
+        assert copy.workflow is None
+        assert isinstance(copy.tags[1], tuple)
+        assert isinstance(copy.title, unicode)
+
+    def test_unset_fields_are_not_written(self):
+        codec = BinaryCodec()
+        ctx = Context()
+        nose.tools.eq_(codec.encode(ctx), '')
+        ctx.count = 1
+        nose.tools.eq_(len(codec.encode(ctx)), 3)
+
+    def test_smaller_than_pickle(self):
+        import cPickle
+        ctx = sample()
+        assert len(BinaryCodec().encode(ctx)) < len(cPickle.dumps(ctx, 2))
+
+    def test_pickle_fallback(self):
+        codec = BinaryCodec()
+        ctx = Context()
+        ctx.when = datetime.date(2026, 10, 18)
+        nose.tools.eq_(codec.decode(codec.encode(ctx), Context).when, datetime.date(2026, 10, 18))
+
+    def test_registered_type(self):
+        codec = BinaryCodec()
+        codec.register(decimal.Decimal, 1, str, decimal.Decimal)
+        ctx = Context()
+        ctx.when = decimal.Decimal("1.10")
+        data = codec.encode(ctx)
+        assert 'cdecimal' not in data and 'decimal' not in data
+        nose.tools.eq_(codec.decode(data, Context).when, decimal.Decimal("1.10"))
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            codec.register(datetime.date, 1, str, str)
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            BinaryCodec().decode(data, Context)
+
+    def test_field_ids(self):
+        codec = BinaryCodec()
+        ctx = Versioned()
+        ctx.count = 2
+        ctx.name = "bob"
+        later = codec.decode(codec.encode(ctx), VersionedLater)
+        nose.tools.eq_((later.name, later.label), ("bob", None))
+
+    def test_result_object(self):
+        codec = BinaryCodec()
+        result = Score._result_type()
+        result.score = 5
+        copy = codec.decode(codec.encode(result), Score._result_type)
+        nose.tools.eq_(dict((k, copy[k]) for k in ('score', 'passed', 'reason')),
+                       {'score': 5, 'passed': False, 'reason': None})
+
+    def test_bad_data(self):
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            BinaryCodec().decode('\x01?', Context)
+
+
+class TestJsonLinesCodec(unittest.TestCase):
+    def test_round_trip(self):
+        codec = JsonLinesCodec()
+        ctx = sample()
+        ctx.tags = [1, 2]
+        line = codec.encode(ctx)
+        assert '\n' not in line
+        copy = codec.decode(line, Context)
+        for name in ('count', 'ratio', 'name', 'title', 'flag', 'tags', 'extra'):
+            nose.tools.eq_(getattr(copy, name), getattr(ctx, name))
+
+    def test_registered_type(self):
+        codec = JsonLinesCodec()
+        codec.register(datetime.date, 1, datetime.date.toordinal, datetime.date.fromordinal)
+        ctx = Context()
+        ctx.when = datetime.date(2026, 10, 18)
+        nose.tools.eq_(codec.decode(codec.encode(ctx), Context).when, ctx.when)
+        ctx.when = object()
+        with nose.tools.assert_raises(TypeError):  # @UndefinedVariable
+            codec.encode(ctx)
+
+    def test_type_key_round_trip(self):
+        codec = JsonLinesCodec()
+        codec.register(datetime.date, 1, datetime.date.toordinal, datetime.date.fromordinal)
+        ctx = Context()
+        ctx.extra = {'$type': 1, 'value': 2, 'nested': [{'$type': 'dict', 'value': []}]}
+        ctx.tags = [{'$type': None}, datetime.date(2026, 10, 18)]
+        ctx.when = datetime.date(2026, 10, 18)
+        ctx._replies.append({'$type': 1})
+        copy = codec.decode(codec.encode(ctx), Context)
+        for name in ('extra', 'tags', 'when', 'replies'):
+            nose.tools.eq_(getattr(copy, name), getattr(ctx, name))
+        nose.tools.eq_(ctx.extra['nested'][0]['$type'], 'dict')
+
+    def test_lines(self):
+        codec = JsonLinesCodec()
+        contexts = []
+        for i in range(3):
+            ctx = Versioned()
+            ctx.count = i
+            contexts.append(ctx)
+        out = StringIO.StringIO()
+        codec.dump(contexts, out)
+        out.seek(0)
+        nose.tools.eq_([c.count for c in codec.load(out, Versioned)], [0, 1, 2])
+
+
+class TestSchema(unittest.TestCase):
+    def test_mixed_ids(self):
+        class Mixed(DefaultContext):
+            a = Field(id=1)
+            b = Field()
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            Schema(Mixed)
+
+    def test_not_a_context(self):
+        with nose.tools.assert_raises(TypeError):  # @UndefinedVariable
+            Schema(dict)
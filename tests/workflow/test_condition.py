@@ -0,0 +1,117 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import unittest
+import nose.tools
+from mock import Mock
+from marx.workflow.condition import field, Predicate
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import SKIP
+from marx.workflow.flow import Workflow
+from marx.workflow.instrument import StepStats
+from marx.workflow.step import LogicUnit, ArgSpec, Step
+
+
+class Context(DefaultContext):
+    user = Field(str)
+    count = Field(int)
+    total = Field(int)
+
+
+def context(user=None, count=None):
+    ctx = Context()
+    if user is not None:
+        ctx.user = user
+    if count is not None:
+        ctx.count = count
+    return ctx
+
+
+class Add(LogicUnit):
+    count = ArgSpec(int)
+
+    def __call__(self, count):
+        return {'total': count + 1}
+
+
+class BatchedAdd(LogicUnit):
+    batched = True
+    count = ArgSpec(int)
+
+    def __call__(self, count):
+        return [{'total': c + 1} for c in count]
+
+
+class TestConditions(unittest.TestCase):
+    def test_compare(self):
+        cond = field('count') > 2
+        assert cond(context(count=3)) and not cond(context(count=2))
+        nose.tools.eq_(cond.fields, frozenset(['count']))
+        assert (field('count') == 2)(context(count=2))
+        assert (field('count') != 2)(context(count=3))
+        assert field('count').isin([1, 2])(context(count=1))
+        assert field('user').is_none()(context())
+        assert field('user').is_not_none()(context(user="bob"))
+
+    def test_combined(self):
+        cond = field('user') & ((field('count') < 1) | (field('count') >= 10))
+        assert cond(context("bob", 0)) and cond(context("bob", 10))
+        assert not cond(context("bob", 5)) and not cond(context(None, 0))
+        assert (~field('user'))(context())
+        nose.tools.eq_(cond.fields, frozenset(['user', 'count']))
+        nose.tools.eq_(str(cond), "(user & (count < 1 | count >= 10))")
+
+    def test_compiled_once(self):
+        cond = field('count') > 2
+        assert cond.compile() is cond.compile()
+
+    def test_functions(self):
+        cond = (lambda c: c.count == 1) & field('user')
+        assert cond(context("bob", 1)) and not cond(context("bob", 2))
+        assert cond.fields is None
+        assert isinstance(cond.conditions[0], Predicate)
+
+
+class TestGuardedSteps(unittest.TestCase):
+    def setUp(self):
+        self.arg_map = Mock(return_value={'count': 1})
+        self.arg_map.fields = ('count',)
+        self.step = Step(Add(), arg_map=self.arg_map, result_map={'total': 'total'},
+                         when=field('user').is_not_none())
+
+    def test_skipped_before_mapping(self):
+        assert self.step(context()) is SKIP
+        assert not self.arg_map.called
+        nose.tools.eq_(self.step.skipped, 1)
+        assert self.step(context("bob", 1)) is None
+        nose.tools.eq_(self.step.skipped, 1)
+        assert self.arg_map.called
+
+    def test_workflows(self):
+        w = Workflow(steps=[self.step])
+        for run in (w, w.compile(), w.run_parallel):
+            assert run(context()).total is None
+            assert run(context("bob", 1)).total == 2
+        nose.tools.eq_(self.step.skipped, 3)
+
+    def test_stats(self):
+        stats = StepStats()
+        Workflow(steps=[self.step], hooks=[stats])(context())
+        nose.tools.eq_(stats.as_dict()['Add']['skips'], 1)
+
+    def test_reads(self):
+        nose.tools.eq_(self.step.reads, frozenset(['count', 'user']))
+        step = Step(Add(), arg_map={'count': 'count'}, when=lambda c: True)
+        assert step.reads is None
+
+    def test_batched(self):
+        step = Step(BatchedAdd(), arg_map={'count': 'count'}, result_map={'total': 'total'},
+                    when=field('count') > 0)
+        contexts = [context(count=c) for c in (0, 1, 2)]
+        Workflow(steps=[step]).run_many(contexts)
+        nose.tools.eq_([c.total for c in contexts], [None, 2, 3])
+        nose.tools.eq_(step.skipped, 1)
+        assert step(context(count=0)) is None
+        nose.tools.eq_(step.skipped, 2)
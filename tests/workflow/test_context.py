@@ -3,10 +3,13 @@ Created on Feb 24, 2013
 
 @author: nino
 '''
+import pickle
+import threading
 import unittest
 from marx.workflow.context import DefaultContext, Field
 from marx.workflow.exceptions import InvalidContextAssignment
 import nose.tools
+from mock import Mock, patch
 
 
 class TestField(unittest.TestCase):
@@ -51,3 +54,141 @@ class TestField(unittest.TestCase):
             assert hasattr(c, f)
 
         assert not hasattr(c, "d")
+
+    def test_inherited_fields_layout(self):
+        class A(DefaultContext):
+            a = Field(int)
+
+        class B(DefaultContext):
+            b = Field(str)
+
+        class C(A, B):
+            c = Field(int)
+
+        c = C()
+        c.a, c.b, c.c = 1, "b", 3
+        assert (c.a, c.b, c.c, c.message) == (1, "b", 3, None)
+        assert sorted(f.name for f in C._fields) == ["a", "b", "c", "message"]
+        a = A()
+        a.a = 2
+        assert c.a == 1
+
+    def test_hidden_field(self):
+        class A(DefaultContext):
+            a = Field(int)
+
+        class B(A):
+            a = 1
+
+        class C(B):
+            pass
+
+        assert C().a == 1
+        assert 'a' not in C._field_index
+
+
+class TestDefaultContext(unittest.TestCase):
+    def test_no_instance_dict(self):
+        class Context(DefaultContext):
+            user = Field(int)
+
+        c = Context()
+        c.user = 1
+        assert c.__dict__ == {}
+        c.adhoc = 1
+        assert c.__dict__ == {'adhoc': 1}
+
+    def test_pickle(self):
+        c = PickledContext()
+        c.user = 1
+        c.adhoc = "meow"
+        for protocol in (0, 2):
+            c2 = pickle.loads(pickle.dumps(c, protocol))
+            assert c2.user == 1
+            assert c2.message is None
+            assert c2.adhoc == "meow"
+            assert c2.replies == []
+
+
+class PickledContext(DefaultContext):
+    user = Field(int)
+
+
+class TestFork(unittest.TestCase):
+    def setUp(self):
+        self.workflow = Mock()
+        self.c = PickledContext(self.workflow)
+        self.c.user = 1
+        self.c.reply("first")
+
+    def test_isolated(self):
+        fork = self.c.fork()
+        assert type(fork) is PickledContext
+        assert fork.workflow is self.workflow
+        assert (fork.user, fork.replies) == (1, ["first"])
+
+        fork.user = 2
+        fork.reply("fork")
+        self.c.message = "parent"
+        self.c.reply("parent")
+        assert (self.c.user, self.c.message, self.c.replies) == (1, "parent", ["first", "parent"])
+        assert (fork.user, fork.message, fork.replies) == (2, None, ["first", "fork"])
+
+    def test_shared_until_written(self):
+        fork = self.c.fork()
+        assert fork._values is self.c._values
+        assert fork._replies is self.c._replies
+        # forking again copies nothing.
+        assert self.c.fork()._values is fork._values
+
+        fork.user = 2
+        assert fork._values is not self.c._values
+        assert self.c.user == 1
+
+    def test_snapshot_restore(self):
+        self.c.adhoc = "a"
+        snapshot = self.c.snapshot()
+        self.c.user = 2
+        self.c.adhoc = "b"
+        self.c.reply("second")
+
+        self.c.restore(snapshot)
+        assert (self.c.user, self.c.adhoc, self.c.replies) == (1, "a", ["first"])
+        self.c.user = 3
+        self.c.restore(snapshot)
+        assert self.c.user == 1
+
+    def race(self, first, second):
+        """Runs first, and second on another thread as first is making shared
+        values or replies its own, as a thread switch there could."""
+        other = threading.Thread(target=second)
+
+        def copy(items):
+            if other.ident is None:
+                other.start()
+                # if the copy is made under a lock, the other thread waits for it.
+                other.join(0.1)
+            return list(items)
+        with patch('marx.workflow.context.list', copy, create=True):
+            first()
+        other.join()
+
+    def test_concurrent_first_writes(self):
+        self.c.snapshot()
+        self.race(lambda: setattr(self.c, 'user', 2), lambda: setattr(self.c, 'message', "other"))
+        assert (self.c.user, self.c.message) == (2, "other")
+        self.c.snapshot()
+        self.race(lambda: self.c.reply("this"), lambda: self.c.reply("other"))
+        assert sorted(self.c.replies) == ["first", "other", "this"]
+
+    def test_no_attributes_copied(self):
+        assert self.c.snapshot().attributes is None
+        self.c.adhoc = 1
+        assert self.c.snapshot().attributes == {'adhoc': 1}
+
+    def test_pickle_forked(self):
+        fork = self.c.fork()
+        fork.workflow = None
+        fork2 = pickle.loads(pickle.dumps(fork, 2))
+        fork2.user = 2
+        assert fork2.replies == ["first"]
@@ -5,10 +5,12 @@ Created on Feb 23, 2013
 '''
 import unittest
 from marx.workflow.flow import Workflow
-from marx.workflow.exceptions import Abort, SkipStep
+from marx.workflow.exceptions import Abort, BatchError, SkipStep, SKIP
+from marx.workflow.instrument import StepStats
 import nose.tools
 from mock import Mock
-from marx.workflow.context import DefaultContext
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.step import LogicUnit, ArgSpec, ResultSpec, Step
 
 
 class TestAbort(unittest.TestCase):
@@ -111,3 +113,251 @@ class TestOnError(unittest.TestCase):
         assert m_f.called
         assert r == 1
         
+
+
+class TestCompile(unittest.TestCase):
+    def abort(self, context):
+        raise Abort()
+
+    def skip(self, context):
+        raise SkipStep()
+
+    def reply(self, context):
+        context.reply(1)
+
+    def test_matches_interpreted(self):
+        w = Workflow(steps=[self.reply, self.skip, self.reply])
+        run = w.compile()
+        ctx = DefaultContext()
+        assert run(ctx) is ctx
+        assert ctx.workflow is w
+        assert ctx.replies == w(DefaultContext()).replies == [1, 1]
+
+    def test_abort(self):
+        m = Mock()
+        m_a = Mock(return_value=2)
+        w = Workflow(steps=[self.reply, self.abort, m], on_abort=m_a)
+        ctx = DefaultContext()
+        assert w.compile()(ctx) == 2
+        assert not m.called
+        assert m_a.call_args[0][0] is ctx
+        assert isinstance(m_a.call_args[0][1], Abort)
+
+    def test_error(self):
+        m = Mock(side_effect=ValueError)
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            Workflow(steps=[m]).compile()(DefaultContext())
+
+        m_f = Mock(return_value=1)
+        assert Workflow(steps=[m], on_error=m_f).compile()(DefaultContext()) == 1
+        assert isinstance(m_f.call_args[0][0], ValueError)
+
+    def test_step_plans_bound(self):
+        step = Step(Mock(return_value=None))
+        run = Workflow(steps=[step, self.reply]).compile()
+        # the plan of a Step is called directly, a plain callable as it is.
+        assert run.func_globals['step_0'] is step._invoke
+        assert run.func_globals['step_1'] == self.reply
+
+    def test_frozen(self):
+        m = Mock()
+        w = Workflow(steps=[m])
+        run = w.compile()
+        w.steps = w.steps + [self.abort]
+        run(DefaultContext())
+        assert m.called
+
+    def test_example_1(self):
+        from tests.workflow.example_1 import ThrowPieWorkflowA, ThrowPieContext
+        from tests.workflow.example_objects import User
+        ctx = ThrowPieContext()
+        ctx.thrower = User("bob")
+        ctx.target = User("frank")
+        ThrowPieWorkflowA.compile()(ctx)
+        assert ctx.pie == 'lemon'
+        assert ctx.was_hit is False
+
+
+class Lookup(LogicUnit):
+    batched = True
+    key = ArgSpec(int)
+    scale = ArgSpec(int, default=1)
+    value = ResultSpec(int)
+
+    calls = []
+
+    def __call__(self, key, scale):
+        self.calls.append(list(key))
+        results = []
+        for k, s in zip(key, scale):
+            if k < 0:
+                results.append(SkipStep())
+            elif k == 0:
+                results.append(Abort())
+            elif k > 100:
+                results.append(ValueError(k))
+            else:
+                results.append({'value': k * s})
+        return results
+
+
+class BatchContext(DefaultContext):
+    key = Field(int)
+    value = Field(int)
+
+
+def batch_context(key):
+    ctx = BatchContext()
+    ctx.key = key
+    return ctx
+
+
+class TestRunMany(unittest.TestCase):
+    def setUp(self):
+        Lookup.calls = []
+        self.lookup = Step(Lookup(), arg_map={Lookup.KEY: BatchContext.KEY}, result_map={'value': 'value'})
+
+    def test_batched_step(self):
+        m = Mock()
+        w = Workflow(steps=[self.lookup, m])
+        contexts = [batch_context(k) for k in (1, 2, 3)]
+        assert w.run_many(contexts) == contexts
+        assert Lookup.calls == [[1, 2, 3]]
+        assert [c.value for c in contexts] == [1, 2, 3]
+        assert m.call_count == 3
+
+    def test_isolation(self):
+        m = Mock()
+        m_a = Mock(return_value="aborted")
+        m_f = Mock(return_value="failed")
+        w = Workflow(steps=[self.lookup, m, self.lookup], on_abort=m_a, on_error=m_f)
+        contexts = [batch_context(k) for k in (1, -1, 0, 101)]
+        outcomes = w.run_many(contexts)
+        assert outcomes == [contexts[0], contexts[1], "aborted", "failed"]
+        assert Lookup.calls == [[1, -1, 0, 101], [1, -1]]
+        assert m.call_count == 2
+        assert isinstance(m_f.call_args[0][0], ValueError)
+
+    def test_per_item_steps(self):
+        def fail_on_two(context):
+            if context.key == 2:
+                raise ValueError()
+        m_f = Mock(return_value="failed")
+        w = Workflow(steps=[fail_on_two, self.lookup], on_error=m_f)
+        contexts = [batch_context(k) for k in (1, 2)]
+        assert w.run_many(contexts) == [contexts[0], "failed"]
+        assert Lookup.calls == [[1]]
+
+    def test_batch_failure(self):
+        contexts = [batch_context(k) for k in (1, 2)]
+        contexts[0].message, contexts[1].message = 1, "one"
+        m_f = Mock(return_value="failed")
+        w = Workflow(steps=[Step(Lookup(), arg_map={Lookup.KEY: 'message'})], on_error=m_f)
+        assert w.run_many(contexts) == ["failed", "failed"]
+        assert isinstance(m_f.call_args[0][0], TypeError)
+
+    def test_error_mid_batch(self):
+        m = Mock()
+        w = Workflow(steps=[self.lookup, m, self.lookup])
+        contexts = [batch_context(k) for k in (1, 101, 2, 102, 3)]
+        with nose.tools.assert_raises(BatchError) as raised:  # @UndefinedVariable
+            w.run_many(contexts)
+        e = raised.exception
+        nose.tools.eq_(e.outcomes, [contexts[0], None, contexts[2], None, contexts[4]])
+        nose.tools.eq_([(i, type(exc_info[1])) for i, exc_info in e.errors], [(1, ValueError), (3, ValueError)])
+        assert "2 of 5 contexts raised; context 1: ValueError" in str(e)
+        # the other contexts ran to the end.
+        assert Lookup.calls == [[1, 101, 2, 102, 3], [1, 2, 3]]
+        assert m.call_count == 3
+
+    def test_hooks(self):
+        stats, hook = StepStats(), Mock()
+        w = Workflow(steps=[self.lookup, Mock(__name__='after')], on_abort=Mock(), on_error=Mock(),
+                     hooks=[stats, hook])
+        w.run_many([batch_context(k) for k in (1, -1, 0, 101)])
+        nose.tools.eq_([c[0][2] for c in hook.workflow_end.call_args_list],
+                       ['aborted', 'errored', 'completed', 'completed'])
+        row = stats.as_dict()['Lookup']
+        nose.tools.eq_((row['calls'], row['skips'], row['aborts'], row['errors']), (4, 1, 1, 1))
+        nose.tools.eq_(stats.as_dict()['after']['calls'], 2)
+
+    def test_single_context(self):
+        w = Workflow(steps=[self.lookup])
+        assert w(batch_context(4)).value == 4
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            w(batch_context(200))
+        m_a = Mock(return_value="aborted")
+        assert Workflow(steps=[self.lookup], on_abort=m_a)(batch_context(0)) == "aborted"
+
+
+class Gate(LogicUnit):
+    """Skips on negative keys and aborts on 0, by returning the signals."""
+    key = ArgSpec(int)
+    value = ResultSpec(int)
+
+    def __call__(self, key):
+        if key < 0:
+            return SKIP
+        if key == 0:
+            return Abort("zero")
+        self.result.value = key
+
+
+class TestReturnedSignals(unittest.TestCase):
+    def setUp(self):
+        self.after = Mock(return_value=None)
+        self.m_a = Mock(return_value="aborted")
+        self.workflow = Workflow(steps=[Step(Gate(), arg_map={Gate.KEY: 'key'}, result_map={'value': 'value'}),
+                                        self.after],
+                                 on_abort=self.m_a)
+
+    def check(self, run):
+        ctx = run(batch_context(-1))
+        assert ctx.value is None
+        assert self.after.call_count == 1
+        assert run(batch_context(0)) == "aborted"
+        assert self.m_a.call_args[0][1].message == "zero"
+        assert self.after.call_count == 1
+        assert run(batch_context(3)).value == 3
+
+    def test_call(self):
+        self.check(self.workflow)
+
+    def test_compiled(self):
+        self.check(self.workflow.compile())
+
+    def test_parallel(self):
+        self.check(self.workflow.run_parallel)
+
+    def test_run_many(self):
+        self.check(lambda context: self.workflow.run_many([context])[0])
+
+    def test_outcome(self):
+        assert self.workflow.run_outcome(batch_context(0)) == ('aborted', "aborted")
+
+    def test_hooks(self):
+        stats = StepStats()
+        self.workflow.add_hook(stats)
+        self.check(self.workflow)
+        row = stats.as_dict()['Gate']
+        assert (row['calls'], row['skips'], row['aborts']) == (3, 1, 1)
+
+    def test_hooks_run_many(self):
+        stats = StepStats()
+        self.workflow.add_hook(stats)
+        self.check(lambda context: self.workflow.run_many([context])[0])
+        row = stats.as_dict()['Gate']
+        assert (row['calls'], row['skips'], row['aborts']) == (3, 1, 1)
+
+    def test_step_returns_signal(self):
+        assert Step(Gate(), arg_map={Gate.KEY: 'key'})(batch_context(-1)) is SKIP
+        assert Step(Gate(), arg_map={Gate.KEY: 'key'})(batch_context(1)) is None
+
+    def test_on_abort_errors_not_routed(self):
+        m_f = Mock()
+        w = Workflow(steps=[Step(Gate(), arg_map={Gate.KEY: 'key'})],
+                     on_abort=Mock(side_effect=KeyError()), on_error=m_f)
+        for run in (w, w.compile()):
+            with nose.tools.assert_raises(KeyError):  # @UndefinedVariable
+                run(batch_context(0))
+        assert not m_f.called
@@ -0,0 +1,119 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import time
+import unittest
+from mock import Mock
+import nose.tools
+from marx.workflow.context import DefaultContext
+from marx.workflow.exceptions import Abort, SkipStep
+from marx.workflow.flow import Workflow
+from marx.workflow.instrument import Hook, StepStats, LatencyHistogram, step_name
+from marx.workflow.step import LogicUnit, Step
+
+
+class Sleep(LogicUnit):
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self):
+        time.sleep(self.seconds)
+
+
+def skip(context):
+    raise SkipStep()
+
+
+def abort(context):
+    raise Abort()
+
+
+def fail(context):
+    raise ValueError()
+
+
+class Recorder(Hook):
+    def __init__(self):
+        self.events = []
+
+    def workflow_start(self, workflow, context):
+        self.events.append('start')
+
+    def workflow_end(self, workflow, context, outcome, elapsed):
+        self.events.append(outcome)
+
+    def step_end(self, workflow, step, context, elapsed):
+        self.events.append(('end', step_name(step)))
+
+    def step_skip(self, workflow, step, context, elapsed):
+        self.events.append(('skip', step_name(step)))
+
+    def step_abort(self, workflow, step, context, abort, elapsed):
+        self.events.append(('abort', step_name(step)))
+
+    def step_error(self, workflow, step, context, error, elapsed):
+        self.events.append(('error', step_name(step)))
+
+
+class TestHooks(unittest.TestCase):
+    def test_events(self):
+        r = Recorder()
+        w = Workflow(steps=[Step(Sleep(0)), skip, abort, fail], hooks=[r])
+        ctx = DefaultContext()
+        assert w(ctx) is ctx
+        assert r.events == ['start', ('end', 'Sleep'), ('skip', 'skip'), ('abort', 'abort'), 'aborted']
+
+    def test_error(self):
+        r = Recorder()
+        w = Workflow(steps=[fail]).add_hook(r)
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            w(DefaultContext())
+        assert r.events == ['start', ('error', 'fail'), 'errored']
+
+        m_f = Mock(return_value=1)
+        assert Workflow(steps=[fail], on_error=m_f, hooks=[r])(DefaultContext()) == 1
+
+    def test_compiled_and_parallel(self):
+        for run in (lambda w, c: w.compile()(c), lambda w, c: w.run_parallel(c)):
+            r = Recorder()
+            w = Workflow(steps=[skip], hooks=[r])
+            run(w, DefaultContext())
+            assert r.events == ['start', ('skip', 'skip'), 'completed'], r.events
+
+    def test_concatenation_keeps_hooks(self):
+        r = Recorder()
+        w = Workflow(hooks=[r]) + Step(Sleep(0))
+        w(DefaultContext())
+        assert r.events == ['start', ('end', 'Sleep'), 'completed']
+
+
+class TestStepStats(unittest.TestCase):
+    def test_collect(self):
+        stats = StepStats()
+        w = Workflow(steps=[Step(Sleep(0.01)), skip, Step(Sleep(0))], hooks=[stats])
+        for _ in range(10):
+            w(DefaultContext())
+        Workflow(steps=[fail], on_error=Mock(), hooks=[stats])(DefaultContext())
+        result = stats.as_dict()
+        assert result['Sleep']['calls'] == 20
+        # a sleep takes at least as long as asked, and on a loaded machine much longer.
+        assert 0.005 < result['Sleep']['p95'] < 1, result['Sleep']
+        assert result['skip']['skip_rate'] == 1.0
+        assert result['fail']['error_rate'] == 1.0
+        report = stats.report().splitlines()
+        assert len(report) == 4
+        assert report[1].startswith('Sleep')
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        h = LatencyHistogram()
+        assert h.percentile(50) is None
+        for i in range(1, 101):
+            h.add(i / 1000.0)
+        assert 0.045 < h.percentile(50) < 0.056
+        assert 0.09 < h.percentile(99) <= 0.1
+        assert h.percentile(100) == 0.1
+        assert abs(h.mean - 0.0505) < 1e-9
@@ -0,0 +1,78 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import os
+import pickle
+import unittest
+import nose.tools
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.flow import Workflow
+from marx.workflow.process import ProcessPool
+from marx.workflow.step import LogicUnit, ArgSpec, ResultSpec, Step
+
+
+class Score(LogicUnit):
+    cpu_bound = True
+
+    text = ArgSpec(basestring)
+    score = ResultSpec(int)
+    pid = ResultSpec(int)
+    passed = ResultSpec(bool)
+
+    def __call__(self, text):
+        self.result.score = sum(ord(c) for c in text)
+        self.result.pid = os.getpid()
+
+
+class Inspect(LogicUnit):
+    def __call__(self, context):
+        pass
+
+
+class Context(DefaultContext):
+    text = Field(basestring)
+    score = Field(int)
+    pid = Field(int)
+
+
+class TestProcessPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = ProcessPool(2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_step_in_process(self):
+        step = Step(Score(), arg_map=Score.AutoMap(), result_map=Score.ResultMap(Context),
+                    process_pool=self.pool)
+        ctx = Context()
+        ctx.text = "ab"
+        Workflow(steps=[step])(ctx)
+        assert ctx.score == 97 + 98
+        assert ctx.pid != os.getpid()
+
+    def test_cpu_bound_uses_default_pool(self):
+        step = Step(Score(), arg_map=Score.AutoMap())
+        assert step.process_pool is not None
+        assert Step(Inspect()).process_pool is None
+
+    def test_context_is_not_shipped(self):
+        nose.tools.assert_raises(ValueError, Step, Inspect(), process_pool=self.pool)  # @UndefinedVariable
+
+    def test_errors_come_back(self):
+        step = Step(Score(), arg_map={'text': 'score'}, process_pool=self.pool)
+        ctx = Context()
+        ctx.score = 1
+        with nose.tools.assert_raises(TypeError):  # @UndefinedVariable
+            step(ctx)
+
+
+class TestResultPickling(unittest.TestCase):
+    def test_roundtrip(self):
+        result = Score()(text="a")
+        copy = pickle.loads(pickle.dumps(result, 2))
+        assert type(copy) is Score._result_type
+        assert copy.score == 97
+        assert copy.passed is None
@@ -0,0 +1,128 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import time
+import unittest
+import nose.tools
+from mock import Mock, patch
+from marx.workflow.context import DefaultContext
+from marx.workflow.exceptions import Abort
+from marx.workflow.flow import Workflow
+from marx.workflow.replies import BufferedReplySink, ReplyView
+
+
+def chatty(count, then=None):
+    def step(context):
+        for i in range(count):
+            context.reply(i)
+        if then is not None:
+            raise then
+    return Mock(side_effect=step)
+
+
+class TestReplyView(unittest.TestCase):
+    def test_snapshot(self):
+        c = DefaultContext(Mock())
+        c.reply("a")
+        view = c.reply_view
+        c.reply("b")
+        nose.tools.eq_(view, ["a"])
+        nose.tools.eq_(c.reply_view, ["a", "b"])
+        assert c.reply_view._replies is c._replies
+
+    def test_slices(self):
+        view = ReplyView(range(10))
+        nose.tools.eq_(view[7:], [7, 8, 9])
+        nose.tools.eq_(view[2:5][1:], [3, 4])
+        nose.tools.eq_(view[5:2], [])
+        nose.tools.eq_((view[-1], view[3:][0]), (9, 3))
+        nose.tools.assert_raises(IndexError, view.__getitem__, 10)
+        nose.tools.assert_raises(ValueError, view.__getitem__, slice(0, 5, 2))
+
+    def test_forked(self):
+        c = DefaultContext(Mock())
+        c.reply("a")
+        view = c.reply_view
+        fork = c.fork()
+        fork.reply("b")
+        c.reply("c")
+        nose.tools.eq_(view, ["a"])
+        nose.tools.eq_(fork.reply_view, ["a", "b"])
+
+
+class TestBufferedReplySink(unittest.TestCase):
+    def setUp(self):
+        self.deliver = Mock()
+
+    def delivered(self):
+        return [call[0][0] for call in self.deliver.call_args_list]
+
+    def test_batches_by_count(self):
+        w = Workflow(steps=[chatty(5)], on_reply=BufferedReplySink(self.deliver, count=2))
+        c = w(DefaultContext())
+        nose.tools.eq_(self.delivered(), [[0, 1], [2, 3], [4]])
+        assert self.deliver.call_args[0][1] is c
+        nose.tools.eq_(c.replies, range(5))
+
+    def test_flushed_on_abort_and_error(self):
+        sink = BufferedReplySink(self.deliver, count=10)
+        Workflow(steps=[chatty(2, Abort())], on_reply=sink)(DefaultContext())
+        nose.tools.eq_(self.delivered(), [[0, 1]])
+        w = Workflow(steps=[chatty(1, ValueError())], on_reply=sink)
+        nose.tools.assert_raises(ValueError, w, DefaultContext())
+        nose.tools.eq_(self.delivered(), [[0, 1], [0]])
+
+    def test_batches_by_time(self):
+        sink = BufferedReplySink(self.deliver, count=100, interval=0.01)
+        c = DefaultContext()
+        sink(0, c)
+        time.sleep(0.02)
+        sink(1, c)
+        sink(2, c)
+        nose.tools.eq_(self.delivered(), [[0, 1]])
+        sink.flush_all()
+        nose.tools.eq_(self.delivered(), [[0, 1], [2]])
+
+    def test_per_context(self):
+        sink = BufferedReplySink(self.deliver)
+        w = Workflow(steps=[chatty(2)], on_reply=sink)
+        contexts = [DefaultContext(), DefaultContext()]
+        w.run_many(contexts)
+        nose.tools.eq_(self.delivered(), [[0, 1], [0, 1]])
+        nose.tools.eq_([call[0][1] for call in self.deliver.call_args_list], contexts)
+
+    def test_registered_once(self):
+        sink = BufferedReplySink(self.deliver)
+        w = Workflow(steps=[chatty(2)], on_reply=sink, hooks=[sink])
+        nose.tools.eq_(w.hooks, [sink])
+        nose.tools.eq_((w + w).hooks, [sink])
+        w(DefaultContext())
+        nose.tools.eq_(self.delivered(), [[0, 1]])
+
+    def test_handler_with_own_flush(self):
+        class Writer(object):
+            def __init__(self):
+                self.lines, self.flushed = [], 0
+
+            def __call__(self, reply, context):
+                self.lines.append(reply)
+
+            def flush(self):
+                self.flushed += 1
+        writer = Writer()
+        w = Workflow(steps=[chatty(2)], on_reply=writer)
+        for call in (w, w.compile(), w.run_parallel, lambda c: w.run_many([c])):
+            call(DefaultContext())
+        nose.tools.eq_((writer.lines, writer.flushed), ([0, 1] * 4, 0))
+
+    def test_uninstrumented(self):
+        sink = BufferedReplySink(self.deliver, count=10)
+        w = Workflow(steps=[chatty(2)], on_reply=sink)
+        nose.tools.eq_(w.hooks, [])
+        with patch('marx.workflow.instrument.run_outcome') as run:
+            for call in (w, w.compile(), w.run_parallel, lambda c: w.run_outcome(c)[1]):
+                call(DefaultContext())
+        assert not run.called
+        nose.tools.eq_(self.delivered(), [[0, 1]] * 4)
@@ -0,0 +1,134 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import threading
+import time
+import unittest
+from mock import Mock
+import nose.tools
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import Abort, SkipStep
+from marx.workflow.flow import Workflow
+from marx.workflow.schedule import DependencyGraph
+from marx.workflow.step import LogicUnit, ArgSpec, ResultSpec, Step
+
+
+class Context(DefaultContext):
+    user_id = Field(int)
+    user = Field(str)
+    inventory = Field(list)
+    price = Field(int)
+    summary = Field(str)
+
+
+class Rendezvous(object):
+    """Lets its callers through once count of them are waiting; a step waiting
+    on one only gets through if the others run at the same time."""
+    def __init__(self, count, timeout=5):
+        self.count, self.timeout = count, timeout
+        self.arrived = 0
+        self._cond = threading.Condition()
+
+    def wait(self):
+        with self._cond:
+            self.arrived += 1
+            self._cond.notify_all()
+            deadline = time.time() + self.timeout
+            while self.arrived < self.count and time.time() < deadline:
+                self._cond.wait(deadline - time.time())
+            if self.arrived < self.count:
+                raise AssertionError("%d of %d steps ran at once" % (self.arrived, self.count))
+
+
+class Fetch(LogicUnit):
+    user_id = ArgSpec(int)
+    value = ResultSpec(object)
+
+    def __init__(self, value, delay=0.1, meet=None):
+        self.value_, self.delay, self.meet = value, delay, meet
+
+    def __call__(self, user_id):
+        if self.meet is not None:
+            self.meet.wait()
+        time.sleep(self.delay)
+        if isinstance(self.value_, Exception):
+            raise self.value_
+        self.result.value = self.value_
+
+
+class Combine(LogicUnit):
+    summary = ResultSpec(str)
+
+    def __call__(self, user, inventory, price):
+        self.result.summary = "%s:%d:%d" % (user, len(inventory), price)
+
+
+def fetch(field, value, delay=0.1, meet=None):
+    return Step(Fetch(value, delay, meet), arg_map=Fetch.AutoMap(), result_map={field: 'value'})
+
+
+COMBINE = Step(Combine(), arg_map=Combine.AutoMap(), result_map=Combine.ResultMap(Context))
+
+
+def context():
+    ctx = Context()
+    ctx.user_id = 1
+    return ctx
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_requires(self):
+        steps = [fetch('user', 'bob'), fetch('price', 1), COMBINE, fetch('price', 2), Mock()]
+        graph = DependencyGraph(steps)
+        assert graph.requires == [set(), set(), {0, 1}, {1, 2}, {0, 1, 2, 3}], graph.requires
+
+    def test_read_after_write_of_read_field(self):
+        read = Step(Mock(_accepts_context=False), arg_map={'a': 'user'})
+        write = Step(Mock(_accepts_context=False), result_map={'user': 'a'})
+        assert DependencyGraph([read, write]).requires == [set(), {0}]
+        assert DependencyGraph([read, read]).requires == [set(), set()]
+
+
+class TestRunParallel(unittest.TestCase):
+    def test_fan_out(self):
+        # the three fetches only get past the rendezvous together.
+        meet = Rendezvous(3)
+        w = Workflow(steps=[fetch('user', 'bob', 0, meet), fetch('inventory', [1, 2], 0, meet),
+                            fetch('price', 3, 0, meet), COMBINE])
+        ctx = w.run_parallel(context())
+        assert ctx.summary == "bob:2:3"
+
+    def test_conflicting_writes_in_order(self):
+        w = Workflow(steps=[fetch('price', 1, 0.05), fetch('price', 2, 0)])
+        assert w.run_parallel(context()).price == 2
+
+    def test_barrier(self):
+        seen = []
+        w = Workflow(steps=[fetch('price', 1, 0.05),
+                            lambda context: seen.append(context.price),
+                            fetch('price', 2, 0)])
+        assert w.run_parallel(context()).price == 2
+        assert seen == [1]
+
+    def test_skip(self):
+        m = Mock(side_effect=SkipStep)
+        w = Workflow(steps=[m, fetch('price', 1, 0)])
+        assert w.run_parallel(context()).price == 1
+
+    def test_abort(self):
+        m_a = Mock(return_value="aborted")
+        w = Workflow(steps=[fetch('user', Abort(), 0), fetch('price', 1, 0), COMBINE], on_abort=m_a)
+        assert w.run_parallel(context()) == "aborted"
+        assert isinstance(m_a.call_args[0][1], Abort)
+
+    def test_first_error_wins(self):
+        m_f = Mock(return_value="failed")
+        w = Workflow(steps=[fetch('user', ValueError(), 0.05), fetch('price', Abort(), 0)], on_error=m_f)
+        assert w.run_parallel(context()) == "failed"
+        assert isinstance(m_f.call_args[0][0], ValueError)
+
+        w = Workflow(steps=[fetch('user', ValueError(), 0)])
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            w.run_parallel(context())
@@ -0,0 +1,71 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import unittest
+import nose.tools
+from mock import Mock
+from marx.workflow.flow import Workflow
+from marx.workflow.sequence import StepSequence
+
+
+class TestStepSequence(unittest.TestCase):
+    def test_concat_shares(self):
+        a = StepSequence([1, 2])
+        b = StepSequence([3])
+        c = a + b
+        assert c.parts == (a, b)
+        nose.tools.eq_(list(c), [1, 2, 3])
+        nose.tools.eq_(len(c), 3)
+        assert list(a) == [1, 2]
+
+    def test_empty(self):
+        a = StepSequence([1])
+        assert a + [] is a
+        assert [] + a is a
+        assert StepSequence() == []
+
+    def test_deep(self):
+        seq = StepSequence()
+        for i in range(5000):
+            seq = seq + (i,)
+        nose.tools.eq_(seq.flat, tuple(range(5000)))
+
+    def test_sequence_protocol(self):
+        seq = [1] + StepSequence([2]) + (3,)
+        assert isinstance(seq, StepSequence)
+        assert seq == [1, 2, 3] and seq == (1, 2, 3) and seq != [1, 2]
+        nose.tools.eq_(seq[1], 2)
+        nose.tools.eq_(seq[1:], [2, 3])
+        assert 3 in seq and 4 not in seq
+        nose.tools.eq_(hash(seq), hash(StepSequence([1, 2, 3])))
+
+    def test_flat_reuses_parts(self):
+        a = StepSequence([1]) + [2]
+        flat = a.flat
+        assert a.flat is flat
+        nose.tools.eq_((a + [3]).flat, (1, 2, 3))
+
+
+class TestWorkflowComposition(unittest.TestCase):
+    def test_add_is_persistent(self):
+        m1, m2 = Mock(), Mock()
+        base = Workflow(steps=[m1])
+        fragment = Workflow(steps=[m2])
+        extended = base + fragment
+        nose.tools.eq_(base.steps, [m1])
+        nose.tools.eq_(extended.steps, [m1, m2])
+        assert extended.steps.parts == (base.steps, fragment.steps)
+
+    def test_steps_immutable(self):
+        w = Workflow(steps=[Mock()])
+        with nose.tools.assert_raises(AttributeError):  # @UndefinedVariable
+            w.steps.append(Mock())
+
+    def test_add_step_does_not_share(self):
+        base = Workflow(steps=[Mock()])
+        other = Workflow(steps=base.steps)
+        other.steps = other.steps + [Mock()]
+        nose.tools.eq_(len(base.steps), 1)
+        nose.tools.eq_(len(other.steps), 2)
@@ -3,13 +3,17 @@ Created on Feb 23, 2013
 
 @author: nino
 '''
+import sys
+import threading
+import time
 import unittest
 from mock import Mock, patch
 from marx.workflow.step import Step, LogicUnit, ArgSpec, ResultSpec,\
     ResultObject
 import nose.tools
 from tests.workflow.example_1 import run as run_example_1
-from marx.workflow.context import DefaultContext
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.flow import Workflow
 
 
 class Test(unittest.TestCase):
@@ -117,6 +121,23 @@ class Test(unittest.TestCase):
         m.assert_any_call(message=1)
         m.assert_any_call(meow=1)
 
+    def test_extra_kwargs_precedence(self):
+        m = Mock()
+        m._accepts_context = True
+        ctx = DefaultContext()
+        ctx.message = 1
+        Step(m, arg_map={'message': 'message'}, extra_kwargs=dict(message=2))(ctx)
+        m.assert_called_once_with(context=ctx, message=2)
+
+        m.reset_mock()
+        Step(m, extra_kwargs=dict(context=None))(ctx)
+        m.assert_called_once_with(context=None)
+
+    def test_result_mapper_bad_mapping(self):
+        m = Mock()
+        m._accepts_context = False
+        nose.tools.assert_raises(TypeError, Step, m, result_map={'baz': 1})  # @UndefinedVariable
+
     def test_arg_mapper_custom(self):
         m = Mock()
         m._accepts_context = None
@@ -177,6 +198,36 @@ class Test(unittest.TestCase):
         Step(Unit(), arg_map=Unit.AutoMap())(Ctx())
         assert self.success == (True, "not kosher")
 
+    def test_auto_map_ctx_cls(self):
+        class Ctx(DefaultContext):
+            cow = Field(bool)
+            moo = Field(int)
+
+        class Unit(LogicUnit):
+            def __call__(self, cow, moo, context, pig="not kosher"):
+                return cow, moo, context, pig
+
+        auto_map = Unit.AutoMap(ctx_cls=Ctx)
+        ctx = Ctx()
+        ctx.cow, ctx.moo = True, 1
+        nose.tools.eq_(auto_map(ctx), {'cow': True, 'moo': 1, 'context': ctx, 'pig': "not kosher"})
+        assert auto_map.fields is None
+
+        auto_map = Unit.AutoMap({'pig': 'moo'}, ctx_cls=Ctx)
+        nose.tools.eq_(auto_map(ctx)['pig'], 1)
+
+    def test_auto_map_ctx_cls_missing(self):
+        class Ctx(DefaultContext):
+            cow = Field(bool)
+
+        class Unit(LogicUnit):
+            def __call__(self, cow, pig):
+                pass
+
+        with nose.tools.assert_raises(AttributeError):  # @UndefinedVariable
+            Unit.AutoMap(ctx_cls=Ctx)
+        nose.tools.eq_(Unit.AutoMap({'pig': 'cow'}, ctx_cls=Ctx).fields, ('cow', 'cow'))
+
     def test_callable_by_str(self):
         ctx = DefaultContext()
         with patch('inspect.getargspec') as argspec:
@@ -253,6 +304,23 @@ class Test(unittest.TestCase):
         assert result_1['the_cat_has_spoken']
         assert not result_2['the_cat_has_spoken']
 
+    def test_result_type(self):
+        class Unit(LogicUnit):
+            spoken = ResultSpec(bool, default=True)
+            times = ResultSpec(int)
+
+            def __call__(self):
+                self.result['times'] = 2
+
+        assert issubclass(Unit._result_type, ResultObject)
+        result = Unit()()
+        assert type(result) is Unit._result_type
+        assert not hasattr(result, '__dict__')
+        assert result.spoken is True and result['times'] == 2
+        nose.tools.assert_raises(KeyError, result.__getitem__, 'meow')  # @UndefinedVariable
+        nose.tools.assert_raises(KeyError, result.__setitem__, 'meow', 1)  # @UndefinedVariable
+        nose.tools.assert_raises(TypeError, result.__setitem__, 'times', 'meow')  # @UndefinedVariable
+
 # don't change this name, test above depends on it.
 a_callable = Mock()
 
@@ -333,6 +401,44 @@ class TestLogicUnit(unittest.TestCase):
 
         assert Nullable()(meow=10) == 10
 
+    def test_undefined_argument(self):
+        class Unit(LogicUnit):
+            meow = ArgSpec(int)
+            purr = ArgSpec(int, default=2)
+
+            def __call__(self, meow, purr):
+                return meow, purr
+
+        with nose.tools.assert_raises(KeyError) as e:  # @UndefinedVariable
+            Unit()()
+        assert e.exception.args[0] == "Undefined argument: 'meow' for 'Unit'"
+        assert Unit()(meow=1) == (1, 2)
+
+    def test_normalizer(self):
+        class Unit(LogicUnit):
+            meows = ArgSpec(int, normalizer=ArgSpec.as_list)
+            purrs = ArgSpec(int, default=3, normalizer=ArgSpec.as_list)
+
+            def __call__(self, meows, purrs):
+                return meows, purrs
+
+        assert Unit()(meows=1) == ([1], [3])
+        assert Unit()(meows=(1, 2), purrs=[4]) == ([1, 2], [4])
+        nose.tools.assert_raises(TypeError, Unit(), meows=["1"])  # @UndefinedVariable
+
+    def test_single_wrapper(self):
+        class Unit(LogicUnit):
+            a = ArgSpec(int)
+            b = ArgSpec(int)
+            c = ArgSpec(int)
+
+            def __call__(self, a, b, c):
+                return a + b + c
+
+        assert sorted(s.name for s in Unit._arg_specs) == list("abc")
+        assert Unit.__call__.__name__ == '__call__'
+        assert Unit()(a=1, b=2, c=3) == 6
+
 
 class TestArgSpec(unittest.TestCase):
     def test_any_arg(self):
@@ -350,3 +456,66 @@ class TestFlow(unittest.TestCase):
         ctx = run_example_1()
         assert ctx
 
+
+
+class TestLazyBinding(unittest.TestCase):
+    TARGET = 'tests.workflow.lazy_target'
+
+    def setUp(self):
+        sys.modules.pop(self.TARGET, None)
+
+    def test_resolved_on_first_call(self):
+        step = Step(self.TARGET + '.double', arg_map={'value': 'value'}, result_map={'doubled': lambda r, c: r})
+        assert self.TARGET not in sys.modules
+        nose.tools.eq_(step.name, 'double')
+        assert self.TARGET not in sys.modules
+
+        ctx = DefaultContext()
+        ctx.value = 4
+        step(ctx)
+        nose.tools.eq_(ctx.doubled, 8)
+        assert self.TARGET in sys.modules
+
+    def test_malformed_target(self):
+        for target in ('foo', 'foo.', '.foo', 'foo bar.baz', ''):
+            nose.tools.assert_raises(ValueError, Step, target)  # @UndefinedVariable
+            nose.tools.assert_raises(ValueError, Step, target, lazy=False)  # @UndefinedVariable
+
+    def test_binding_failure_in_property(self):
+        step = Step(self.TARGET + '.missing', arg_map={'value': 'value'})
+        # an AttributeError would have passed for reads itself missing.
+        with nose.tools.assert_raises(ImportError) as raised:  # @UndefinedVariable
+            step.reads
+        assert "cannot bind %s.missing" % self.TARGET in str(raised.exception)
+
+    def test_warm(self):
+        step = Step(self.TARGET + '.double')
+        Workflow(steps=[step]).warm()
+        assert self.TARGET in sys.modules
+        assert step._call is sys.modules[self.TARGET].double
+
+    def test_resolved_once_across_threads(self):
+        step = Step(self.TARGET + '.double')
+        calls = []
+        bind = step._bind
+
+        def slow_bind():
+            calls.append(1)
+            time.sleep(0.01)
+            bind()
+        step._bind = slow_bind
+
+        threads = [threading.Thread(target=lambda: step._invoke) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        nose.tools.eq_(len(calls), 1)
+
+    def test_errors_deferred(self):
+        step = Step(self.TARGET + '.missing')
+        nose.tools.assert_raises(ImportError, step, DefaultContext())
+
+    def test_eager(self):
+        nose.tools.assert_raises(ImportError, Step, self.TARGET + '.missing', lazy=False)
+        assert Step(self.TARGET + '.double', lazy=False)._call is sys.modules[self.TARGET].double
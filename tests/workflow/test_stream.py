@@ -0,0 +1,100 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import threading
+import time
+import unittest
+import nose.tools
+from mock import Mock
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import Abort
+from marx.workflow.flow import Workflow
+from marx.workflow.stream import StreamResult
+
+
+class Context(DefaultContext):
+    key = Field(int)
+    value = Field(int)
+
+
+class Compute(object):
+    """Sleeps longer for lower keys; aborts on 0, fails on negative keys."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def __call__(self, context):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(0.002 * (5 - context.key % 5))
+            if context.key == 0:
+                raise Abort()
+            if context.key < 0:
+                raise ValueError(context.key)
+            context.value = context.key * 10
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def context(key):
+    ctx = Context()
+    ctx.key = key
+    return ctx
+
+
+class TestStream(unittest.TestCase):
+    def setUp(self):
+        self.compute = Compute()
+        self.workflow = Workflow(steps=[self.compute])
+
+    def test_ordered(self):
+        results = list(self.workflow.stream([context(i) for i in range(1, 31)], concurrency=4))
+        nose.tools.eq_([r.context.key for r in results], range(1, 31))
+        assert all(r.outcome == 'completed' and r.result.value == r.context.key * 10 for r in results)
+        assert 1 < self.compute.peak <= 4
+
+    def test_completion_order(self):
+        results = list(self.workflow.stream([context(i) for i in (1, 4)], concurrency=2, ordered=False))
+        nose.tools.eq_([r.context.key for r in results], [4, 1])
+
+    def test_outcomes(self):
+        m_a = Mock(return_value="aborted")
+        w = Workflow(steps=[self.compute], on_abort=m_a)
+        results = list(w.stream([context(1), context(0), context(-1)]))
+        nose.tools.eq_([r.outcome for r in results], ['completed', 'aborted', 'errored'])
+        nose.tools.eq_(results[1].result, "aborted")
+        # the default on_error re-raises.
+        assert isinstance(results[2].error, ValueError)
+        assert results[2].result is None
+
+    def test_errored_handled(self):
+        m_f = Mock(return_value="failed")
+        w = Workflow(steps=[self.compute], on_error=m_f)
+        ctx = context(-1)
+        nose.tools.eq_(list(w.stream([ctx])), [StreamResult(ctx, 'errored', "failed", None)])
+
+    def test_backpressure(self):
+        drawn = []
+
+        def contexts():
+            for i in range(1, 1000):
+                drawn.append(i)
+                yield context(i)
+
+        results = self.workflow.stream(contexts(), concurrency=3)
+        for _ in range(5):
+            next(results)
+        # the 5 handed out, and at most 3 beyond them.
+        assert len(drawn) <= 8, len(drawn)
+        results.close()
+        assert self.compute.running == 0
+
+    def test_bad_concurrency(self):
+        with nose.tools.assert_raises(ValueError):  # @UndefinedVariable
+            next(self.workflow.stream([], concurrency=0))
@@ -0,0 +1,135 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import gc
+import json
+import StringIO
+import unittest
+import nose.tools
+from mock import patch
+from marx.workflow import instrument
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import Abort, SkipStep
+from marx.workflow.flow import Workflow
+from marx.workflow.step import Step
+from marx.workflow.trace import JsonLinesExporter, RingBufferExporter, Tracer
+
+
+class Context(DefaultContext):
+    items = Field(list)
+    count = Field(int)
+
+
+class Count(object):
+    def __call__(self, items):
+        return {'count': len(items)}
+
+
+class Skip(object):
+    def __call__(self, context):
+        raise SkipStep()
+
+
+class Fail(object):
+    def __call__(self, context):
+        raise ValueError("boom")
+
+
+COUNT = Step(Count(), arg_map={'items': 'items'}, result_map={'count': 'count'}, docs="Counts the items.")
+
+
+def context():
+    ctx = Context()
+    ctx.items = [1, 2, 3]
+    return ctx
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.exporter = RingBufferExporter()
+        self.tracer = Tracer(self.exporter)
+
+    def test_spans(self):
+        w = Workflow(steps=[COUNT, Skip()], hooks=[self.tracer])
+        w(context())
+        count, skip, run = self.exporter.spans()
+        nose.tools.eq_([s.kind for s in (count, skip, run)], ['step', 'step', 'workflow'])
+        assert len(set(s.trace_id for s in (count, skip, run))) == 1
+        assert run.parent_id is None
+        nose.tools.eq_((count.parent_id, skip.parent_id), (run.span_id, run.span_id))
+        nose.tools.eq_((count.name, count.status, skip.status, run.status), ('Count', 'ok', 'skipped', 'ok'))
+        nose.tools.eq_(count.attributes, {'docs': "Counts the items.", 'size.items': 3})
+        nose.tools.eq_(run.attributes, {'steps': 2})
+        assert run.duration >= count.duration >= 0
+        nose.tools.eq_(self.tracer._traces, {})
+
+    def test_abort_and_error(self):
+        def abort(context):
+            raise Abort()
+        Workflow(steps=[abort], hooks=[self.tracer])(context())
+        w = Workflow(steps=[Fail()], hooks=[self.tracer], on_error=lambda e, c: c)
+        w(context())
+        aborted, aborted_run, errored, errored_run = self.exporter.spans()
+        nose.tools.eq_([s.status for s in self.exporter.spans()], ['aborted', 'aborted', 'errored', 'errored'])
+        nose.tools.eq_(errored.attributes['error'], "ValueError: boom")
+
+    def test_nested_workflow(self):
+        inner = Workflow(steps=[COUNT], hooks=[self.tracer])
+        outer = Workflow(steps=[inner], hooks=[self.tracer])
+        outer(context())
+        count, inner_run, inner_step, outer_run = self.exporter.spans()
+        nose.tools.eq_([s.kind for s in (count, inner_run, inner_step, outer_run)],
+                       ['step', 'workflow', 'step', 'workflow'])
+        nose.tools.eq_(inner_run.parent_id, inner_step.span_id)
+        nose.tools.eq_(count.parent_id, inner_run.span_id)
+
+    def test_sampling(self):
+        tracer = Tracer(self.exporter, rate=10)
+        w = Workflow(steps=[COUNT], hooks=[tracer])
+        for _ in range(100):
+            w(context())
+        nose.tools.eq_(len(self.exporter.spans()), 20)
+
+    def test_unsampled_runs_uninstrumented(self):
+        tracer = Tracer(self.exporter, rate=10)
+        w = Workflow(steps=[COUNT, Skip()], hooks=[tracer])
+        with patch('marx.workflow.instrument.call_step', wraps=instrument.call_step) as call_step:
+            for _ in range(100):
+                w(context())
+        # only the steps of the 10 traced runs went through the hooks.
+        nose.tools.eq_(call_step.call_count, 20)
+        nose.tools.eq_(len(self.exporter.spans()), 30)
+
+    def test_steps_not_kept(self):
+        # a builtin, which can't be weakly referenced, is described each time.
+        w = Workflow(steps=[Step(Count(), arg_map={'items': 'items'}), {}.update], hooks=[self.tracer])
+        ctx = context()
+        w(ctx)
+        nose.tools.eq_([s.name for s in self.exporter.spans()], ['Count', 'update', 'Workflow'])
+        nose.tools.eq_(len(self.tracer._steps), 1)
+        del w, ctx
+        gc.collect()
+        nose.tools.eq_(len(self.tracer._steps), 0)
+
+    def test_ring_buffer(self):
+        exporter = RingBufferExporter(capacity=3)
+        w = Workflow(steps=[COUNT], hooks=[Tracer(exporter)])
+        for _ in range(5):
+            w(context())
+        nose.tools.eq_([s.kind for s in exporter.spans()], ['workflow', 'step', 'workflow'])
+        exporter.clear()
+        nose.tools.eq_(exporter.spans(), [])
+
+
+class TestJsonLinesExporter(unittest.TestCase):
+    def test_export(self):
+        out = StringIO.StringIO()
+        exporter = JsonLinesExporter(out)
+        Workflow(steps=[COUNT], hooks=[Tracer(exporter)])(context())
+        exporter.close()
+        spans = [json.loads(line) for line in out.getvalue().splitlines()]
+        nose.tools.eq_([s['kind'] for s in spans], ['step', 'workflow'])
+        nose.tools.eq_(spans[0]['attributes']['size.items'], 3)
+        nose.tools.eq_(spans[0]['parent_id'], spans[1]['span_id'])
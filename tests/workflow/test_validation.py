@@ -0,0 +1,125 @@
+'''
+Created on Oct 18, 2026
+
+@author: nino
+'''
+import unittest
+import nose.tools
+from marx.workflow import validation
+from marx.workflow.context import DefaultContext, Field
+from marx.workflow.exceptions import InvalidContextAssignment
+from marx.workflow.flow import Workflow
+from marx.workflow.step import LogicUnit, ArgSpec, ResultSpec, Step
+from marx.workflow.validation import Validation, STRICT, SAMPLED, TRUSTED
+
+
+class Context(DefaultContext):
+    count = Field(int)
+    label = Field(str)
+
+
+class Label(LogicUnit):
+    count = ArgSpec(int)
+    label = ResultSpec(str)
+
+    def __call__(self, count):
+        self.result.label = count
+
+
+class BatchedLabel(LogicUnit):
+    batched = True
+    count = ArgSpec(int)
+
+    def __call__(self, count):
+        return count
+
+
+class ValidationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.violations = []
+        self.previous = validation.set_default(Validation())
+
+    def tearDown(self):
+        validation.set_default(self.previous)
+
+    def use(self, mode, rate=100):
+        validation.set_default(Validation(mode, rate, on_violation=self.violations.append))
+
+
+class TestModes(ValidationTestCase):
+    def test_strict(self):
+        self.use(STRICT)
+        c = Context()
+        with nose.tools.assert_raises(InvalidContextAssignment):  # @UndefinedVariable
+            c.count = "1"
+        with nose.tools.assert_raises(TypeError):  # @UndefinedVariable
+            Label()(count="1")
+        with nose.tools.assert_raises(TypeError):  # @UndefinedVariable
+            Label()(count=1)
+        nose.tools.eq_([v.kind for v in self.violations], ['field', 'argument', 'result'])
+        nose.tools.eq_(self.violations[0], validation.Violation('field', 'count', "1", (int,)))
+
+    def test_trusted(self):
+        self.use(TRUSTED)
+        c = Context()
+        c.count = "1"
+        nose.tools.eq_(c.count, "1")
+        nose.tools.eq_(Label()(count=2).label, 2)
+        nose.tools.eq_(BatchedLabel()(count=["a"]), ["a"])
+        nose.tools.eq_(self.violations, [])
+
+    def test_sampled(self):
+        self.use(SAMPLED, rate=3)
+        c = Context()
+        for i in range(9):
+            c.count = str(i)
+        # reported, not raised.
+        nose.tools.eq_([v.value for v in self.violations], ["0", "3", "6"])
+
+    def test_switch_without_redefining(self):
+        c = Context()
+        self.use(TRUSTED)
+        c.count = "1"
+        self.use(STRICT)
+        with nose.tools.assert_raises(InvalidContextAssignment):  # @UndefinedVariable
+            c.count = "1"
+
+    def test_normalizers_run(self):
+        class Listed(LogicUnit):
+            items = ArgSpec(int, normalizer=ArgSpec.as_list)
+
+            def __call__(self, items):
+                return items
+        self.use(TRUSTED)
+        nose.tools.eq_(Listed()(items=1), [1])
+
+    def test_bad_mode(self):
+        nose.tools.assert_raises(ValueError, Validation, 'lenient')
+        nose.tools.assert_raises(ValueError, Validation, SAMPLED, rate=0)
+
+
+class TestWorkflowPolicy(ValidationTestCase):
+    def workflow(self, policy):
+        return Workflow(steps=[Step(Label(), arg_map={'count': 'count'}, result_map={'label': 'label'})],
+                        validation=policy)
+
+    def test_applied_to_runs(self):
+        w = self.workflow(Validation(TRUSTED))
+        c = Context()
+        c.count = 3
+        nose.tools.eq_(w(c).label, 3)
+        nose.tools.eq_(w.compile()(c).label, 3)
+        nose.tools.eq_(w.run_many([c])[0].label, 3)
+        nose.tools.eq_(w.run_parallel(c).label, 3)
+
+        # the default applies outside of the runs.
+        with nose.tools.assert_raises(InvalidContextAssignment):  # @UndefinedVariable
+            c.label = 3
+
+    def test_default_policy(self):
+        self.use(TRUSTED)
+        w = self.workflow(Validation(STRICT))
+        c = Context()
+        c.count = 3
+        with nose.tools.assert_raises(TypeError):  # @UndefinedVariable
+            w(c)